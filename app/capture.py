@@ -0,0 +1,122 @@
+"""Headless capture process writing one bus into a shared-memory frame ring.
+
+The capture process only receives and packs frames. The GUI and analysis
+tools attach with ``interface="shm"`` and ``channel`` set to the ring name,
+each with its own cursor, so decoding and UI work never competes with
+capture for the same GIL. ``--stream`` additionally publishes the frames on
+a :class:`canio.stream.FrameServer` for clients that also need to transmit.
+
+Run with ``python -m app.capture --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import signal
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from canio.can_bus import CanBusController, ReceivedMessage
+from canio.shm_ring import DEFAULT_RING, SharedFrameRing
+from canio.stream import FrameServer
+from core.config import BusConfig
+from core.profiler import profiling
+
+
+def run_capture(
+    config: BusConfig,
+    ring_name: str = DEFAULT_RING,
+    capacity: int = 1 << 18,
+    stop: Optional[multiprocessing.synchronize.Event] = None,
+    ready: Optional[multiprocessing.synchronize.Event] = None,
+    stream_address: Optional[str] = None,
+) -> int:
+    """Capture ``config`` into the ring until ``stop`` is set; returns the frame count."""
+    ring = SharedFrameRing(ring_name, capacity)
+    server = FrameServer(stream_address) if stream_address else None
+    bus = CanBusController(config)
+    if server is None:
+        bus.set_callback(ring.append_message)
+    else:
+
+        def publish(message: ReceivedMessage) -> None:
+            ring.append_message(message)
+            server.publish(message)
+
+        bus.set_callback(publish)
+        server.start()
+    stop = stop or multiprocessing.Event()
+    try:
+        bus.start()
+        if ready is not None:
+            ready.set()
+        while not stop.wait(0.5):
+            pass
+    finally:
+        bus.stop()
+        if server is not None:
+            server.stop()
+        ring.close()
+    return ring.total
+
+
+def start_capture_process(
+    config: BusConfig, ring_name: str = DEFAULT_RING, capacity: int = 1 << 18, timeout: float = 10.0
+) -> Tuple[multiprocessing.Process, multiprocessing.synchronize.Event]:
+    """Start :func:`run_capture` in a child process; returns it with its stop event.
+
+    Returns once the ring exists and the bus is open, so readers can attach.
+    """
+    stop = multiprocessing.Event()
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=run_capture, args=(config, ring_name, capacity, stop, ready), name="can-capture", daemon=True
+    )
+    process.start()
+    if not ready.wait(timeout):
+        process.terminate()
+        raise RuntimeError("Capture process did not start")
+    return process, stop
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Capture one CAN bus into a shared-memory frame ring")
+    parser.add_argument("--interface", default="virtual", help="python-can interface")
+    parser.add_argument("--channel", default="vcan0")
+    parser.add_argument("--bitrate", type=int, default=500000)
+    parser.add_argument("--fd", action="store_true", help="Open the bus in CAN FD mode")
+    parser.add_argument("--data-bitrate", type=int, default=None)
+    parser.add_argument("--ring", default=DEFAULT_RING, help="Shared-memory name of the ring")
+    parser.add_argument("--capacity", type=int, default=1 << 18, help="Frames held in the ring")
+    parser.add_argument("--stream", metavar="ADDRESS", help="Also publish frames on a stream server")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    config = BusConfig(
+        channel=args.channel,
+        interface=args.interface,
+        bitrate=args.bitrate,
+        fd=args.fd,
+        data_bitrate=args.data_bitrate,
+    )
+    stop = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    print(f"capturing {args.interface}:{args.channel} into shared memory {args.ring!r}")
+    try:
+        with profiling(args.profile):
+            frames = run_capture(config, args.ring, args.capacity, stop, stream_address=args.stream)
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print(f"captured {frames} frames")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,14 +5,29 @@ import time
 from pathlib import Path
 from typing import Dict, Optional
 
+import can
+from cantools.database import EncodeError
 from PySide6 import QtCore
 
+from core.bus_stats import BusStatistics
 from core.config import BusConfig, WorkspaceSettings
-from core.dbc_manager import DbcManager, DbcLoadError
-from core.models import RxBuffer, RxEntry, TxMessageModel
+from core.dbc_manager import DbcLoadError, DbcManager, DbcWatcher, LoadedDbc
+from core.dbc_reload import HistoryRedecoder, affected_ids
+from core.decode_pool import ShardedDecoder
+from core.filters import FilterError, compile_filter
+from core.j1939 import TransportReassembler
+from core.models import TxMessageModel
+from core.profiler import STAGES, SamplingProfiler
+from core.rx_history import RxHistory
+from core.search import HistorySearch
+from core.signal_history import SignalHistoryStore
+from core.signal_stats import SignalStatistics
+from core.trace import FixedTraceTable
 from gui.main_window import MainWindow
+from gui.trigger_dialog import TriggerDialog
+from app.pipeline import RxPipeline
 from canio.can_bus import CanBusController, ReceivedMessage
-from canio.logger import SessionLogger
+from canio.logger import SessionLogger, TriggerCapture, build_trigger
 from canio.virtual import VirtualCanGenerator
 
 
@@ -23,12 +38,45 @@ class ApplicationController(QtCore.QObject):
         self.settings = settings
         self.theme_manager = theme_manager
         self.dbc_manager = DbcManager()
-        self.rx_buffer = RxBuffer()
-        self.logger: Optional[SessionLogger] = None
+        self.rx_history = RxHistory()
+        self.trace_table = FixedTraceTable()
+        self.signal_history = SignalHistoryStore()
+        self.statistics = BusStatistics(settings.bus)
+        self.pipeline = RxPipeline(
+            self.dbc_manager,
+            self.rx_history,
+            trace_table=self.trace_table,
+            signal_history=self.signal_history,
+            statistics=self.statistics,
+        )
         self.bus_controller = CanBusController(settings.bus)
         self.bus_controller.set_callback(self.on_message_received)
         self.virtual_generator = VirtualCanGenerator(self.dbc_manager, self.on_message_received)
         self.cyclic_timers: Dict[str, QtCore.QTimer] = {}
+        self._rx_dirty = False
+        self._filter_text = ""
+        self._search: Optional[HistorySearch] = None
+        self._profiler: Optional[SamplingProfiler] = None
+        self._dbc_watcher: Optional[DbcWatcher] = None
+        self._redecoder: Optional[HistoryRedecoder] = None
+        # Message shown in the signal view, whose statistics refresh with the bus statistics.
+        self._signal_message: Optional[str] = None
+
+        self.window.monitor.set_fixed_source(self.trace_table)
+        self.window.monitor.set_history(self.rx_history)
+        self.window.plot_panel.set_store(self.signal_history)
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(100)
+        self.refresh_timer.timeout.connect(self._refresh_monitor)
+        self.refresh_timer.start()
+        self.statistics_timer = QtCore.QTimer(self)
+        self.statistics_timer.setInterval(500)
+        self.statistics_timer.timeout.connect(self._refresh_statistics)
+        self.statistics_timer.start()
+        self.dbc_timer = QtCore.QTimer(self)
+        self.dbc_timer.setInterval(1000)
+        self.dbc_timer.timeout.connect(self._check_dbc)
+        self.dbc_timer.start()
 
         self._connect_ui()
 
@@ -43,12 +91,19 @@ class ApplicationController(QtCore.QObject):
         self.window.disconnect_requested.connect(self._disconnect_bus)
         self.window.start_logging_requested.connect(self._start_logging)
         self.window.stop_logging_requested.connect(self._stop_logging)
+        self.window.arm_trigger_requested.connect(self._arm_trigger)
+        self.window.fire_trigger_requested.connect(self._fire_trigger)
         self.window.start_virtual_requested.connect(self._start_virtual)
         self.window.stop_virtual_requested.connect(self._stop_virtual)
         self.window.theme_toggle_requested.connect(self._toggle_theme)
         self.window.tx_panel.send_once.connect(self._send_once)
         self.window.tx_panel.toggle_cyclic.connect(self._handle_cyclic)
         self.window.monitor.selection_changed.connect(self._update_signal_view)
+        self.window.plot_panel.watch_changed.connect(self._watch_signal)
+        self.window.filter_changed.connect(self._set_filter)
+        self.window.filter_logging_toggled.connect(self._set_filter_logging)
+        self.window.find_requested.connect(self._find)
+        self.window.profile_requested.connect(self._profile)
 
     # DBC handling
     def _choose_and_load_dbc(self) -> None:
@@ -60,7 +115,7 @@ class ApplicationController(QtCore.QObject):
 
     def _load_dbc(self, path: Path) -> None:
         try:
-            loaded = self.dbc_manager.load(path)
+            loaded = self.dbc_manager.load(path, self.settings.id_masks)
         except DbcLoadError as exc:
             QtWidgets.QMessageBox.critical(self.window, "DBC Error", str(exc))
             self.window.log_message(f"Failed to load DBC: {exc}")
@@ -70,12 +125,145 @@ class ApplicationController(QtCore.QObject):
         self.settings.save()
         models = {msg.name: TxMessageModel.from_message(msg) for msg in loaded.messages}
         self.window.set_tx_models(models)
+        if self.settings.decode_workers:
+            self.pipeline.set_decode_pool(
+                ShardedDecoder(path, self.settings.decode_workers, id_masks=self.settings.id_masks)
+            )
+        self.pipeline.transport = TransportReassembler() if loaded.has_j1939 else None
+        self.pipeline.signal_stats = SignalStatistics(loaded)
+        if self._signal_message:
+            self.pipeline.signal_stats.set_watched({self._signal_message})
+        self._cancel_redecode()
+        self._dbc_watcher = DbcWatcher(path)
+        self._search = None
+        self._set_filter(self._filter_text)
+
+    def _check_dbc(self) -> None:
+        redecoder = self._redecoder
+        if redecoder is not None and redecoder.done.is_set():
+            self._redecoder = None
+            self.window.monitor.redecode()
+            self._rx_dirty = True
+            self.window.log_message(
+                f"History re-decoded: {redecoder.invalidated} cached frames refreshed, "
+                f"{redecoder.redecoded} frames replotted"
+            )
+        if self._dbc_watcher is not None and self._dbc_watcher.poll():
+            self._hot_reload()
+
+    def _hot_reload(self) -> None:
+        """Swap in the edited DBC and re-decode only the messages whose definitions changed."""
+        previous = self.dbc_manager.loaded
+        try:
+            loaded, diff = self.dbc_manager.reload()
+        except DbcLoadError as exc:
+            self.window.log_message(f"DBC reload failed, keeping the previous definitions: {exc}")
+            return
+        arbitration_ids = affected_ids(self.rx_history.ids(), diff, previous, loaded) if diff else set()
+        self.pipeline.decode_cache.rebase(loaded, arbitration_ids)
+        if loaded.has_j1939 != (self.pipeline.transport is not None):
+            self.pipeline.transport = TransportReassembler() if loaded.has_j1939 else None
+        stats = self.pipeline.signal_stats
+        if stats is not None:
+            self.pipeline.signal_stats = stats.rebased(loaded, diff.affected)
+        if self.settings.decode_workers:
+            self.pipeline.set_decode_pool(
+                ShardedDecoder(loaded.path, self.settings.decode_workers, id_masks=self.settings.id_masks)
+            )
+        self._search = None
+        self._set_filter(self._filter_text)
+        if diff:
+            self.window.update_tx_models(self._carry_tx_models(loaded))
+        self.window.log_message(f"Reloaded DBC {loaded.path.name}: {diff.describe()}")
+        self.window.monitor.redecode()
+        self._cancel_redecode()
+        if diff:
+            self._redecoder = HistoryRedecoder(
+                self.rx_history, loaded, diff, self.signal_history, arbitration_ids=arbitration_ids
+            )
+            self._redecoder.start()
+
+    def _carry_tx_models(self, loaded: LoadedDbc) -> Dict[str, TxMessageModel]:
+        previous = self.window.tx_panel.models
+        models: Dict[str, TxMessageModel] = {}
+        for message in loaded.messages:
+            model = TxMessageModel.from_message(message)
+            old = previous.get(message.name)
+            if old is not None:
+                for name, value in model.signals.items():
+                    if name in old.signals:
+                        value.value = old.signals[name].value
+                model.period_ms, model.active = old.period_ms, old.active
+            models[message.name] = model
+        return models
+
+    def _cancel_redecode(self) -> None:
+        if self._redecoder is not None:
+            self._redecoder.cancel()
+            self._redecoder = None
 
     def _unload_dbc(self) -> None:
+        self._dbc_watcher = None
+        self._cancel_redecode()
         self.dbc_manager.unload()
+        self.pipeline.set_decode_pool(None)
+        self.pipeline.transport = None
+        self.pipeline.signal_stats = None
+        self._signal_message = None
         self.window.log_message("DBC unloaded")
         self.window.set_tx_models({})
         self._stop_virtual()
+        self._search = None
+        self._set_filter(self._filter_text)
+
+    # Filtering
+    def _set_filter(self, text: str) -> None:
+        self._filter_text = text.strip()
+        if not self._filter_text:
+            self.pipeline.filter = None
+            self.window.set_filter_error(None)
+            return
+        try:
+            self.pipeline.filter = compile_filter(self._filter_text, self.dbc_manager.loaded)
+        except FilterError as exc:
+            self.pipeline.filter = None
+            self.window.set_filter_error(str(exc))
+            self.window.log_message(f"Filter error: {exc}")
+            return
+        self.window.set_filter_error(None)
+        self.window.log_message(f"Filter active: {self._filter_text}")
+
+    def _set_filter_logging(self, enabled: bool) -> None:
+        self.pipeline.filter_logging = enabled
+
+    # Search
+    def _find(self, text: str, older: bool) -> None:
+        text = text.strip()
+        if not text:
+            return
+        if self._search is None or self._search.query.expression != text:
+            try:
+                self._search = HistorySearch(self.rx_history, compile_filter(text, self.dbc_manager.loaded))
+            except FilterError as exc:
+                self._search = None
+                self.window.set_find_error(str(exc))
+                return
+        self.window.set_find_error(None)
+        self.window.fixed_trace_action.setChecked(False)
+        monitor = self.window.monitor
+        monitor.refresh_history()
+        current = monitor.current_seq()
+        if older:
+            seq = self._search.previous(self.rx_history.total if current is None else current)
+        else:
+            seq = self._search.next(self.rx_history.first - 1 if current is None else current)
+        if seq is None:
+            self.window.show_status(f"No {'older' if older else 'newer'} match for {text}")
+            return
+        monitor.select_seq(seq)
+        count = self._search.count()
+        if count is not None:
+            self.window.show_status(f"{count} matches")
 
     # Bus handling
     def _connect_bus(self) -> None:
@@ -93,24 +281,40 @@ class ApplicationController(QtCore.QObject):
         self.window.log_message("CAN bus disconnected")
 
     def on_message_received(self, message: ReceivedMessage) -> None:
+        self.pipeline.process(message)
+        self._rx_dirty = True
+
+    def _refresh_monitor(self) -> None:
+        start = STAGES.start()
+        if self._rx_dirty:
+            self.window.set_decode_cache_rate(self.pipeline.decode_cache.hit_rate)
+        monitor = self.window.monitor
+        if monitor.fixed_mode:
+            monitor.refresh_fixed(self.trace_table.take_changed())
+        elif self._rx_dirty:
+            self._rx_dirty = False
+            monitor.refresh_history()
+            self.window.set_rx_count(len(self.rx_history))
+        STAGES.stop("render", start)
+
+    def _refresh_statistics(self) -> None:
+        lost = self.bus_controller.connection_lost
+        if lost:
+            self._disconnect_bus()
+            self.window.log_message(lost)
+            self.window.show_status(lost, 10000)
+        snapshot = self.statistics.snapshot()
         loaded = self.dbc_manager.loaded
-        decoded = loaded.decode(message.arbitration_id, message.data) if loaded else {}
-        name = loaded.message_by_id(message.arbitration_id).name if loaded and loaded.message_by_id(message.arbitration_id) else None
-        data_hex = " ".join(f"{b:02X}" for b in message.data)
-        entry = RxEntry(
-            timestamp=message.timestamp,
-            arbitration_id=message.arbitration_id,
-            dlc=len(message.data),
-            data_hex=data_hex,
-            decoded=decoded,
-            message_name=name,
-        )
-        self.rx_buffer.append(entry)
-        QtCore.QMetaObject.invokeMethod(
-            self.window, lambda: self.window.monitor.update_entries(self.rx_buffer.entries), QtCore.Qt.QueuedConnection
-        )
-        if self.logger:
-            self.logger.log(message)
+        names: Dict[int, str] = {}
+        if loaded:
+            for rate in snapshot.ids:
+                definition = loaded.message_by_id(rate.arbitration_id)
+                if definition:
+                    names[rate.arbitration_id] = definition.name
+        self.window.set_bus_statistics(snapshot, names)
+        stats = self.pipeline.signal_stats
+        if stats is not None and self._signal_message:
+            self.window.update_signal_statistics(stats.stats(self._signal_message))
 
     # Virtual generator
     def _start_virtual(self, period_ms: int, messages: list[str], randomize: bool) -> None:
@@ -135,34 +339,117 @@ class ApplicationController(QtCore.QObject):
         logs_dir = Path.cwd() / "logs"
         logs_dir.mkdir(exist_ok=True)
         path = logs_dir / f"session-{int(time.time())}.csv"
-        self.logger = SessionLogger(path)
+        self.pipeline.logger = SessionLogger(path, **self.settings.logging.to_kwargs())
         self.window.set_logging_status(True, path)
         self.window.log_message(f"Logging to {path}")
 
     def _stop_logging(self) -> None:
-        if self.logger:
-            self.logger.close()
-        self.logger = None
+        logger = self.pipeline.logger
+        self.pipeline.logger = None
+        if logger:
+            logger.close()
+        if isinstance(logger, TriggerCapture):
+            self.window.log_message(f"Trigger capture wrote {len(logger.segments)} segment(s)")
+        if isinstance(logger, (SessionLogger, TriggerCapture)) and logger.dropped:
+            self.window.log_message(f"Logger dropped {logger.dropped} frame(s) while the writer was behind")
         self.window.set_logging_status(False)
         self.window.log_message("Logging stopped")
 
+    def _arm_trigger(self) -> None:
+        dialog = TriggerDialog(self.window)
+        if dialog.exec() != QtWidgets.QDialog.Accepted:
+            return
+        condition = None
+        if dialog.expression:
+            try:
+                condition = compile_filter(dialog.expression, self.dbc_manager.loaded)
+            except FilterError as exc:
+                QtWidgets.QMessageBox.warning(self.window, "Trigger", str(exc))
+                return
+        self._stop_logging()
+        logs_dir = Path.cwd() / "logs"
+        capture = TriggerCapture(
+            logs_dir,
+            f"session-{int(time.time())}",
+            trigger=build_trigger(condition, dialog.on_error_frame),
+            pre_trigger=dialog.pre_trigger,
+            post_trigger=dialog.post_trigger,
+            logger_options=self.settings.logging.to_kwargs(),
+        )
+        self.pipeline.logger = capture
+        self.window.set_logging_status(True, logs_dir / f"{capture.prefix}-trigger-*.csv")
+        self.window.log_message(
+            f"Trigger armed ({dialog.expression or 'manual'}), "
+            f"pre {dialog.pre_trigger:g} s / post {dialog.post_trigger:g} s"
+        )
+
+    def _fire_trigger(self) -> None:
+        logger = self.pipeline.logger
+        if not isinstance(logger, TriggerCapture):
+            self.window.log_message("Arm a trigger capture first")
+            return
+        logger.fire()
+        self.window.log_message("Manual trigger fired")
+
+    # Profiling
+    def _profile(self, seconds: float) -> None:
+        if self._profiler is not None:
+            return
+        self._profiler = SamplingProfiler()
+        self._profiler.start()
+        self.window.set_profiling(True)
+        self.window.log_message(f"Profiling all threads for {seconds:g} s")
+        QtCore.QTimer.singleShot(int(seconds * 1000), self._finish_profile)
+
+    def _finish_profile(self) -> None:
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        result = profiler.stop()
+        path = result.write(Path.cwd() / "logs" / "profiles" / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed.txt")
+        self.window.set_profiling(False)
+        self.window.log_message(f"Profile: {result.samples} samples written to {path}")
+        for line in result.stage_summary():
+            self.window.log_message(f"  {line}")
+        self.window.show_status(f"Profile saved to {path}", 10000)
+
     # Transmit
     def _send_once(self, message_name: str, signals: Dict[str, float]) -> None:
+        error = self._transmit(message_name, signals)
+        if error:
+            self._report_send_error(message_name, error)
+
+    def _send_cyclic(self, message_name: str, signals: Dict[str, float]) -> None:
+        error = self._transmit(message_name, signals)
+        if error:
+            # Stop first: the message box spins the event loop and the timer would keep firing.
+            self._handle_cyclic(message_name, signals, 0, False)
+            self.window.tx_panel.set_cyclic_stopped(message_name)
+            self._report_send_error(message_name, f"{error}\nCyclic transmission stopped.")
+
+    def _transmit(self, message_name: str, signals: Dict[str, float]) -> Optional[str]:
+        """Encode and send one frame of ``message_name``; returns why it failed, if it did."""
         loaded = self.dbc_manager.loaded
         if not loaded:
-            QtWidgets.QMessageBox.warning(self.window, "DBC", "Load a DBC first")
-            return
-        data = loaded.encode(message_name, signals)
-        message = loaded.database.get_message_by_name(message_name)
-        assert message
-        self.bus_controller.send(message.frame_id, data, message.is_extended_frame)
+            return "Load a DBC first"
+        try:
+            data = loaded.encode(message_name, signals)
+            message = loaded.database.get_message_by_name(message_name)
+            self.bus_controller.send(message.frame_id, data, message.is_extended_frame, is_fd=message.is_fd)
+        except (KeyError, ValueError, RuntimeError, EncodeError, can.CanError) as exc:
+            return str(exc) or type(exc).__name__
         self.window.log_message(f"Sent {message_name} ({message.frame_id:#x})")
+        return None
+
+    def _report_send_error(self, message_name: str, error: str) -> None:
+        self.window.log_message(f"Send {message_name} failed: {error}")
+        QtWidgets.QMessageBox.warning(self.window, "Transmit Error", error)
 
     def _handle_cyclic(self, message_name: str, signals: Dict[str, float], period_ms: int, active: bool) -> None:
         if active:
             timer = QtCore.QTimer(self)
             timer.setInterval(period_ms)
-            timer.timeout.connect(lambda: self._send_once(message_name, signals))
+            timer.timeout.connect(lambda: self._send_cyclic(message_name, signals))
             timer.start()
             self.cyclic_timers[message_name] = timer
         else:
@@ -180,6 +467,7 @@ class ApplicationController(QtCore.QObject):
         message = loaded.database.get_message_by_name(entry.message_name)
         if not message:
             return
+        self._signal_message = message.name
         signals = {}
         for signal in message.signals:
             raw = entry.decoded.get(signal.name)
@@ -190,6 +478,16 @@ class ApplicationController(QtCore.QObject):
                 "range": f"{signal.minimum}..{signal.maximum}",
             }
         self.window.update_signals(signals)
+        stats = self.pipeline.signal_stats
+        if stats is not None:
+            stats.set_watched({message.name})
+            self.window.update_signal_statistics(stats.stats(message.name))
+
+    def _watch_signal(self, message_name: str, signal_name: str, watched: bool) -> None:
+        if watched:
+            self.signal_history.watch(message_name, signal_name)
+        else:
+            self.signal_history.unwatch(message_name, signal_name)
 
     # Theme
     def _toggle_theme(self) -> None:
@@ -0,0 +1,245 @@
+"""Bulk log conversion and decoding CLI.
+
+Converts between session CSV logs (plain or segmented/compressed), candump
+text and Vector ASC, optionally decoding every frame against a DBC. Input is
+split into chunks (byte ranges of plain files, whole segments of compressed
+logs) that a process pool parses, decodes and formats; results are written
+in input order.
+
+Run with ``python -m app.convert --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from canio import formats
+from canio.export import export_columnar
+from canio.logger import CODECS, open_log_text
+from core.dbc_manager import DbcLoadError, DbcManager, LoadedDbc
+from core.decode_cache import decode_frame
+from core.profiler import profiling
+
+DEFAULT_CHUNK_BYTES = 8 * 2**20
+
+
+@dataclass
+class ConvertChunk:
+    """One unit of work: a byte range of a plain file, or a whole compressed file."""
+
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        if self.end is None:
+            return os.path.getsize(self.path)
+        return self.end - self.start
+
+
+@dataclass
+class ConvertOptions:
+    source_format: str
+    target_format: str
+    csv_header: Optional[List[str]] = None
+    dbc_path: Optional[str] = None
+    start: float = 0.0
+    channel: str = "can0"
+
+
+_options: Optional[ConvertOptions] = None
+_dbc: Optional[LoadedDbc] = None
+
+
+def _init_worker(options: ConvertOptions, loaded: Optional[LoadedDbc] = None) -> None:
+    global _options, _dbc
+    _options = options
+    if loaded is None and options.dbc_path:
+        loaded = DbcManager().load(Path(options.dbc_path))
+    _dbc = loaded
+
+
+def _is_compressed(path: Path) -> bool:
+    return any(codec.suffix != ".csv" and path.name.endswith(codec.suffix) for codec in CODECS.values())
+
+
+def _read_lines(chunk: ConvertChunk) -> List[str]:
+    if chunk.end is None:
+        with open_log_text(Path(chunk.path)) as handle:
+            return handle.readlines()
+    with open(chunk.path, "rb") as handle:
+        # A chunk owns the lines that start inside [start, end).
+        if chunk.start > 0:
+            handle.seek(chunk.start - 1)
+            handle.readline()
+        position = handle.tell()
+        data = handle.read(chunk.end - position) if position < chunk.end else b""
+        if data and not data.endswith(b"\n"):
+            data += handle.readline()
+    return data.decode(errors="replace").splitlines(keepends=True)
+
+
+def _convert_chunk(chunk: ConvertChunk) -> Tuple[str, int, int]:
+    """Parse, decode and format one chunk; returns ``(text, frames, input_bytes)``."""
+    options = _options
+    assert options
+    events = formats.parse_lines(options.source_format, _read_lines(chunk), options.csv_header)
+    out: List[str] = []
+    target = options.target_format
+    for event in events:
+        if target == "csv":
+            if _dbc is None:
+                out.append(formats.format_csv(event))
+                continue
+            # Same lookup and decoding as the application, so masked IDs and choices match the GUI.
+            frame = decode_frame(_dbc, event.arbitration_id, event.data)
+            out.append(formats.format_csv(event, frame.message_name, frame.decoded))
+        elif target == "candump":
+            out.append(formats.format_candump(event, options.channel))
+        else:
+            out.append(formats.format_asc(event, options.start))
+    return "".join(out), len(events), chunk.size
+
+
+def plan_chunks(path: Path, source_format: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[ConvertChunk]:
+    chunks: List[ConvertChunk] = []
+    for file in formats.input_files(path, source_format):
+        if _is_compressed(file):
+            chunks.append(ConvertChunk(str(file)))
+            continue
+        size = file.stat().st_size
+        for start in range(0, max(size, 1), chunk_bytes):
+            chunks.append(ConvertChunk(str(file), start, min(size, start + chunk_bytes)))
+    return chunks
+
+
+def _first_event_time(path: Path, source_format: str) -> float:
+    file = formats.input_files(path, source_format)[0]
+    with open_log_text(file) if source_format == "csv" else file.open(errors="replace") as handle:
+        lines: List[str] = []
+        for line in handle:
+            lines.append(line)
+            events = formats.parse_lines(source_format, lines)
+            if events:
+                return events[0].timestamp
+    return 0.0
+
+
+def _csv_header(path: Path) -> List[str]:
+    with open_log_text(formats.input_files(path, "csv")[0]) as handle:
+        return handle.readline().strip().split(",")
+
+
+def convert(
+    source: Path,
+    target: Path,
+    target_format: str,
+    source_format: Optional[str] = None,
+    dbc_path: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    progress: Optional[Callable[[int, int, int], None]] = None,
+) -> int:
+    """Convert ``source`` into ``target``; returns the number of frames written.
+
+    ``progress`` is called with ``(bytes_done, bytes_total, frames)`` after
+    every chunk. ``jobs=1`` converts in-process without a pool. An unreadable
+    DBC raises :class:`DbcLoadError` before any worker starts.
+    """
+    source_format = source_format or formats.detect_format(source)
+    if dbc_path and target_format != "csv":
+        raise ValueError("Decoded output is only supported with --to csv")
+    loaded = DbcManager().load(dbc_path) if dbc_path else None
+    options = ConvertOptions(
+        source_format=source_format,
+        target_format=target_format,
+        csv_header=_csv_header(source) if source_format == "csv" else None,
+        dbc_path=str(dbc_path) if dbc_path else None,
+        start=_first_event_time(source, source_format) if target_format == "asc" else 0.0,
+    )
+    chunks = plan_chunks(source, source_format, chunk_bytes)
+    total = sum(chunk.size for chunk in chunks)
+    done = frames = 0
+    with target.open("w", newline="") as out:
+        if target_format == "csv":
+            out.write(",".join(formats.CSV_DECODED_HEADER if dbc_path else formats.CSV_HEADER) + "\n")
+        elif target_format == "asc":
+            out.write(formats.asc_header(options.start))
+        for text, count, size in _run(chunks, options, jobs, loaded):
+            out.write(text)
+            done += size
+            frames += count
+            if progress:
+                progress(done, total, frames)
+        if target_format == "asc":
+            out.write(formats.asc_footer())
+    return frames
+
+
+def _run(
+    chunks: List[ConvertChunk], options: ConvertOptions, jobs: Optional[int], loaded: Optional[LoadedDbc] = None
+) -> Iterator[Tuple[str, int, int]]:
+    if jobs == 1 or len(chunks) == 1:
+        _init_worker(options, loaded)
+        yield from map(_convert_chunk, chunks)
+        return
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(options,)) as pool:
+        yield from pool.imap(_convert_chunk, chunks)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Convert and decode CAN logs (csv, candump, asc, npy)")
+    parser.add_argument("source", type=Path, help="Input log, segment or manifest")
+    parser.add_argument("target", type=Path, help="Output file (directory for --to npy)")
+    parser.add_argument("--from", dest="source_format", choices=formats.FORMATS, help="Input format (auto-detected)")
+    parser.add_argument("--to", dest="target_format", choices=formats.FORMATS + ("npy",), default="csv")
+    parser.add_argument("--dbc", type=Path, help="Decode frames against this DBC")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / 2**20)
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.target_format == "npy" and not args.dbc:
+        print("--to npy requires --dbc", file=sys.stderr)
+        return 2
+
+    def report(done: int, total: int, frames: int) -> None:
+        percent = 100.0 * done / total if total else 100.0
+        print(f"\r{percent:5.1f}%  {done / 2**20:.1f}/{total / 2**20:.1f} MiB  {frames} frames", end="", file=sys.stderr)
+
+    with profiling(args.profile):
+        try:
+            if args.target_format == "npy":
+                export_columnar(args.source, DbcManager().load(args.dbc), args.target)
+                return 0
+            frames = convert(
+                args.source,
+                args.target,
+                args.target_format,
+                source_format=args.source_format,
+                dbc_path=args.dbc,
+                jobs=args.jobs,
+                chunk_bytes=max(1, int(args.chunk_mb * 2**20)),
+                progress=None if args.quiet else report,
+            )
+        except (OSError, ValueError, DbcLoadError) as exc:
+            print(f"Conversion failed: {exc}", file=sys.stderr)
+            return 2
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"wrote {frames} frames to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
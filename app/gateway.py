@@ -0,0 +1,64 @@
+"""Gateway CLI: forward and transform frames between CAN channels.
+
+The JSON configuration names the buses, the routing rules and an optional
+DBC (relative to the configuration file)::
+
+    {
+      "dbc": "sample.dbc",
+      "buses": {"body": {"interface": "socketcan", "channel": "can0"},
+                "chassis": {"interface": "socketcan", "channel": "can1"}},
+      "rules": [{"source": "body", "destination": "chassis", "match": "ExampleMessage",
+                 "target_id": "0x200", "transforms": {"Speed": "Speed * 3.6"}}]
+    }
+
+Run with ``python -m app.gateway --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from canio.gateway import GatewayError, load_gateway
+from core.dbc_manager import DbcLoadError
+from core.profiler import profiling
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Forward and transform frames between CAN channels")
+    parser.add_argument("config", type=Path, help="Gateway JSON configuration")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between statistics lines")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        gateway = load_gateway(args.config)
+    except (OSError, KeyError, TypeError, GatewayError, DbcLoadError) as exc:
+        print(f"Invalid gateway configuration: {exc}", file=sys.stderr)
+        return 2
+    with profiling(args.profile):
+        gateway.start()
+        started = time.monotonic()
+        try:
+            while args.duration is None or time.monotonic() - started < args.duration:
+                time.sleep(args.interval if args.duration is None else min(args.interval, args.duration))
+                print(gateway.stats().summary())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.stop()
+    stats = gateway.stats()
+    print(stats.summary())
+    for description, forwarded, errors in stats.per_rule:
+        print(f"  {description}: {forwarded} forwarded, {errors} errors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Loopback benchmark of the ISO-TP transport.
+
+A tester and an ECU transport talk over one bus (the python-can ``virtual``
+interface by default). The tester sends ``--count`` payloads of ``--size``
+bytes and the ECU reassembles them. The achieved rate is reported next to
+the theoretical maximum for the configured bitrate. That maximum counts
+the exact bits of every frame of a transfer, flow control included, plus
+the STmin gaps.
+
+On the virtual bus frames take no time on the wire, so the achieved rate
+is the cost of the stack itself. On real hardware it is bounded by the
+theoretical rate.
+
+Run with ``python -m app.isotp_bench --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from canio.can_bus import CanBusController
+from canio.isotp import IsoTpConfig, IsoTpError, IsoTpTransport
+from core.bus_stats import frame_bits
+from core.config import BusConfig
+from core.models import FLAG_BRS, FLAG_EXTENDED, FLAG_FD
+from core.profiler import profiling
+
+
+@dataclass
+class BenchmarkResult:
+    size: int
+    count: int
+    seconds: float
+    theoretical_kbps: float
+
+    @property
+    def achieved_kbps(self) -> float:
+        return self.size * self.count / self.seconds / 1024 if self.seconds else 0.0
+
+    def summary(self) -> str:
+        share = self.achieved_kbps / self.theoretical_kbps * 100 if self.theoretical_kbps else 0.0
+        return (
+            f"{self.count} x {self.size} bytes in {self.seconds:.3f} s: {self.achieved_kbps:.1f} KB/s achieved, "
+            f"{self.theoretical_kbps:.1f} KB/s theoretical ({share:.0f}%)"
+        )
+
+
+def theoretical_rate(
+    payload: bytes,
+    config: IsoTpConfig,
+    bitrate: int,
+    data_bitrate: Optional[int] = None,
+    block_size: int = 0,
+    st_min: float = 0.0,
+) -> float:
+    """Best-case KB/s for sending ``payload`` with the sender's ``config``.
+
+    ``block_size`` and ``st_min`` are the flow control granted by the
+    receiver; ``data_bitrate`` applies to the data phase of FD frames.
+    """
+    size = config.frame_size
+    fd = size > 8
+    flags = FLAG_EXTENDED if config.extended_id else 0
+    if fd:
+        flags |= FLAG_FD | (FLAG_BRS if data_bitrate else 0)
+
+    def duration(frame: bytes, arbitration_id: int) -> float:
+        if len(frame) < size and (config.padding is not None or fd):
+            frame = frame.ljust(size, b"\xcc")
+        nominal, data_phase = frame_bits(arbitration_id, frame, flags)
+        return nominal / bitrate + (data_phase / data_bitrate if data_phase and data_bitrate else 0.0)
+
+    length = len(payload)
+    if length < min(8, size):
+        return length / duration(bytes([length]) + payload, config.tx_id) / 1024
+    head = 2 if length <= 0xFFF else 6
+    first = size - head
+    chunks: List[bytes] = [payload[index : index + size - 1] for index in range(first, length, size - 1)]
+    flow_control = duration(b"\x30\x00\x00", config.rx_id)
+    total = duration(bytes(head) + payload[:first], config.tx_id)
+    for index, chunk in enumerate(chunks):
+        frame_time = duration(bytes([0x20]) + chunk, config.tx_id)
+        if index == 0 or (block_size and index % block_size == 0):
+            total += flow_control + frame_time
+        else:
+            total += max(frame_time, st_min)
+    return length / total / 1024
+
+
+def run_benchmark(
+    size: int,
+    count: int,
+    bus: BusConfig,
+    block_size: int = 0,
+    st_min: float = 0.0,
+    frame_size: int = 8,
+    tester_id: int = 0x7E0,
+    ecu_id: int = 0x7E8,
+) -> BenchmarkResult:
+    """Send ``count`` payloads of ``size`` bytes from a tester to an ECU transport on ``bus``."""
+    tester_bus, ecu_bus = CanBusController(bus), CanBusController(bus)
+    tester_config = IsoTpConfig(tx_id=tester_id, rx_id=ecu_id, frame_size=frame_size)
+    ecu_config = IsoTpConfig(tx_id=ecu_id, rx_id=tester_id, block_size=block_size, st_min=st_min, frame_size=frame_size)
+    payload = os.urandom(size)
+    tester_bus.start()
+    ecu_bus.start()
+    tester, ecu = IsoTpTransport(tester_bus, tester_config), IsoTpTransport(ecu_bus, ecu_config)
+    try:
+        started = time.perf_counter()
+        for _ in range(count):
+            tester.send(payload, timeout=30.0)
+            received = ecu.receive(timeout=5.0)
+            if received != payload:
+                raise IsoTpError("Loopback payload mismatch")
+        seconds = time.perf_counter() - started
+    finally:
+        tester.close()
+        ecu.close()
+        tester_bus.stop()
+        ecu_bus.stop()
+    theoretical = theoretical_rate(payload, tester_config, bus.bitrate, bus.data_bitrate, block_size, st_min)
+    return BenchmarkResult(size=size, count=count, seconds=seconds, theoretical_kbps=theoretical)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ISO-TP loopback throughput benchmark")
+    parser.add_argument("--size", type=int, default=4095, help="Payload bytes per transfer")
+    parser.add_argument("--count", type=int, default=20, help="Number of transfers")
+    parser.add_argument("--block-size", type=int, default=0, help="Block size granted by the receiver (0 = no limit)")
+    parser.add_argument("--st-min", type=float, default=0.0, help="STmin granted by the receiver, in milliseconds")
+    parser.add_argument("--frame-size", type=int, default=8, help="8 for classic CAN, up to 64 for CAN FD")
+    parser.add_argument("--interface", default="virtual")
+    parser.add_argument("--channel", default="isotp-bench")
+    parser.add_argument("--bitrate", type=int, default=500000)
+    parser.add_argument("--data-bitrate", type=int, default=None, help="CAN FD data-phase bitrate")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    bus = BusConfig(
+        channel=args.channel,
+        interface=args.interface,
+        bitrate=args.bitrate,
+        fd=args.frame_size > 8,
+        data_bitrate=args.data_bitrate,
+    )
+    with profiling(args.profile):
+        try:
+            result = run_benchmark(args.size, args.count, bus, args.block_size, args.st_min / 1000, args.frame_size)
+        except (IsoTpError, ValueError) as exc:
+            print(f"Benchmark failed: {exc}", file=sys.stderr)
+            return 1
+    print(result.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
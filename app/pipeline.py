@@ -0,0 +1,164 @@
+"""Receive pipeline shared by the GUI controller and headless tools."""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from canio.can_bus import ReceivedMessage
+from canio.logger import SessionLogger
+from core.bus_stats import BusStatistics
+from core.dbc_manager import DbcManager
+from core.decode_cache import DecodeCache, DecodedFrame
+from core.decode_pool import ShardedDecoder
+from core.filters import CompiledFilter
+from core.j1939 import J1939Message, TransportReassembler, make_id
+from core.models import FLAG_EXTENDED, RxEntry
+from core.profiler import STAGES
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistoryStore
+from core.signal_stats import SignalStatistics
+from core.trace import FixedTraceTable
+
+
+class RxPipeline:
+    """Filters received frames, stores them in the RX history and logs them.
+
+    Entries are decoded lazily through :meth:`decode` when a view first asks
+    for their signals, except frames of messages whose signals are watched by
+    the signal history or whose statistics :attr:`signal_stats` watches.
+
+    With a :attr:`decode_pool` every accepted frame is decoded in the pool's
+    worker processes instead. Results come back in timestamp order on the
+    pool's merge thread, which primes the entry and feeds the signal history.
+
+    The pipeline holds no Qt state so it can run on the listener thread of
+    :class:`CanBusController` both inside the application and in headless
+    runners such as the soak tester.
+    """
+
+    def __init__(
+        self,
+        dbc_manager: DbcManager,
+        history: RxHistory,
+        logger: Optional[SessionLogger] = None,
+        trace_table: Optional[FixedTraceTable] = None,
+        signal_history: Optional[SignalHistoryStore] = None,
+        statistics: Optional[BusStatistics] = None,
+    ) -> None:
+        self.dbc_manager = dbc_manager
+        self.history = history
+        self.logger = logger
+        self.trace_table = trace_table
+        self.signal_history = signal_history
+        self.statistics = statistics
+        self.decode_cache = DecodeCache()
+        self.filter: Optional[CompiledFilter] = None
+        self.filter_logging = False
+        self.decode_pool: Optional[ShardedDecoder] = None
+        # J1939 transport-protocol reassembly; set when the DBC has J1939 parameter groups.
+        self.transport: Optional[TransportReassembler] = None
+        # Running per-signal statistics; every accepted frame is decoded while set.
+        self.signal_stats: Optional[SignalStatistics] = None
+        self._decoder = self.decode
+        if history.decoder is None:
+            history.decoder = self._decoder
+
+    def decode(self, arbitration_id: int, data: bytes) -> DecodedFrame:
+        """Decode against the currently loaded DBC; used lazily by :class:`RxEntry`."""
+        start = STAGES.start()
+        frame = self.decode_cache.lookup(self.dbc_manager.loaded, arbitration_id, data)
+        STAGES.stop("decode", start)
+        return frame
+
+    def set_decode_pool(self, pool: Optional[ShardedDecoder]) -> None:
+        """Use ``pool`` for decoding (``None`` decodes on the calling thread again); closes the previous pool."""
+        old, self.decode_pool = self.decode_pool, pool
+        if old is not None:
+            old.remove_listener(self._on_decoded)
+            old.close()
+        if pool is not None:
+            pool.add_listener(self._on_decoded)
+
+    def _on_decoded(self, timestamp: float, arbitration_id: int, frame: DecodedFrame, entry: RxEntry) -> None:
+        entry.prime(frame)
+        if frame.message_name:
+            self._record(frame.message_name, timestamp, frame.decoded)
+
+    def _record(self, name: str, timestamp: float, decoded: Dict[str, float]) -> None:
+        history = self.signal_history
+        if history is not None and history.active:
+            history.ingest(name, timestamp, decoded)
+        stats = self.signal_stats
+        if stats is not None:
+            stats.update(name, timestamp, decoded)
+
+    def _stats_wanted(self, arbitration_id: int) -> bool:
+        """True if the signal statistics watch the message of ``arbitration_id``; looks it up without decoding."""
+        stats = self.signal_stats
+        if stats is None or not stats.watched:
+            return False
+        definition = stats.loaded.message_by_id(arbitration_id)
+        return definition is not None and definition.name in stats.watched
+
+    def _on_transport(self, assembled: J1939Message) -> None:
+        """Show a reassembled J1939 payload as one row of the fixed trace and record its signals.
+
+        The payload can exceed what a history record holds, so only the
+        TP.CM/TP.DT frames themselves go into the chronological history.
+        """
+        arbitration_id = make_id(assembled.pgn, assembled.source, destination=assembled.destination)
+        entry = RxEntry(
+            assembled.timestamp, arbitration_id, assembled.data, flags=FLAG_EXTENDED, decoder=self._decoder
+        )
+        if self.trace_table is not None:
+            self.trace_table.update(entry)
+        history = self.signal_history
+        if (history is not None and history.active) or self._stats_wanted(arbitration_id):
+            name = entry.message_name
+            if name:
+                self._record(name, assembled.timestamp, entry.decoded)
+
+    def process(self, message: ReceivedMessage) -> Optional[RxEntry]:
+        """Run one frame through the pipeline.
+
+        Frames rejected by :attr:`filter` are neither decoded nor displayed and
+        return ``None``; they are still logged unless :attr:`filter_logging`.
+        Bus statistics always see every frame, since the filter does not
+        change what is on the wire.
+        """
+        statistics = self.statistics
+        if statistics is not None:
+            statistics.update(message.timestamp, message.arbitration_id, message.data, message.flags)
+        flt = self.filter
+        if flt is not None and not flt(message.arbitration_id, message.data):
+            logger = self.logger
+            if logger and not self.filter_logging:
+                logger.log(message)
+            return None
+        entry = RxEntry(
+            message.timestamp, message.arbitration_id, message.data, flags=message.flags, decoder=self._decoder
+        )
+        start = STAGES.start()
+        self.history.append(entry)
+        STAGES.stop("buffer", start)
+        if self.trace_table is not None:
+            self.trace_table.update(entry)
+        transport = self.transport
+        if transport is not None and message.is_extended_id:
+            assembled = transport.feed(message.timestamp, message.arbitration_id, message.data)
+            if assembled is not None:
+                self._on_transport(assembled)
+        pool = self.decode_pool
+        history = self.signal_history
+        if pool is not None:
+            pool.submit(message.timestamp, message.arbitration_id, message.data, entry)
+        elif (history is not None and history.active) or self._stats_wanted(message.arbitration_id):
+            # Decoding is otherwise deferred until a view asks for it.
+            name = entry.message_name
+            if name:
+                self._record(name, message.timestamp, entry.decoded)
+        logger = self.logger
+        if logger:
+            start = STAGES.start()
+            logger.log(message)
+            STAGES.stop("format", start)
+        return entry
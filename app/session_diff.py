@@ -0,0 +1,94 @@
+"""Session diff CLI: compare a candidate capture against a golden one.
+
+Both logs are streamed and merged by relative time, so memory stays bounded
+for captures of any length. Differences in per-ID frame count, mean cycle
+time and payloads (or decoded signals with ``--dbc``) beyond the tolerances
+are reported. The exit status is 1 when anything differs, for use in
+regression scripts.
+
+Run with ``python -m app.session_diff --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.dbc_manager import DbcLoadError
+from core.profiler import profiling
+from core.session_diff import DiffTolerances, compare_sessions
+
+
+def _signal_tolerance(text: str) -> Tuple[str, float]:
+    name, _, value = text.partition("=")
+    if not name or not value:
+        raise argparse.ArgumentTypeError(f"Expected SIGNAL=TOLERANCE, got {text!r}")
+    return name, float(value)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare a recorded session against a golden capture")
+    parser.add_argument("golden", type=Path, help="Golden session log (CSV, segment or manifest)")
+    parser.add_argument("candidate", type=Path, help="Session log to check")
+    parser.add_argument("--dbc", type=Path, help="Compare decoded signals instead of raw payload bytes")
+    parser.add_argument("--offset", type=float, default=0.0, help="Seconds added to the candidate's relative time")
+    parser.add_argument("--window", type=float, default=0.05, help="Seconds within which frames of an ID pair up")
+    parser.add_argument("--count-tolerance", type=float, default=0.01, help="Accepted relative count difference")
+    parser.add_argument("--cycle-tolerance", type=float, default=0.1, help="Accepted relative cycle-time difference")
+    parser.add_argument("--signal-tolerance", type=float, default=0.0, help="Accepted absolute signal difference")
+    parser.add_argument(
+        "--tolerance",
+        type=_signal_tolerance,
+        action="append",
+        default=[],
+        metavar="SIGNAL=VALUE",
+        help="Accepted absolute difference for one signal (repeatable)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes to shard IDs across")
+    parser.add_argument("--json", type=Path, help="Also write the per-ID results as JSON")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    tolerances = DiffTolerances(
+        count=args.count_tolerance,
+        cycle=args.cycle_tolerance,
+        signal=args.signal_tolerance,
+        signals=dict(args.tolerance),
+        window=args.window,
+    )
+    with profiling(args.profile):
+        try:
+            result = compare_sessions(args.golden, args.candidate, tolerances, args.dbc, args.offset, args.workers)
+        except (OSError, ValueError, KeyError, DbcLoadError) as exc:
+            print(f"Comparison failed: {exc}", file=sys.stderr)
+            return 2
+    for line in result.summary_lines():
+        print(line)
+    differences = result.differences()
+    if args.json:
+        rows: List[Dict[str, object]] = []
+        for diff, issues in differences:
+            rows.append(
+                {
+                    "id": diff.arbitration_id,
+                    "name": diff.name,
+                    "counts": diff.counts,
+                    "mean_cycle_s": [diff.mean_cycle(0), diff.mean_cycle(1)],
+                    "paired": diff.paired,
+                    "unmatched": diff.unmatched,
+                    "payload_mismatches": diff.payload_mismatches,
+                    "signal_max_diff": diff.signal_max_diff,
+                    "issues": issues,
+                }
+            )
+        args.json.write_text(json.dumps({"ids": len(result.ids), "differences": rows}, indent=2))
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""End-to-end soak/load runner for the receive pipeline.
+
+Drives ``CanBusController`` -> decode -> ``RxHistory`` -> ``SessionLogger`` on
+the python-can ``virtual`` interface and ramps the frame rate until frames are
+dropped or the end-to-end latency exceeds a budget.
+
+Run with ``python -m app.soak --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import can
+
+from app.pipeline import RxPipeline
+from canio.can_bus import CanBusController, ReceivedMessage
+from canio.logger import LogReplay, SessionLogger
+from core.config import BusConfig
+from core.dbc_manager import DbcManager
+from core.profiler import profiling
+from core.rx_history import RxHistory
+
+SEQUENCE = struct.Struct("<I")
+# Frames whose send time is remembered; a frame arriving later than this many sends has no latency.
+SEND_WINDOW = 1 << 18
+
+
+def current_rss() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if available."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is the peak, in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def find_sequence_gaps(sequences: Iterable[int], expected: int) -> List[Tuple[int, int]]:
+    """Return ``(first_missing, count)`` ranges missing from ``0..expected-1``."""
+    gaps: List[Tuple[int, int]] = []
+    next_seq = 0
+    for seq in sequences:
+        if seq > next_seq:
+            gaps.append((next_seq, seq - next_seq))
+        next_seq = max(next_seq, seq + 1)
+    if next_seq < expected:
+        gaps.append((next_seq, expected - next_seq))
+    return gaps
+
+
+class LatencyHistogram:
+    """Fixed-size log-scale histogram of latencies in seconds.
+
+    Bins are ``1/bins_per_decade`` of a decade wide (about 2% at the
+    default), so percentiles are exact to that resolution while memory stays
+    constant however many frames a soak run sends.
+    """
+
+    def __init__(self, low: float = 1e-6, high: float = 100.0, bins_per_decade: int = 100) -> None:
+        self.low = low
+        self.bins_per_decade = bins_per_decade
+        self.counts = array("q", bytes(8 * (int(math.log10(high / low) * bins_per_decade) + 2)))
+        self.count = 0
+        self.maximum = 0.0
+
+    def reset(self) -> None:
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds <= self.low:
+            index = 0
+        else:
+            index = min(len(self.counts) - 1, int(math.log10(seconds / self.low) * self.bins_per_decade) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the bin holding the ``fraction`` quantile, capped at the maximum; 0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = int(round(fraction * (self.count - 1)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return min(self.low * 10 ** (index / self.bins_per_decade), self.maximum)
+        return self.maximum
+
+
+@dataclass
+class SoakStepResult:
+    """Outcome of running the pipeline at one frame rate."""
+
+    rate: int
+    duration: float
+    sent: int
+    received: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    cpu_ms_per_1k: float
+    log_gaps: List[Tuple[int, int]] = field(default_factory=list)
+    latency_budget_ms: float = 50.0
+
+    @property
+    def dropped(self) -> int:
+        return self.sent - self.received
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.received / self.duration if self.duration else 0.0
+
+    @property
+    def passed(self) -> bool:
+        return self.dropped == 0 and not self.log_gaps and self.latency_p99_ms <= self.latency_budget_ms
+
+    def describe(self) -> str:
+        missing = sum(count for _, count in self.log_gaps)
+        return (
+            f"{self.rate:>7} fps  sent={self.sent} recv={self.received} dropped={self.dropped} "
+            f"p50={self.latency_p50_ms:.2f}ms p99={self.latency_p99_ms:.2f}ms max={self.latency_max_ms:.2f}ms "
+            f"cpu/1k={self.cpu_ms_per_1k:.1f}ms log_gaps={len(self.log_gaps)} ({missing} frames) "
+            f"{'PASS' if self.passed else 'FAIL'}"
+        )
+
+
+@dataclass
+class SoakMemoryReport:
+    """Memory samples taken while running at a fixed rate."""
+
+    rate: int
+    duration: float
+    samples: List[Tuple[float, int]] = field(default_factory=list)
+    step: Optional[SoakStepResult] = None
+
+    @property
+    def growth_bytes(self) -> int:
+        if len(self.samples) < 2:
+            return 0
+        return self.samples[-1][1] - self.samples[0][1]
+
+    @property
+    def peak_bytes(self) -> int:
+        return max((rss for _, rss in self.samples), default=0)
+
+    def describe(self) -> str:
+        start = self.samples[0][1] if self.samples else 0
+        return (
+            f"soak {self.rate} fps for {self.duration:.0f}s: rss start={start / 2**20:.1f}MiB "
+            f"peak={self.peak_bytes / 2**20:.1f}MiB growth={self.growth_bytes / 2**20:+.2f}MiB"
+        )
+
+
+class SoakRunner:
+    """Sends sequenced frames on a virtual bus and measures the full RX path.
+
+    Every frame carries a little-endian 32-bit sequence number in its first
+    four data bytes so that drops, latency and gaps in the written log can be
+    attributed to individual frames.
+    """
+
+    def __init__(
+        self,
+        dbc_path: Path,
+        message_name: Optional[str] = None,
+        channel: str = "jadoe-soak",
+        latency_budget_ms: float = 50.0,
+        drain_timeout: float = 1.0,
+        log_dir: Path = Path("logs") / "soak",
+        buffer_limit: int = 2000,
+    ) -> None:
+        self.dbc_manager = DbcManager()
+        loaded = self.dbc_manager.load(dbc_path)
+        if message_name:
+            message = loaded.database.get_message_by_name(message_name)
+        else:
+            message = loaded.messages[0]
+        self.frame_id = message.frame_id
+        self.is_extended_id = message.is_extended_frame
+        self.length = max(message.length, SEQUENCE.size)
+        self.config = BusConfig(channel=channel, interface="virtual")
+        self.latency_budget_ms = latency_budget_ms
+        self.drain_timeout = drain_timeout
+        self.log_dir = log_dir
+        self.pipeline = RxPipeline(self.dbc_manager, RxHistory(hot_capacity=buffer_limit))
+
+        # Send times of the newest SEND_WINDOW frames by sequence number, and the
+        # latency histogram: fixed size, so a long soak measures the pipeline's
+        # memory rather than the harness's.
+        self._lock = threading.Lock()
+        self._send_times = array("d", bytes(8 * SEND_WINDOW))
+        self._send_seqs = array("q", [-1]) * SEND_WINDOW
+        self._latencies = LatencyHistogram()
+        self._received = 0
+
+    def _on_message(self, message: ReceivedMessage) -> None:
+        self.pipeline.process(message)
+        done = time.time()
+        seq = SEQUENCE.unpack_from(message.data)[0]
+        slot = seq % SEND_WINDOW
+        with self._lock:
+            if self._send_seqs[slot] == seq:
+                self._latencies.add(done - self._send_times[slot])
+            self._received += 1
+
+    def _payload(self, seq: int) -> bytes:
+        return SEQUENCE.pack(seq) + bytes(self.length - SEQUENCE.size)
+
+    def run_step(
+        self,
+        rate: int,
+        duration: float,
+        log_name: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> SoakStepResult:
+        """Send ``rate * duration`` frames at ``rate`` frames/s and measure them.
+
+        ``on_start`` is called once everything is set up, right before the
+        first frame is sent.
+        """
+        total = max(1, int(rate * duration))
+        with self._lock:
+            self._latencies.reset()
+            self._send_seqs[:] = array("q", [-1]) * SEND_WINDOW
+            self._received = 0
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / (log_name or f"soak-{rate}.csv")
+        self.pipeline.logger = SessionLogger(log_path)
+
+        controller = CanBusController(self.config)
+        controller.set_callback(self._on_message)
+        controller.start()
+        sender = can.Bus(channel=self.config.channel, interface=self.config.interface)
+        if on_start is not None:
+            on_start()
+        cpu_start = time.process_time()
+        try:
+            started = time.perf_counter()
+            for seq in range(total):
+                target = started + seq / rate
+                delay = target - time.perf_counter()
+                if delay > 0.001:
+                    time.sleep(delay)
+                slot = seq % SEND_WINDOW
+                self._send_times[slot] = time.time()
+                self._send_seqs[slot] = seq
+                sender.send(
+                    can.Message(
+                        arbitration_id=self.frame_id,
+                        data=self._payload(seq),
+                        is_extended_id=self.is_extended_id,
+                    )
+                )
+            elapsed = time.perf_counter() - started
+            deadline = time.perf_counter() + self.drain_timeout
+            while self._received < total and time.perf_counter() < deadline:
+                time.sleep(0.005)
+        finally:
+            controller.stop()
+            sender.shutdown()
+            logger, self.pipeline.logger = self.pipeline.logger, None
+            if logger:
+                logger.close()
+        cpu = time.process_time() - cpu_start
+
+        with self._lock:
+            received = self._received
+            latencies = self._latencies
+        sequences = (SEQUENCE.unpack_from(event.data)[0] for event in LogReplay(log_path))
+        return SoakStepResult(
+            rate=rate,
+            duration=elapsed,
+            sent=total,
+            received=received,
+            latency_p50_ms=latencies.percentile(0.50) * 1000.0,
+            latency_p99_ms=latencies.percentile(0.99) * 1000.0,
+            latency_max_ms=latencies.maximum * 1000.0,
+            cpu_ms_per_1k=cpu * 1000.0 / received * 1000.0 if received else 0.0,
+            log_gaps=find_sequence_gaps(sequences, total),
+            latency_budget_ms=self.latency_budget_ms,
+        )
+
+    def ramp(self, start_rate: int, rate_step: int, max_rate: int, step_seconds: float) -> List[SoakStepResult]:
+        """Increase the rate step by step until a step fails or ``max_rate`` is reached."""
+        results: List[SoakStepResult] = []
+        rate = start_rate
+        while rate <= max_rate:
+            result = self.run_step(rate, step_seconds)
+            results.append(result)
+            if not result.passed:
+                break
+            rate += rate_step
+        return results
+
+    def soak(self, rate: int, duration: float, sample_interval: float = 5.0) -> SoakMemoryReport:
+        """Run at a fixed rate for ``duration`` seconds while sampling RSS.
+
+        The first sample is taken once the bus, logger and harness buffers
+        are set up, so growth reflects the pipeline and not the setup.
+        """
+        report = SoakMemoryReport(rate=rate, duration=duration)
+        stop = threading.Event()
+        sending = threading.Event()
+
+        def sample() -> None:
+            sending.wait()
+            started = time.monotonic()
+            while True:
+                rss = current_rss()
+                if rss is not None:
+                    report.samples.append((time.monotonic() - started, rss))
+                if stop.wait(sample_interval):
+                    break
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        try:
+            report.step = self.run_step(rate, duration, log_name=f"soak-long-{rate}.csv", on_start=sending.set)
+        finally:
+            sending.set()
+            stop.set()
+            sampler.join()
+        return report
+
+
+def max_sustainable_rate(results: Iterable[SoakStepResult]) -> int:
+    """Highest rate among the passing steps, or 0 if none passed."""
+    return max((result.rate for result in results if result.passed), default=0)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Soak/load test the Jadoe receive pipeline on a virtual bus")
+    parser.add_argument("--dbc", type=Path, default=Path("data/sample.dbc"))
+    parser.add_argument("--message", help="DBC message used for the load (default: first message)")
+    parser.add_argument("--channel", default="jadoe-soak")
+    parser.add_argument("--start-rate", type=int, default=1000)
+    parser.add_argument("--rate-step", type=int, default=1000)
+    parser.add_argument("--max-rate", type=int, default=50000)
+    parser.add_argument("--step-seconds", type=float, default=3.0)
+    parser.add_argument("--latency-budget-ms", type=float, default=50.0)
+    parser.add_argument("--soak-seconds", type=float, default=0.0, help="Long run for memory growth (0 = skip)")
+    parser.add_argument("--soak-rate", type=int, help="Rate of the long run (default: 80%% of max sustainable)")
+    parser.add_argument("--log-dir", type=Path, default=Path("logs") / "soak")
+    parser.add_argument("--profile", type=Path, help="Write a sampling profile (collapsed stacks) of the run here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    with profiling(args.profile):
+        return _run(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    runner = SoakRunner(
+        args.dbc,
+        message_name=args.message,
+        channel=args.channel,
+        latency_budget_ms=args.latency_budget_ms,
+        log_dir=args.log_dir,
+    )
+    results = runner.ramp(args.start_rate, args.rate_step, args.max_rate, args.step_seconds)
+    for result in results:
+        print(result.describe())
+    best = max_sustainable_rate(results)
+    print(f"max sustainable rate: {best} frames/s")
+    passing = [result for result in results if result.passed]
+    if passing:
+        print(f"cpu per 1k frames at {best} fps: {passing[-1].cpu_ms_per_1k:.1f} ms")
+
+    if args.soak_seconds > 0:
+        rate = args.soak_rate or (int(best * 0.8) if best else args.start_rate)
+        report = runner.soak(rate, args.soak_seconds)
+        print(report.describe())
+        if report.step:
+            print(report.step.describe())
+    return 0 if best else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Frame-streaming server CLI.
+
+Opens one CAN bus and publishes its frames to local subscribers through a
+:class:`canio.stream.FrameServer`. The GUI and other tools then connect
+with ``interface="stream"`` and ``channel`` set to the server address
+instead of opening the hardware themselves.
+
+Run with ``python -m app.stream_server --help``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from canio.stream import FrameServer, default_address
+from core.config import BusConfig
+from core.dbc_manager import DbcManager
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Publish frames of one CAN bus to local subscribers")
+    parser.add_argument("--interface", default="virtual", help="python-can interface")
+    parser.add_argument("--channel", default="vcan0")
+    parser.add_argument("--bitrate", type=int, default=500000)
+    parser.add_argument("--fd", action="store_true", help="Open the bus in CAN FD mode")
+    parser.add_argument("--data-bitrate", type=int, default=None)
+    parser.add_argument("--address", default=default_address(), help="unix:PATH or tcp:HOST:PORT")
+    parser.add_argument("--dbc", type=Path, help="Resolve message and signal names in subscriber filters")
+    parser.add_argument("--max-pending-mb", type=float, default=8.0, help="Backlog per subscriber before it counts as slow")
+    parser.add_argument("--slow", choices=("drop", "disconnect"), default="drop", help="What to do with slow subscribers")
+    parser.add_argument("--quiet", action="store_true", help="No periodic status output")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    config = BusConfig(
+        channel=args.channel,
+        interface=args.interface,
+        bitrate=args.bitrate,
+        fd=args.fd,
+        data_bitrate=args.data_bitrate,
+    )
+    server = FrameServer(
+        args.address,
+        bus_config=config,
+        dbc=DbcManager().load(args.dbc) if args.dbc else None,
+        max_pending_bytes=int(args.max_pending_mb * 2**20),
+        slow_policy=args.slow,
+    )
+    try:
+        server.start()
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print(f"serving {args.interface}:{args.channel} on {server.address}")
+    try:
+        while True:
+            time.sleep(1.0)
+            if not args.quiet:
+                print(f"\r{server.published} frames, {len(server.subscribers)} subscribers", end="", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
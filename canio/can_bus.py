@@ -4,11 +4,12 @@ from __future__ import annotations
 import threading
 import time
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 
 import can
 
 from core.config import BusConfig
+from core.models import FLAG_BRS, FLAG_ERROR, FLAG_ESI, FLAG_EXTENDED, FLAG_FD, frame_flags
 
 
 @dataclass
@@ -17,17 +18,59 @@ class ReceivedMessage:
     arbitration_id: int
     data: bytes
     is_extended_id: bool
+    is_error_frame: bool = False
+    is_fd: bool = False
+    bitrate_switch: bool = False
+    error_state_indicator: bool = False
+
+    @property
+    def flags(self) -> int:
+        return frame_flags(
+            self.is_extended_id, self.is_error_frame, self.is_fd, self.bitrate_switch, self.error_state_indicator
+        )
+
+    @classmethod
+    def from_flags(cls, timestamp: float, arbitration_id: int, data: bytes, flags: int) -> "ReceivedMessage":
+        return cls(
+            timestamp,
+            arbitration_id,
+            data,
+            bool(flags & FLAG_EXTENDED),
+            is_error_frame=bool(flags & FLAG_ERROR),
+            is_fd=bool(flags & FLAG_FD),
+            bitrate_switch=bool(flags & FLAG_BRS),
+            error_state_indicator=bool(flags & FLAG_ESI),
+        )
 
 
 class CanBusController:
-    """High-level controller for python-can Bus with callbacks."""
+    """High-level controller for python-can Bus with callbacks.
+
+    With ``interface="stream"`` no bus is opened. ``channel`` is then the
+    address of a :class:`canio.stream.FrameServer`, and frames are received
+    from and sent through the process that owns the hardware.
+
+    With ``interface="shm"`` frames are read from the
+    :class:`canio.shm_ring.SharedFrameRing` named by ``channel``, written by a
+    capture process (``app.capture``). That backend is receive-only.
+
+    When the frame server closes the connection or the capture process
+    closes the ring, the controller stops and says why in
+    :attr:`connection_lost`.
+    """
 
     def __init__(self, config: BusConfig) -> None:
         self.config = config
         self._bus: Optional[can.Bus] = None
+        self._stream = None
+        self._ring = None
         self._listener_thread: Optional[threading.Thread] = None
         self._running = False
+        # Why the source went away on its own; cleared by start().
+        self.connection_lost: Optional[str] = None
         self._callback: Optional[Callable[[ReceivedMessage], None]] = None
+        # Extra receivers such as transport-protocol engines; replaced, never mutated.
+        self._listeners: Tuple[Callable[[ReceivedMessage], None], ...] = ()
 
     @property
     def is_running(self) -> bool:
@@ -36,26 +79,88 @@ class CanBusController:
     def set_callback(self, callback: Callable[[ReceivedMessage], None]) -> None:
         self._callback = callback
 
+    def add_listener(self, listener: Callable[[ReceivedMessage], None]) -> None:
+        """Also deliver every received frame to ``listener``, after the callback."""
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[ReceivedMessage], None]) -> None:
+        self._listeners = tuple(item for item in self._listeners if item != listener)
+
     def start(self) -> None:
         if self._running:
             return
-        self._bus = can.Bus(**self.config.to_kwargs())
+        self.connection_lost = None
+        if self.config.interface == "stream":
+            from canio.stream import StreamClient, acceptance_expression
+
+            self._stream = StreamClient(
+                self.config.channel,
+                self._deliver,
+                acceptance_expression(self.config.filters),
+                on_close=self._stream_closed,
+            )
+            self._running = True
+            return
+        if self.config.interface == "shm":
+            from canio.shm_ring import RingReader
+
+            self._ring = RingReader(self.config.channel)
+            target = self._follow_ring
+        else:
+            self._bus = can.Bus(**self.config.to_kwargs())
+            target = self._listen
         self._running = True
-        self._listener_thread = threading.Thread(target=self._listen, daemon=True)
+        self._listener_thread = threading.Thread(target=target, name=f"can-{self.config.channel}", daemon=True)
         self._listener_thread.start()
 
     def stop(self) -> None:
         self._running = False
         if self._listener_thread and self._listener_thread.is_alive():
             self._listener_thread.join(timeout=1)
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+        if self._ring:
+            self._ring.close()
+            self._ring = None
         if self._bus:
             self._bus.shutdown()
             self._bus = None
 
-    def send(self, arbitration_id: int, data: bytes, is_extended_id: bool = False) -> None:
-        if not self._bus:
+    def send(
+        self,
+        arbitration_id: int,
+        data: bytes,
+        is_extended_id: bool = False,
+        is_fd: Optional[bool] = None,
+        bitrate_switch: Optional[bool] = None,
+    ) -> None:
+        """Send one frame.
+
+        ``is_fd`` defaults to FD whenever the payload exceeds 8 bytes.
+        ``bitrate_switch`` defaults to on for FD frames when the bus is
+        configured with a data bitrate.
+        """
+        if self._ring:
+            raise RuntimeError("The shared-memory ring is receive-only")
+        if not self._bus and not self._stream:
             raise RuntimeError("CAN bus not started")
-        msg = can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=is_extended_id)
+        if is_fd is None:
+            is_fd = len(data) > 8
+        if self._stream:
+            self._stream.send(arbitration_id, data, is_extended_id, is_fd, bitrate_switch)
+            return
+        if is_fd and not self.config.fd:
+            raise ValueError("CAN FD frame on a bus not configured for FD")
+        if bitrate_switch is None:
+            bitrate_switch = is_fd and bool(self.config.data_bitrate)
+        msg = can.Message(
+            arbitration_id=arbitration_id,
+            data=data,
+            is_extended_id=is_extended_id,
+            is_fd=is_fd,
+            bitrate_switch=bitrate_switch,
+        )
         self._bus.send(msg)
 
     def _listen(self) -> None:
@@ -64,11 +169,48 @@ class CanBusController:
             msg = self._bus.recv(timeout=0.1)
             if msg is None:
                 continue
-            if self._callback:
+            if self._callback or self._listeners:
                 event = ReceivedMessage(
                     timestamp=time.time(),
                     arbitration_id=msg.arbitration_id,
                     data=bytes(msg.data),
                     is_extended_id=msg.is_extended_id,
+                    is_error_frame=msg.is_error_frame,
+                    is_fd=msg.is_fd,
+                    bitrate_switch=msg.bitrate_switch,
+                    error_state_indicator=msg.error_state_indicator,
                 )
-                self._callback(event)
+                self._deliver(event)
+
+    def _stream_closed(self) -> None:
+        self.connection_lost = f"Frame server {self.config.channel} closed the connection"
+        self._running = False
+
+    def _follow_ring(self) -> None:
+        assert self._ring
+        accept = None
+        if self.config.filters:
+            from canio.stream import acceptance_expression
+            from core.filters import compile_filter
+
+            accept = compile_filter(acceptance_expression(self.config.filters) or "")
+        while self._running:
+            # Checked before reading, so frames written just before closing are still delivered.
+            closed = self._ring.closed
+            messages = self._ring.messages()
+            if not messages:
+                if closed:
+                    self.connection_lost = f"Capture process closed frame ring {self._ring.name!r}"
+                    self._running = False
+                    break
+                time.sleep(0.001)
+                continue
+            for event in messages:
+                if accept is None or accept(event.arbitration_id, event.data):
+                    self._deliver(event)
+
+    def _deliver(self, event: ReceivedMessage) -> None:
+        if self._callback:
+            self._callback(event)
+        for listener in self._listeners:
+            listener(event)
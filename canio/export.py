@@ -0,0 +1,174 @@
+"""Columnar export of decoded logs as memory-mappable NumPy ``.npy`` files."""
+from __future__ import annotations
+
+import json
+import math
+import re
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from canio.logger import iter_log_events
+from core.dbc_manager import LoadedDbc
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_HEADER_SIZE = 128
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _unique_name(name: str, used: Set[str]) -> str:
+    """:func:`_safe_name` of ``name``, suffixed until it differs from ``used`` ignoring case; adds it to ``used``."""
+    base = candidate = _safe_name(name)
+    suffix = 2
+    while candidate.lower() in used:
+        candidate = f"{base}_{suffix}"
+        suffix += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+class _NpyColumnWriter:
+    """Streams float64 values into a ``.npy`` file of not yet known length.
+
+    A fixed-size header is reserved up front and rewritten with the final
+    shape on :meth:`close`, so a column never has to be held in memory. The
+    file is only open while a chunk is appended, so exporting a DBC with
+    hundreds of messages does not run into the open-file limit.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows = 0
+        path.write_bytes(self._header(0))
+
+    @staticmethod
+    def _header(rows: int) -> bytes:
+        text = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({rows},), }}"
+        size = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2
+        text = text.ljust(size - 1) + "\n"
+        return _NPY_MAGIC + struct.pack("<H", size) + text.encode("latin1")
+
+    def write(self, values: array) -> None:
+        if not values:
+            return
+        with self.path.open("ab") as handle:
+            handle.write(values.tobytes())
+        self.rows += len(values)
+
+    def close(self) -> None:
+        with self.path.open("r+b") as handle:
+            handle.write(self._header(self.rows))
+
+
+class _MessageColumns:
+    """Chunked column buffers plus writers for one DBC message."""
+
+    def __init__(self, message, directory: Path, chunk_rows: int) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.message = message
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.signal_names = [signal.name for signal in message.signals]
+        # "timestamp" is taken by the time column; names that sanitise alike get a numeric suffix.
+        used = {"timestamp"}
+        self.files = {name: f"{_unique_name(name, used)}.npy" for name in self.signal_names}
+        self.timestamps = array("d")
+        self.columns: Dict[str, array] = {name: array("d") for name in self.signal_names}
+        self.ts_writer = _NpyColumnWriter(directory / "timestamp.npy")
+        self.writers = {name: _NpyColumnWriter(directory / self.files[name]) for name in self.signal_names}
+        self.decode_errors = 0
+
+    def append(self, timestamp: float, data: bytes) -> None:
+        try:
+            decoded = self.message.decode(data, decode_choices=False)
+        except Exception:  # noqa: BLE001 - keep the row, mark values missing
+            decoded = {}
+            self.decode_errors += 1
+        self.timestamps.append(timestamp)
+        for name in self.signal_names:
+            value = decoded.get(name)
+            self.columns[name].append(math.nan if value is None else float(value))
+        if len(self.timestamps) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        self.ts_writer.write(self.timestamps)
+        self.timestamps = array("d")
+        for name in self.signal_names:
+            self.writers[name].write(self.columns[name])
+            self.columns[name] = array("d")
+
+    def close(self) -> Dict[str, object]:
+        self.flush()
+        self.ts_writer.close()
+        for writer in self.writers.values():
+            writer.close()
+        signals: Dict[str, object] = {}
+        for signal in self.message.signals:
+            signals[signal.name] = {
+                "file": f"{self.directory.name}/{self.files[signal.name]}",
+                "dtype": "float64",
+                "unit": signal.unit or "",
+                "scale": signal.scale,
+                "offset": signal.offset,
+                "minimum": signal.minimum,
+                "maximum": signal.maximum,
+                "choices": {str(k): str(v) for k, v in (signal.choices or {}).items()},
+            }
+        return {
+            "frame_id": self.message.frame_id,
+            "rows": self.ts_writer.rows,
+            "timestamp": f"{self.directory.name}/timestamp.npy",
+            "decode_errors": self.decode_errors,
+            "signals": signals,
+        }
+
+
+def export_columnar(log_path: Path, dbc: LoadedDbc, out_dir: Path, chunk_rows: int = 65536) -> Path:
+    """Decode ``log_path`` once and write one ``.npy`` column per signal.
+
+    Produces ``out_dir/<Message>/timestamp.npy`` and ``out_dir/<Message>/<Signal>.npy``
+    (float64, NaN where a signal is absent, e.g. multiplexed) plus
+    ``out_dir/manifest.json`` describing units, scaling and the file of
+    every column. Names that clash once sanitised (or a signal called
+    ``timestamp``) get a numeric suffix, so look files up in the manifest.
+    Columns can be opened with ``np.load(path, mmap_mode="r")``. Returns the
+    manifest path.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Masked and J1939 messages match several arbitration IDs, which must share one set of columns.
+    messages: Dict[str, _MessageColumns] = {}
+    directories: Set[str] = set()
+    by_id: Dict[int, Optional[_MessageColumns]] = {}
+    unmatched = 0
+    for event in iter_log_events(log_path):
+        if event.arbitration_id not in by_id:
+            definition = dbc.message_by_id(event.arbitration_id)
+            columns = None
+            if definition:
+                columns = messages.get(definition.name)
+                if columns is None:
+                    directory = out_dir / _unique_name(definition.name, directories)
+                    columns = messages[definition.name] = _MessageColumns(definition, directory, chunk_rows)
+            by_id[event.arbitration_id] = columns
+        columns = by_id[event.arbitration_id]
+        if columns is None:
+            unmatched += 1
+            continue
+        columns.append(event.timestamp, event.data)
+
+    exported: List[_MessageColumns] = list(messages.values())
+    manifest = {
+        "version": 1,
+        "source": str(log_path),
+        "dbc": str(dbc.path),
+        "unmatched_frames": unmatched,
+        "messages": {columns.message.name: columns.close() for columns in exported},
+    }
+    manifest_file = out_dir / "manifest.json"
+    manifest_file.write_text(json.dumps(manifest, indent=2))
+    return manifest_file
@@ -0,0 +1,176 @@
+"""Line parsers and formatters for the supported log formats.
+
+``csv``      the session log written by :class:`canio.logger.SessionLogger`
+``candump``  ``candump -L`` text, e.g. ``(1600000000.000000) can0 123#DEADBEEF``
+             (CAN FD: ``123##1DEADBEEF`` with the BRS/ESI flag nibble)
+``asc``      Vector ASCII logs (classic and ``CANFD`` data frames)
+"""
+from __future__ import annotations
+
+import csv
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from canio.logger import ReplayEvent, log_segments, parse_log_row
+from core.models import FLAG_BRS, FLAG_ESI, FLAG_EXTENDED, FLAG_FD
+
+FORMATS = ("csv", "candump", "asc")
+CSV_HEADER = ["timestamp", "id", "dlc", "data", "flags"]
+# candump FD flag nibble and ASC DLC codes for FD payload lengths.
+_CANDUMP_BRS = 0x1
+_CANDUMP_ESI = 0x2
+_FD_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+CSV_DECODED_HEADER = CSV_HEADER + ["name", "signals"]
+
+
+def detect_format(path: Path) -> str:
+    """Guess the format of ``path`` from its name, falling back to its first line."""
+    name = path.name.lower()
+    if name.endswith(".asc"):
+        return "asc"
+    if name.endswith(".log") or name.endswith(".candump"):
+        return "candump"
+    if ".csv" in name or name.endswith(".manifest.json"):
+        return "csv"
+    with path.open(errors="replace") as handle:
+        first = handle.readline().strip()
+    if first.startswith("("):
+        return "candump"
+    if first.startswith(("date", "base", "//")):
+        return "asc"
+    return "csv"
+
+
+def is_extended(event: ReplayEvent) -> bool:
+    return event.is_extended_id or event.arbitration_id > 0x7FF
+
+
+def _fd_dlc(length: int) -> int:
+    for dlc, size in enumerate(_FD_LENGTHS):
+        if size >= length:
+            return dlc
+    return 15
+
+
+def parse_csv_lines(lines: Iterable[str], header: Optional[List[str]] = None) -> List[ReplayEvent]:
+    """Parse session-log CSV lines; ``header`` is required when ``lines`` lacks one."""
+    reader = csv.DictReader(lines, fieldnames=header)
+    events: List[ReplayEvent] = []
+    for row in reader:
+        if row.get("timestamp") in (None, "timestamp"):
+            continue
+        events.append(parse_log_row(row))
+    return events
+
+
+def parse_candump_line(line: str) -> Optional[ReplayEvent]:
+    line = line.strip()
+    if not line.startswith("("):
+        return None
+    try:
+        stamp, _channel, frame = line.split()[:3]
+        arbitration_id, payload = frame.split("#", 1)
+        flags = FLAG_EXTENDED if len(arbitration_id) > 3 else 0
+        if payload.startswith("#"):  # CAN FD: "##<flags><data>"
+            nibble = int(payload[1], 16)
+            flags |= FLAG_FD | (FLAG_BRS if nibble & _CANDUMP_BRS else 0) | (FLAG_ESI if nibble & _CANDUMP_ESI else 0)
+            payload = payload[2:]
+        if payload.upper().startswith("R"):
+            payload = ""
+        return ReplayEvent(float(stamp.strip("()")), int(arbitration_id, 16), bytes.fromhex(payload), flags)
+    except (ValueError, IndexError):
+        return None
+
+
+def _parse_asc_fd(parts: List[str]) -> Optional[ReplayEvent]:
+    # <time> CANFD <channel> <dir> <id> [<symbolic name>] <brs> <esi> <dlc> <length> <data...> ...
+    if len(parts) < 9 or parts[3] not in ("Rx", "Tx"):
+        return None
+    rest = parts[5:]
+    if rest[0] not in ("0", "1"):
+        rest = rest[1:]
+    try:
+        length = int(rest[3])
+        flags = FLAG_FD | (FLAG_BRS if rest[0] == "1" else 0) | (FLAG_ESI if rest[1] == "1" else 0)
+        flags |= FLAG_EXTENDED if parts[4][-1] in "xX" else 0
+        data = bytes(int(b, 16) for b in rest[4 : 4 + length])
+        return ReplayEvent(float(parts[0]), int(parts[4].rstrip("xX"), 16), data, flags)
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_asc_line(line: str) -> Optional[ReplayEvent]:
+    parts = line.split()
+    if len(parts) > 1 and parts[1] == "CANFD":
+        return _parse_asc_fd(parts)
+    if len(parts) < 6 or parts[3] not in ("Rx", "Tx") or parts[4].lower() != "d":
+        return None
+    try:
+        timestamp = float(parts[0])
+        arbitration_id = int(parts[2].rstrip("xX"), 16)
+        dlc = int(parts[5], 16)
+        data = bytes(int(b, 16) for b in parts[6 : 6 + dlc])
+    except ValueError:
+        return None
+    return ReplayEvent(timestamp, arbitration_id, data, FLAG_EXTENDED if parts[2][-1] in "xX" else 0)
+
+
+def parse_lines(fmt: str, lines: Iterable[str], csv_header: Optional[List[str]] = None) -> List[ReplayEvent]:
+    if fmt == "csv":
+        return parse_csv_lines(lines, csv_header)
+    parser = parse_candump_line if fmt == "candump" else parse_asc_line
+    events: List[ReplayEvent] = []
+    for line in lines:
+        event = parser(line)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def format_signals(decoded: Dict[str, float]) -> str:
+    return ";".join(f"{name}={value}" for name, value in decoded.items())
+
+
+def format_csv(event: ReplayEvent, name: Optional[str] = None, decoded: Optional[Dict[str, float]] = None) -> str:
+    data_hex = event.data.hex(" ").upper()
+    row = f"{event.timestamp:.6f},{hex(event.arbitration_id)},{len(event.data)},{data_hex},{event.flags}"
+    if decoded is not None:
+        row += f",{name or ''},{format_signals(decoded)}"
+    return row + "\n"
+
+
+def format_candump(event: ReplayEvent, channel: str = "can0") -> str:
+    width = 8 if is_extended(event) else 3
+    separator = "#"
+    if event.is_fd:
+        nibble = (_CANDUMP_BRS if event.flags & FLAG_BRS else 0) | (_CANDUMP_ESI if event.flags & FLAG_ESI else 0)
+        separator = f"##{nibble:X}"
+    return f"({event.timestamp:.6f}) {channel} {event.arbitration_id:0{width}X}{separator}{event.data.hex().upper()}\n"
+
+
+def format_asc(event: ReplayEvent, start: float, channel: int = 1) -> str:
+    arbitration_id = f"{event.arbitration_id:X}" + ("x" if is_extended(event) else "")
+    data = event.data.hex(" ").upper()
+    if event.is_fd:
+        brs = 1 if event.flags & FLAG_BRS else 0
+        esi = 1 if event.flags & FLAG_ESI else 0
+        return (
+            f"{event.timestamp - start:>11.6f} CANFD {channel:>3} Rx   {arbitration_id:>8} {brs} {esi} "
+            f"{_fd_dlc(len(event.data)):x} {len(event.data):>2} {data}\n"
+        )
+    return f"{event.timestamp - start:>11.6f} {channel}  {arbitration_id:<15} Rx   d {len(event.data)} {data}\n"
+
+
+def asc_header(start: float) -> str:
+    stamp = time.strftime("%a %b %d %I:%M:%S %p %Y", time.localtime(start))
+    return f"date {stamp}\nbase hex  timestamps absolute\ninternal events logged\nBegin Triggerblock {stamp}\n"
+
+
+def asc_footer() -> str:
+    return "End TriggerBlock\n"
+
+
+def input_files(path: Path, fmt: str) -> List[Path]:
+    """Files to read for ``path``; segmented session logs expand to their segments."""
+    return log_segments(path) if fmt == "csv" else [path]
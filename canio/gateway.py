@@ -0,0 +1,312 @@
+"""Gateway engine forwarding and transforming frames between CAN channels.
+
+Rules route frames from a source channel to a destination channel. A rule
+matches with a :mod:`core.filters` expression, can remap the arbitration ID,
+and can rewrite signals with arithmetic expressions over the source
+message's signals (for example ``{"Speed": "Speed * 3.6"}``). Everything is
+compiled when the gateway is built. A frame is then routed with a dict
+lookup per ``(channel, ID)``, and a transformed payload is memoised per
+``(rule, ID, payload)``.
+"""
+from __future__ import annotations
+
+import ast
+import json
+import queue
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from cantools.database.can import Message
+
+from canio.can_bus import CanBusController, ReceivedMessage
+from core.config import BusConfig
+from core.dbc_manager import DbcManager, LoadedDbc
+from core.filters import CompiledFilter, FilterError, compile_filter
+
+_FUNCTIONS: Dict[str, Callable[..., float]] = {"abs": abs, "min": min, "max": max, "round": round}
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Constant,
+    ast.Name,
+    ast.Load,
+    ast.Call,
+    ast.IfExp,
+    ast.Compare,
+    ast.BoolOp,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+    ast.boolop,
+)
+
+
+class GatewayError(ValueError):
+    """Raised when gateway rules cannot be compiled."""
+
+
+@dataclass
+class GatewayRule:
+    """One route from ``source`` to ``destination`` (channel names of the gateway)."""
+
+    source: str
+    destination: str
+    match: str
+    target_id: Optional[int] = None
+    # Re-encode into this DBC message; its frame ID is used unless target_id is set.
+    target_message: Optional[str] = None
+    # Destination signal -> expression over the source message's signals.
+    transforms: Dict[str, str] = field(default_factory=dict)
+
+
+def compile_transform(expression: str, names: List[str]) -> Callable[[Dict[str, float]], float]:
+    """Compile an arithmetic ``expression`` over the signal ``names``."""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as exc:
+        raise GatewayError(f"Invalid transform {expression!r}: {exc.msg}") from exc
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise GatewayError(f"Unsupported syntax in transform {expression!r}")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS):
+            raise GatewayError(f"Unsupported call in transform {expression!r}")
+        if isinstance(node, ast.Name) and node.id not in _FUNCTIONS and node.id not in names:
+            raise GatewayError(f"Unknown signal {node.id!r} in transform {expression!r}")
+    code = compile(tree, f"<transform {expression}>", "eval")
+    scope = {"__builtins__": {}, **_FUNCTIONS}
+    return lambda values: eval(code, scope, values)  # noqa: S307 - validated above
+
+
+class _CompiledRule:
+    """A rule with its filter, target and per-source-message transforms resolved."""
+
+    MAX_MEMO = 16384
+
+    def __init__(self, rule: GatewayRule, dbc: Optional[LoadedDbc]) -> None:
+        self.rule = rule
+        self.dbc = dbc
+        try:
+            self.match: CompiledFilter = compile_filter(rule.match, dbc)
+        except FilterError as exc:
+            raise GatewayError(f"Rule {rule.source}->{rule.destination}: {exc}") from exc
+        self.target: Optional[Message] = None
+        if rule.target_message:
+            if dbc is None:
+                raise GatewayError("target_message needs a DBC")
+            try:
+                self.target = dbc.database.get_message_by_name(rule.target_message)
+            except KeyError as exc:
+                raise GatewayError(f"Unknown target message {rule.target_message!r}") from exc
+        if rule.transforms and dbc is None:
+            raise GatewayError("Signal transforms need a DBC")
+        self.forwarded = 0
+        self.errors = 0
+        self._memo: Dict[Tuple[int, bytes], Tuple[int, bytes]] = {}
+        self._plans: Dict[int, Optional[Callable[[int, bytes], Tuple[int, bytes]]]] = {}
+
+    @property
+    def rewrites(self) -> bool:
+        return self.target is not None or bool(self.rule.transforms)
+
+    def validate(self) -> None:
+        """Compile the transforms for every DBC message the rule can match, so mistakes surface at load."""
+        if self.dbc is None or not self.rewrites:
+            return
+        for message in self.dbc.messages:
+            if self.match.may_match_id(message.frame_id):
+                self._plan(message.frame_id)
+
+    def _plan(self, arbitration_id: int) -> Optional[Callable[[int, bytes], Tuple[int, bytes]]]:
+        if arbitration_id in self._plans:
+            return self._plans[arbitration_id]
+        assert self.dbc is not None
+        source = self.dbc.message_by_id(arbitration_id)
+        plan = None
+        if source is not None:
+            target = self.target or source
+            names = [signal.name for signal in source.signals]
+            target_names = [signal.name for signal in target.signals]
+            transforms = []
+            for name, expression in self.rule.transforms.items():
+                if name not in target_names:
+                    raise GatewayError(f"{target.name} has no signal {name!r}")
+                transforms.append((name, compile_transform(expression, names)))
+            target_id = self.rule.target_id if self.rule.target_id is not None else target.frame_id
+
+            def plan(_: int, data: bytes) -> Tuple[int, bytes]:
+                values = source.decode(data, decode_choices=False)
+                out = {name: values.get(name, 0) for name in target_names}
+                for name, transform in transforms:
+                    out[name] = transform(values)
+                return target_id, target.encode(out)
+
+        self._plans[arbitration_id] = plan
+        return plan
+
+    def apply(self, arbitration_id: int, data: bytes) -> Tuple[int, bytes]:
+        if not self.rewrites:
+            return (arbitration_id if self.rule.target_id is None else self.rule.target_id), data
+        key = (arbitration_id, data)
+        result = self._memo.get(key)
+        if result is None:
+            plan = self._plan(arbitration_id)
+            if plan is None:
+                # Not a DBC message: nothing to rewrite, only remap.
+                result = (arbitration_id if self.rule.target_id is None else self.rule.target_id), data
+            else:
+                result = plan(arbitration_id, data)
+            if len(self._memo) >= self.MAX_MEMO:
+                self._memo.clear()
+            self._memo[key] = result
+        return result
+
+
+@dataclass
+class GatewayStats:
+    received: int
+    forwarded: int
+    unrouted: int
+    errors: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    per_rule: List[Tuple[str, int, int]] = field(default_factory=list)  # (description, forwarded, errors)
+
+    def summary(self) -> str:
+        return (
+            f"received={self.received} forwarded={self.forwarded} unrouted={self.unrouted} errors={self.errors} "
+            f"p50={self.latency_p50_ms:.3f}ms p99={self.latency_p99_ms:.3f}ms max={self.latency_max_ms:.3f}ms"
+        )
+
+
+class Gateway:
+    """Forwards frames between the named ``buses`` according to ``rules``.
+
+    Each bus runs its own :class:`CanBusController`. Listener threads only
+    enqueue frames. A single forwarding thread routes, transforms and sends
+    them, so forwarding never runs on the GUI thread. Latency is measured
+    from the source controller's receive timestamp to the return of the
+    destination ``send`` and kept for the last ``latency_samples`` frames.
+    """
+
+    def __init__(
+        self,
+        buses: Dict[str, BusConfig],
+        rules: List[GatewayRule],
+        dbc: Optional[LoadedDbc] = None,
+        latency_samples: int = 65536,
+    ) -> None:
+        for rule in rules:
+            for channel in (rule.source, rule.destination):
+                if channel not in buses:
+                    raise GatewayError(f"Rule refers to unknown channel {channel!r}")
+        self.buses = buses
+        self.rules = [_CompiledRule(rule, dbc) for rule in rules]
+        for compiled in self.rules:
+            compiled.validate()
+        self.controllers: Dict[str, CanBusController] = {name: CanBusController(config) for name, config in buses.items()}
+        self.received = 0
+        self.unrouted = 0
+        self._routes: Dict[Tuple[str, int], List[_CompiledRule]] = {}
+        self._queue: "queue.SimpleQueue[Optional[Tuple[str, ReceivedMessage]]]" = queue.SimpleQueue()
+        self._latencies = array("d", bytes(8 * latency_samples))
+        self._latency_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        for name, controller in self.controllers.items():
+            controller.set_callback(lambda message, name=name: self._queue.put((name, message)))
+        for controller in self.controllers.values():
+            controller.start()
+        self._thread = threading.Thread(target=self._forward_loop, name="gateway", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        for controller in self.controllers.values():
+            controller.stop()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _route(self, channel: str, arbitration_id: int) -> List[_CompiledRule]:
+        key = (channel, arbitration_id)
+        rules = self._routes.get(key)
+        if rules is None:
+            rules = self._routes[key] = [
+                rule for rule in self.rules if rule.rule.source == channel and rule.match.may_match_id(arbitration_id)
+            ]
+        return rules
+
+    def _forward_loop(self) -> None:
+        get = self._queue.get
+        latencies = self._latencies
+        size = len(latencies)
+        while True:
+            item = get()
+            if item is None:
+                break
+            channel, message = item
+            self.received += 1
+            routed = False
+            for rule in self._route(channel, message.arbitration_id):
+                if not rule.match(message.arbitration_id, message.data):
+                    continue
+                routed = True
+                try:
+                    target_id, data = rule.apply(message.arbitration_id, message.data)
+                    self.controllers[rule.rule.destination].send(
+                        target_id,
+                        data,
+                        message.is_extended_id or target_id > 0x7FF,
+                        is_fd=message.is_fd or len(data) > 8,
+                        bitrate_switch=message.bitrate_switch or None,
+                    )
+                except Exception:  # noqa: BLE001 - a bad frame must not stop the gateway
+                    rule.errors += 1
+                    continue
+                rule.forwarded += 1
+                latencies[self._latency_count % size] = time.time() - message.timestamp
+                self._latency_count += 1
+            if not routed:
+                self.unrouted += 1
+
+    def stats(self) -> GatewayStats:
+        count = min(self._latency_count, len(self._latencies))
+        samples = np.frombuffer(self._latencies, dtype=np.float64, count=count) * 1000.0
+        p50, p99 = np.percentile(samples, [50, 99]) if count else (0.0, 0.0)
+        return GatewayStats(
+            received=self.received,
+            forwarded=sum(rule.forwarded for rule in self.rules),
+            unrouted=self.unrouted,
+            errors=sum(rule.errors for rule in self.rules),
+            latency_p50_ms=float(p50),
+            latency_p99_ms=float(p99),
+            latency_max_ms=float(samples.max()) if count else 0.0,
+            per_rule=[
+                (f"{rule.rule.source}:{rule.rule.match} -> {rule.rule.destination}", rule.forwarded, rule.errors)
+                for rule in self.rules
+            ],
+        )
+
+
+def load_gateway(path: Path) -> Gateway:
+    """Build a :class:`Gateway` from a JSON file with ``buses``, ``rules`` and an optional ``dbc``."""
+    data: Dict[str, Any] = json.loads(path.read_text())
+    dbc = DbcManager().load(path.parent / data["dbc"]) if data.get("dbc") else None
+    buses = {name: BusConfig(**config) for name, config in data.get("buses", {}).items()}
+    rules = []
+    for item in data.get("rules", []):
+        item = dict(item)
+        if isinstance(item.get("target_id"), str):
+            item["target_id"] = int(item["target_id"], 0)
+        rules.append(GatewayRule(**item))
+    return Gateway(buses, rules, dbc)
@@ -0,0 +1,319 @@
+"""ISO-TP (ISO 15765-2) transport on top of :class:`CanBusController`.
+
+One :class:`IsoTpTransport` is one point-to-point channel: it sends on
+``tx_id`` and listens on ``rx_id``. Payloads up to 7 bytes (62 on CAN FD)
+go out as a single frame. Longer ones are sent as a first frame followed by
+consecutive frames, paced by the receiver's flow control (block size and
+STmin). Both directions can be active at the same time::
+
+    transport = IsoTpTransport(controller, IsoTpConfig(tx_id=0x7E0, rx_id=0x7E8))
+    transport.send(bytes.fromhex("22F190"))
+    response = transport.receive(timeout=1.0)
+
+Consecutive frames are sent by a per-transport sender thread, so a block
+goes out back to back, or spaced by STmin with sub-millisecond precision,
+no matter what the calling thread does. Received payloads are reassembled
+in place into a buffer sized from the first frame.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from canio.can_bus import CanBusController, ReceivedMessage
+
+SINGLE_FRAME = 0
+FIRST_FRAME = 1
+CONSECUTIVE_FRAME = 2
+FLOW_CONTROL = 3
+
+FC_CONTINUE = 0
+FC_WAIT = 1
+FC_OVERFLOW = 2
+
+# Valid CAN FD payload lengths; classic CAN stops at 8.
+FD_LENGTHS = (8, 12, 16, 20, 24, 32, 48, 64)
+
+
+class IsoTpError(Exception):
+    """Raised when a transfer times out, overflows the receiver or breaks the protocol."""
+
+
+def encode_st_min(seconds: float) -> int:
+    """STmin byte for a minimum gap of ``seconds`` (0-127 ms, or 100-900 us)."""
+    if seconds <= 0:
+        return 0
+    if seconds < 0.001:
+        return 0xF0 + min(9, max(1, round(seconds * 10_000)))
+    return min(0x7F, round(seconds * 1000))
+
+
+def decode_st_min(value: int) -> float:
+    if value <= 0x7F:
+        return value / 1000
+    if 0xF1 <= value <= 0xF9:
+        return (value - 0xF0) / 10_000
+    # Reserved values must be treated as the maximum.
+    return 0.127
+
+
+@dataclass
+class IsoTpConfig:
+    tx_id: int
+    rx_id: int
+    extended_id: bool = False
+    # Flow control granted to the sender when receiving: consecutive frames
+    # per block (0 = all of them) and the minimum gap between them.
+    block_size: int = 0
+    st_min: float = 0.0
+    # 8 for classic CAN; a CAN FD length up to 64 sends FD frames.
+    frame_size: int = 8
+    # Fill byte for short frames; None sends classic frames unpadded.
+    padding: Optional[int] = 0xCC
+    # N_Bs / N_Cr: longest wait for flow control or the next consecutive frame.
+    timeout: float = 1.0
+    max_wait_frames: int = 10
+    max_receive: int = 4 * 1024 * 1024
+
+    def __post_init__(self) -> None:
+        if self.frame_size not in FD_LENGTHS:
+            raise ValueError(f"frame_size must be one of {FD_LENGTHS}, got {self.frame_size}")
+        if not 0 <= self.block_size <= 0xFF:
+            raise ValueError("block_size must be 0-255")
+
+
+class _Transfer:
+    __slots__ = ("payload", "done", "error")
+
+    def __init__(self, payload: Union[bytes, bytearray, memoryview]) -> None:
+        self.payload = memoryview(payload).cast("B")
+        self.done = threading.Event()
+        self.error: Optional[IsoTpError] = None
+
+
+class IsoTpTransport:
+    """Sends and receives ISO-TP messages on one pair of CAN IDs."""
+
+    def __init__(self, controller: CanBusController, config: IsoTpConfig) -> None:
+        self.controller = controller
+        self.config = config
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        self._fd = config.frame_size > 8
+        self._flow = threading.Condition()
+        self._flow_control: Optional[Tuple[int, int, float]] = None
+        self._jobs: "queue.SimpleQueue[Optional[_Transfer]]" = queue.SimpleQueue()
+        self._completed: "queue.SimpleQueue[bytearray]" = queue.SimpleQueue()
+        # Receive state, only touched on the controller's listener thread.
+        self._rx_buffer: Optional[bytearray] = None
+        self._rx_view: Optional[memoryview] = None
+        self._rx_position = 0
+        self._rx_sequence = 0
+        self._rx_block = 0
+        self._rx_deadline = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"isotp-tx-{config.tx_id:x}", daemon=True)
+        self._thread.start()
+        controller.add_listener(self.on_message)
+
+    def close(self) -> None:
+        self.controller.remove_listener(self.on_message)
+        self._jobs.put(None)
+        self._thread.join(timeout=2)
+
+    def send(self, payload: Union[bytes, bytearray, memoryview], timeout: Optional[float] = None) -> None:
+        """Send ``payload`` and wait until its last frame is on the bus.
+
+        Raises:
+            IsoTpError: If the receiver stops answering, reports an overflow,
+                or ``timeout`` expires first.
+        """
+        transfer = _Transfer(payload)
+        if len(transfer.payload) > 0xFFFFFFFF:
+            raise IsoTpError("Payload too long for ISO-TP")
+        self._jobs.put(transfer)
+        if not transfer.done.wait(timeout):
+            raise IsoTpError(f"Send of {len(transfer.payload)} bytes did not finish in {timeout} s")
+        if transfer.error is not None:
+            raise transfer.error
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[bytearray]:
+        """Next complete payload, or ``None`` after ``timeout`` seconds."""
+        try:
+            return self._completed.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # Sending
+    def _run(self) -> None:
+        while True:
+            transfer = self._jobs.get()
+            if transfer is None:
+                return
+            try:
+                self._transmit(transfer.payload)
+                self.sent += 1
+            except IsoTpError as exc:
+                self.errors += 1
+                transfer.error = exc
+            except Exception as exc:  # noqa: BLE001 - bus errors are reported to the caller
+                self.errors += 1
+                transfer.error = IsoTpError(str(exc))
+            transfer.done.set()
+
+    def _transmit(self, data: memoryview) -> None:
+        size = self.config.frame_size
+        length = len(data)
+        if length <= 7 and length < size:
+            self._send_frame(bytes([length]) + data)
+            return
+        if self._fd and length <= size - 2:
+            self._send_frame(bytes([0, length]) + data)
+            return
+        if length <= 0xFFF:
+            head = bytes([0x10 | length >> 8, length & 0xFF])
+        else:
+            head = b"\x10\x00" + length.to_bytes(4, "big")
+        position = size - len(head)
+        with self._flow:
+            self._flow_control = None
+        self._send_frame(head + data[:position])
+        chunk = size - 1
+        sequence = 1
+        while position < length:
+            block_size, st_min = self._wait_flow_control()
+            sent = 0
+            due = 0.0
+            while position < length and (not block_size or sent < block_size):
+                if sent and st_min:
+                    _pace(due)
+                self._send_frame(bytes([0x20 | sequence]) + data[position : position + chunk])
+                due = time.perf_counter() + st_min
+                position += chunk
+                sequence = (sequence + 1) & 0xF
+                sent += 1
+
+    def _wait_flow_control(self) -> Tuple[int, float]:
+        waits = 0
+        deadline = time.monotonic() + self.config.timeout
+        with self._flow:
+            while True:
+                while self._flow_control is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise IsoTpError(f"No flow control on {self.config.rx_id:#x}")
+                    self._flow.wait(remaining)
+                status, block_size, st_min = self._flow_control
+                self._flow_control = None
+                if status == FC_CONTINUE:
+                    return block_size, st_min
+                if status != FC_WAIT:
+                    raise IsoTpError("Receiver overflow" if status == FC_OVERFLOW else f"Invalid flow status {status}")
+                waits += 1
+                if waits > self.config.max_wait_frames:
+                    raise IsoTpError("Receiver kept asking to wait")
+                deadline = time.monotonic() + self.config.timeout
+
+    def _send_frame(self, frame: bytes) -> None:
+        padding = self.config.padding
+        if len(frame) > 8 or (padding is not None and len(frame) < 8):
+            target = next(length for length in FD_LENGTHS if length >= len(frame))
+            frame = frame.ljust(target, bytes([0xCC if padding is None else padding]))
+        self.controller.send(self.config.tx_id, frame, self.config.extended_id, is_fd=self._fd)
+
+    # Receiving
+    def on_message(self, message: ReceivedMessage) -> None:
+        """Controller listener; frames on other IDs are ignored."""
+        if message.arbitration_id != self.config.rx_id or message.is_extended_id != self.config.extended_id:
+            return
+        data = message.data
+        if not data:
+            return
+        kind = data[0] >> 4
+        if kind == CONSECUTIVE_FRAME:
+            self._on_consecutive(data)
+        elif kind == FLOW_CONTROL:
+            if len(data) >= 3:
+                with self._flow:
+                    self._flow_control = (data[0] & 0xF, data[1], decode_st_min(data[2]))
+                    self._flow.notify()
+        elif kind == SINGLE_FRAME:
+            length, offset = data[0] & 0xF, 1
+            if length == 0 and len(data) > 8:
+                length, offset = data[1], 2
+            if 0 < length <= len(data) - offset:
+                self._finish_receive(bytearray(data[offset : offset + length]))
+        elif kind == FIRST_FRAME and len(data) >= 8:
+            self._on_first(data)
+
+    def _on_first(self, data: bytes) -> None:
+        length, offset = (data[0] & 0xF) << 8 | data[1], 2
+        if length == 0:
+            length, offset = int.from_bytes(data[2:6], "big"), 6
+        self._reset_receive()
+        if length > self.config.max_receive:
+            self._send_flow_control(FC_OVERFLOW)
+            return
+        buffer = bytearray(length)
+        view = memoryview(buffer)
+        first = min(len(data) - offset, length)
+        view[:first] = memoryview(data)[offset : offset + first]
+        self._rx_buffer, self._rx_view, self._rx_position = buffer, view, first
+        self._rx_sequence, self._rx_block = 1, 0
+        self._rx_deadline = time.monotonic() + self.config.timeout
+        self._send_flow_control(FC_CONTINUE)
+
+    def _on_consecutive(self, data: bytes) -> None:
+        view = self._rx_view
+        if view is None:
+            return
+        now = time.monotonic()
+        if data[0] & 0xF != self._rx_sequence or now > self._rx_deadline:
+            self.errors += 1
+            self._reset_receive()
+            return
+        position = self._rx_position
+        count = min(len(data) - 1, len(view) - position)
+        view[position : position + count] = memoryview(data)[1 : 1 + count]
+        position += count
+        if position >= len(view):
+            buffer = self._rx_buffer
+            assert buffer is not None
+            self._reset_receive()
+            self._finish_receive(buffer)
+            return
+        self._rx_position = position
+        self._rx_sequence = (self._rx_sequence + 1) & 0xF
+        self._rx_deadline = now + self.config.timeout
+        self._rx_block += 1
+        if self.config.block_size and self._rx_block == self.config.block_size:
+            self._rx_block = 0
+            self._send_flow_control(FC_CONTINUE)
+
+    def _finish_receive(self, payload: bytearray) -> None:
+        self.received += 1
+        self._completed.put(payload)
+
+    def _reset_receive(self) -> None:
+        if self._rx_view is not None:
+            self._rx_view.release()
+        self._rx_buffer = self._rx_view = None
+
+    def _send_flow_control(self, status: int) -> None:
+        frame = bytes([0x30 | status, self.config.block_size, encode_st_min(self.config.st_min)])
+        try:
+            self._send_frame(frame)
+        except Exception:  # noqa: BLE001 - the sender times out waiting and reports it
+            self.errors += 1
+
+
+def _pace(due: float) -> None:
+    """Wait until ``perf_counter() >= due``; sleeps coarsely, then spins for the last millisecond."""
+    remaining = due - time.perf_counter()
+    if remaining > 0.002:
+        time.sleep(remaining - 0.001)
+    while time.perf_counter() < due:
+        pass
@@ -2,69 +2,601 @@
 from __future__ import annotations
 
 import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import queue
+import threading
 import time
+import zlib
+from collections import deque
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional
+from typing import IO, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
 from canio.can_bus import ReceivedMessage
+from core.models import FLAG_BRS, FLAG_ERROR, FLAG_ESI, FLAG_EXTENDED, FLAG_FD
+
+TriggerCondition = Callable[[ReceivedMessage], bool]
+
+
+LOG_HEADER = "timestamp,id,dlc,data,flags\n"
+# Rows after which an lzma segment ends its xz stream so its size on disk catches up.
+LZMA_SYNC_ROWS = 4096
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise ValueError("zstd compression requires the 'zstandard' package") from exc
+    return zstandard
+
+
+class _Codec:
+    """Incremental compressor factory plus a streaming text reader for one format.
+
+    ``sync`` flushes a compressor at a chunk boundary, so the on-disk size
+    used for rotation tracks what was written.
+    """
+
+    def __init__(
+        self,
+        suffix: str,
+        compressor: Callable[[], object],
+        opener: Callable[[Path], IO[str]],
+        sync: Optional[Callable[[object], bytes]] = None,
+    ) -> None:
+        self.suffix = suffix
+        self.compressor = compressor
+        self.opener = opener
+        self.sync = sync
+
+
+class _PlainCompressor:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _XzCompressor:
+    """LZMA compressor that ends its xz stream every ``sync_rows`` rows.
+
+    LZMA has no sync flush and holds back megabytes of output, which would
+    leave the byte count used for size rotation far behind. Ending the stream
+    and starting a new one writes everything out; ``lzma.open`` reads the
+    concatenated streams as one file. A segment therefore overshoots
+    ``rotate_bytes`` by at most the compressed size of ``sync_rows`` rows.
+    """
+
+    def __init__(self, sync_rows: Optional[int] = None) -> None:
+        self.sync_rows = LZMA_SYNC_ROWS if sync_rows is None else sync_rows
+        self._compressor: Optional[lzma.LZMACompressor] = None
+        self._rows = 0
+
+    def compress(self, data: bytes) -> bytes:
+        if self._compressor is None:
+            self._compressor = lzma.LZMACompressor(lzma.FORMAT_XZ)
+        self._rows += data.count(b"\n")
+        return self._compressor.compress(data)
+
+    def sync(self) -> bytes:
+        if self._rows < self.sync_rows:
+            return b""
+        return self.flush()
+
+    def flush(self) -> bytes:
+        compressor, self._compressor = self._compressor, None
+        self._rows = 0
+        return compressor.flush() if compressor is not None else b""
+
+
+def _open_zstd(path: Path) -> IO[str]:
+    raw = path.open("rb")
+    return io.TextIOWrapper(_zstd().ZstdDecompressor().stream_reader(raw, closefd=True), newline="")
+
+
+CODECS: Dict[Optional[str], _Codec] = {
+    None: _Codec(".csv", _PlainCompressor, lambda path: path.open(newline="")),
+    "zlib": _Codec(
+        ".csv.gz",
+        lambda: zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS),
+        lambda path: gzip.open(path, "rt", newline=""),
+        lambda compressor: compressor.flush(zlib.Z_SYNC_FLUSH),  # type: ignore[attr-defined]
+    ),
+    "lzma": _Codec(
+        ".csv.xz",
+        _XzCompressor,
+        lambda path: lzma.open(path, "rt", newline=""),
+        lambda compressor: compressor.sync(),  # type: ignore[attr-defined]
+    ),
+    "zstd": _Codec(
+        ".csv.zst",
+        lambda: _zstd().ZstdCompressor(level=3).compressobj(),
+        _open_zstd,
+        lambda compressor: compressor.flush(_zstd().COMPRESSOBJ_FLUSH_BLOCK),  # type: ignore[attr-defined]
+    ),
+}
+
+
+def manifest_path(path: Path) -> Path:
+    """Manifest written next to the segments of a segmented session log."""
+    return path.with_name(f"{path.name.split('.')[0]}.manifest.json")
+
+
+class _SegmentWriter(threading.Thread):
+    """Background thread compressing row chunks into rotating segment files."""
+
+    def __init__(
+        self,
+        path: Path,
+        codec: _Codec,
+        compression: Optional[str],
+        rotate_bytes: Optional[int],
+        rotate_seconds: Optional[float],
+        flush_interval: float = 1.0,
+        pending: Optional[Callable[[], None]] = None,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.stem = path.name.split(".")[0]
+        self.directory = path.parent
+        self.codec = codec
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.flush_interval = flush_interval
+        # Called every flush_interval to queue rows that have not filled a chunk.
+        self.pending = pending
+        self.queue: "queue.Queue[Optional[Tuple[float, float, int, str]]]" = queue.Queue(maxsize=64)
+        self.manifest = {"version": 1, "format": "csv", "compression": compression, "segments": []}
+        self.manifest_path = manifest_path(path)
+        self._file: Optional[IO[bytes]] = None
+        self._compressor: object = None
+        self._segment: Dict[str, object] = {}
+        self._opened = 0.0
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        try:
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                try:
+                    chunk = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    chunk = ()
+                if chunk is None:
+                    break
+                if chunk:
+                    self._write(*chunk)
+                now = time.monotonic()
+                if now >= deadline:
+                    deadline = now + self.flush_interval
+                    if self.pending is not None:
+                        self.pending()
+                    if (
+                        self._file is not None
+                        and self.rotate_seconds is not None
+                        and now - self._opened >= self.rotate_seconds
+                    ):
+                        self._close_segment()
+            self._close_segment()
+        except BaseException as exc:  # noqa: BLE001 - surfaced by SessionLogger.close()
+            self.error = exc
+
+    def _write(self, first: float, last: float, frames: int, text: str) -> None:
+        segment = self._segment
+        if (
+            self._file is not None
+            and self.rotate_seconds is not None
+            and first - float(segment["first_timestamp"]) >= self.rotate_seconds  # type: ignore[arg-type]
+        ):
+            self._close_segment()
+        if self._file is None:
+            self._open_segment(first)
+            text = LOG_HEADER + text
+        segment = self._segment
+        data = self._compressor.compress(text.encode())  # type: ignore[attr-defined]
+        if self.codec.sync is not None:
+            data += self.codec.sync(self._compressor)
+        self._file.write(data)  # type: ignore[union-attr]
+        self._file.flush()  # type: ignore[union-attr]
+        segment["bytes"] = int(segment["bytes"]) + len(data)  # type: ignore[arg-type]
+        segment["frames"] = int(segment["frames"]) + frames  # type: ignore[arg-type]
+        segment["last_timestamp"] = last
+        if self.rotate_bytes is not None and int(segment["bytes"]) >= self.rotate_bytes:  # type: ignore[arg-type]
+            self._close_segment()
+
+    def _open_segment(self, first: float) -> None:
+        index = len(self.manifest["segments"])  # type: ignore[arg-type]
+        name = f"{self.stem}.{index:04d}{self.codec.suffix}"
+        self._file = (self.directory / name).open("wb")
+        self._compressor = self.codec.compressor()
+        self._opened = time.monotonic()
+        self._segment = {"file": name, "first_timestamp": first, "last_timestamp": first, "frames": 0, "bytes": 0}
+        self.manifest["segments"].append(self._segment)  # type: ignore[union-attr]
+        self._save_manifest()
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        tail = self._compressor.flush()  # type: ignore[attr-defined]
+        self._file.write(tail)
+        self._file.close()
+        self._file = None
+        self._segment["bytes"] = int(self._segment["bytes"]) + len(tail)  # type: ignore[arg-type]
+        self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        temp = self.manifest_path.with_suffix(".tmp")
+        temp.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(temp, self.manifest_path)
 
 
 class SessionLogger:
-    """Logs CAN traffic to CSV with decoded metadata."""
+    """Logs CAN traffic to CSV with decoded metadata.
 
-    def __init__(self, path: Path) -> None:
+    Without compression or rotation every row is written straight to
+    ``path``. With ``compression`` (``"zlib"``, ``"lzma"`` or ``"zstd"``)
+    and/or a rotation limit, rows are collected into chunks of
+    ``chunk_rows`` and handed to a background thread that compresses them
+    into segments ``<stem>.0000.csv.gz``, ``<stem>.0001.csv.gz``, ... next to
+    ``path`` and keeps ``<stem>.manifest.json`` up to date. Segments rotate
+    once they reach ``rotate_bytes`` on disk or span ``rotate_seconds`` of
+    frame time; an idle segment is also closed ``rotate_seconds`` after it
+    was opened. lzma output only reaches disk every :data:`LZMA_SYNC_ROWS`
+    rows, so lzma segments can overshoot ``rotate_bytes`` by that much.
+
+    Rows that have not filled a chunk are handed over every
+    ``flush_interval`` seconds, so a quiet bus still reaches disk. :meth:`log`
+    never blocks on the writer: if compression falls behind and its queue is
+    full, the chunk is discarded and its rows are counted in :attr:`dropped`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        compression: Optional[str] = None,
+        rotate_bytes: Optional[int] = None,
+        rotate_seconds: Optional[float] = None,
+        chunk_rows: int = 4096,
+        flush_interval: float = 1.0,
+    ) -> None:
+        if compression not in CODECS:
+            raise ValueError(f"Unknown log compression {compression!r}")
         self.path = path
-        self._file = path.open("w", newline="")
-        self._writer = csv.writer(self._file)
-        self._writer.writerow(["timestamp", "id", "dlc", "data"])
+        self.segmented = bool(compression or rotate_bytes or rotate_seconds)
+        self.dropped = 0
+        self._chunk_rows = chunk_rows
+        self._rows: List[str] = []
+        self._first = 0.0
+        self._last = 0.0
+        self._rows_lock = threading.Lock()
+        self._writer_thread: Optional[_SegmentWriter] = None
+        if self.segmented:
+            if compression == "zstd":
+                _zstd()
+            self._writer_thread = _SegmentWriter(
+                path, CODECS[compression], compression, rotate_bytes, rotate_seconds, flush_interval, self._flush_pending
+            )
+            self._writer_thread.start()
+            self.manifest = self._writer_thread.manifest_path
+        else:
+            self._file = path.open("w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["timestamp", "id", "dlc", "data", "flags"])
 
     def log(self, message: ReceivedMessage) -> None:
-        data_hex = " ".join(f"{b:02X}" for b in message.data)
-        self._writer.writerow([
-            f"{message.timestamp:.6f}",
-            hex(message.arbitration_id),
-            len(message.data),
-            data_hex,
-        ])
-        self._file.flush()
+        data_hex = message.data.hex(" ").upper()
+        flags = message.flags
+        if not self.segmented:
+            self._writer.writerow([
+                f"{message.timestamp:.6f}",
+                hex(message.arbitration_id),
+                len(message.data),
+                data_hex,
+                flags,
+            ])
+            self._file.flush()
+            return
+        row = f"{message.timestamp:.6f},{hex(message.arbitration_id)},{len(message.data)},{data_hex},{flags}\n"
+        with self._rows_lock:
+            rows = self._rows
+            if not rows:
+                self._first = message.timestamp
+            rows.append(row)
+            self._last = message.timestamp
+            if len(rows) >= self._chunk_rows:
+                self._flush_chunk()
+
+    def _flush_pending(self) -> None:
+        """Queue rows that have not filled a chunk yet; called from the writer thread."""
+        with self._rows_lock:
+            if self._rows:
+                self._flush_chunk()
+
+    def _take_chunk(self) -> Tuple[float, float, int, str]:
+        rows, self._rows = self._rows, []
+        return self._first, self._last, len(rows), "".join(rows)
+
+    def _flush_chunk(self) -> None:
+        """Hand the collected rows to the writer without waiting; call under ``_rows_lock``."""
+        assert self._writer_thread
+        chunk = self._take_chunk()
+        try:
+            self._writer_thread.queue.put_nowait(chunk)
+        except queue.Full:
+            self.dropped += chunk[2]
 
     def close(self) -> None:
-        self._file.close()
+        if not self.segmented:
+            self._file.close()
+            return
+        writer = self._writer_thread
+        assert writer
+        with self._rows_lock:
+            chunk = self._take_chunk()
+        if chunk[2]:
+            writer.queue.put(chunk)
+        writer.queue.put(None)
+        writer.join()
+        if writer.error:
+            raise writer.error
+
+
+def build_trigger(
+    condition: Optional[Callable[[int, bytes], bool]] = None, on_error_frame: bool = True
+) -> TriggerCondition:
+    """Combine a frame predicate (e.g. a compiled filter) with error-frame triggering."""
+
+    def trigger(message: ReceivedMessage) -> bool:
+        if on_error_frame and message.is_error_frame:
+            return True
+        return bool(condition and condition(message.arbitration_id, message.data))
+
+    return trigger
+
+
+class TriggerCapture:
+    """Event-driven capture with a pre/post-trigger window.
+
+    Frames are kept in an in-memory ring covering the last ``pre_trigger``
+    seconds. When the trigger condition becomes true for an arbitration ID
+    (edge-triggered, so a signal threshold fires when it is crossed rather
+    than on every frame above it) or :meth:`fire` is called, the ring plus
+    the following ``post_trigger`` seconds are written to a new segment
+    file. A trigger during the post window extends it. Exposes the same
+    ``log``/``close`` interface as :class:`SessionLogger`; ``logger_options``
+    are passed to the :class:`SessionLogger` of every segment.
+
+    Segments are written by a background thread: a trigger only hands the
+    ring over, so the listener is not held up by writing up to
+    ``max_pre_frames`` rows. Frames arriving while that thread is more than
+    ``max_pre_frames`` behind are counted in :attr:`dropped`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str,
+        trigger: Optional[TriggerCondition] = None,
+        pre_trigger: float = 5.0,
+        post_trigger: float = 5.0,
+        max_pre_frames: int = 1_000_000,
+        logger_options: Optional[Dict[str, object]] = None,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.trigger = trigger
+        self.pre_trigger = pre_trigger
+        self.post_trigger = post_trigger
+        self.logger_options = logger_options or {}
+        self.segments: List[Path] = []
+        self.dropped = 0
+        self._max_pre_frames = max_pre_frames
+        self._ring: Deque[ReceivedMessage] = deque(maxlen=max_pre_frames)
+        self._states: Dict[int, bool] = {}
+        self._capturing = False
+        self._segment_end = 0.0
+        self._lock = threading.Lock()
+        # Commands for the writer thread: ("open", path, ring, horizon), ("frame", message), ("close",) or None.
+        self._commands: "queue.SimpleQueue[Optional[Tuple[object, ...]]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def capturing(self) -> bool:
+        return self._capturing
+
+    def log(self, message: ReceivedMessage) -> None:
+        fired = False
+        if self.trigger is not None:
+            active = self.trigger(message)
+            fired = active and not self._states.get(message.arbitration_id, False)
+            self._states[message.arbitration_id] = active
+        with self._lock:
+            if self._capturing and message.timestamp > self._segment_end:
+                self._close_segment()
+            if fired:
+                self._start_segment(message.timestamp)
+            if self._capturing:
+                if self._commands.qsize() >= self._max_pre_frames:
+                    self.dropped += 1
+                else:
+                    self._commands.put(("frame", message))
+                return
+            ring = self._ring
+            ring.append(message)
+            horizon = message.timestamp - self.pre_trigger
+            while ring[0].timestamp < horizon:
+                ring.popleft()
+
+    def fire(self, timestamp: Optional[float] = None) -> None:
+        """Manually trigger a capture (e.g. from a hotkey)."""
+        with self._lock:
+            self._start_segment(time.time() if timestamp is None else timestamp)
+
+    def close(self) -> None:
+        """Finish the open segment and wait for the writer thread to catch up."""
+        with self._lock:
+            self._close_segment()
+            self._ring.clear()
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._commands.put(None)
+            writer.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _start_segment(self, timestamp: float) -> None:
+        if self._capturing and timestamp > self._segment_end:
+            self._close_segment()
+        self._segment_end = timestamp + self.post_trigger
+        if self._capturing:
+            return
+        path = self.directory / f"{self.prefix}-trigger-{len(self.segments) + 1:04d}.csv"
+        self.segments.append(path)
+        self._capturing = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name="trigger-capture-writer", daemon=True)
+            self._writer.start()
+        ring, self._ring = self._ring, deque(maxlen=self._max_pre_frames)
+        self._commands.put(("open", path, ring, timestamp - self.pre_trigger))
+
+    def _close_segment(self) -> None:
+        if self._capturing:
+            self._commands.put(("close",))
+            self._capturing = False
+
+    def _run_writer(self) -> None:
+        segment: Optional[SessionLogger] = None
+        while True:
+            command = self._commands.get()
+            if command is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                if command[0] == "frame":
+                    assert segment is not None
+                    segment.log(command[1])  # type: ignore[arg-type]
+                elif command[0] == "open":
+                    _, path, ring, horizon = command
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    segment = SessionLogger(path, **self.logger_options)  # type: ignore[arg-type]
+                    for buffered in ring:  # type: ignore[attr-defined]
+                        if buffered.timestamp >= horizon:
+                            segment.log(buffered)
+                elif segment is not None:
+                    segment, closing = None, segment
+                    closing.close()
+            except BaseException as exc:  # noqa: BLE001 - surfaced by TriggerCapture.close()
+                self._error = exc
+        if segment is not None and self._error is None:
+            segment.close()
 
 
 class ReplayEvent:
-    def __init__(self, timestamp: float, arbitration_id: int, data: bytes) -> None:
+    """One logged frame; ``flags`` is a ``core.models.FLAG_*`` bit set."""
+
+    def __init__(self, timestamp: float, arbitration_id: int, data: bytes, flags: int = 0) -> None:
         self.timestamp = timestamp
         self.arbitration_id = arbitration_id
         self.data = data
+        self.flags = flags
+
+    @property
+    def is_extended_id(self) -> bool:
+        return bool(self.flags & FLAG_EXTENDED)
+
+    @property
+    def is_fd(self) -> bool:
+        return bool(self.flags & FLAG_FD)
+
+    def to_message(self, timestamp: float) -> ReceivedMessage:
+        flags = self.flags
+        return ReceivedMessage(
+            timestamp,
+            self.arbitration_id,
+            self.data,
+            bool(flags & FLAG_EXTENDED),
+            is_error_frame=bool(flags & FLAG_ERROR),
+            is_fd=bool(flags & FLAG_FD),
+            bitrate_switch=bool(flags & FLAG_BRS),
+            error_state_indicator=bool(flags & FLAG_ESI),
+        )
+
+
+def parse_log_row(row: Dict[str, str]) -> ReplayEvent:
+    """Build a :class:`ReplayEvent` from one ``csv.DictReader`` row of a session log.
+
+    Logs written before the ``flags`` column existed infer extended IDs
+    from the ID value and FD from the payload length.
+    """
+    arbitration_id = int(row["id"], 16)
+    data = bytes.fromhex(row["data"])
+    flags = row.get("flags")
+    if flags is None:
+        legacy = (FLAG_EXTENDED if arbitration_id > 0x7FF else 0) | (FLAG_FD if len(data) > 8 else 0)
+        return ReplayEvent(float(row["timestamp"]), arbitration_id, data, legacy)
+    return ReplayEvent(float(row["timestamp"]), arbitration_id, data, int(flags or 0))
+
+
+def log_segments(path: Path) -> List[Path]:
+    """Files making up a session log: the manifest's segments or ``path`` itself."""
+    manifest = path if path.name.endswith(".manifest.json") else manifest_path(path)
+    if path.name.endswith(".manifest.json") or (not path.exists() and manifest.exists()):
+        data = json.loads(manifest.read_text())
+        return [manifest.parent / segment["file"] for segment in data["segments"]]
+    return [path]
+
+
+def open_log_text(path: Path) -> IO[str]:
+    """Open one plain or compressed log file as a streaming text reader."""
+    for codec in CODECS.values():
+        if codec.suffix != ".csv" and path.name.endswith(codec.suffix):
+            return codec.opener(path)
+    return path.open(newline="")
+
+
+def iter_log_events(path: Path) -> Iterator[ReplayEvent]:
+    """Stream events from a CSV log, one compressed segment, or a manifest.
+
+    Segments are opened and decompressed one at a time, so memory stays
+    bounded regardless of the capture length.
+    """
+    for segment in log_segments(path):
+        with open_log_text(segment) as handle:
+            for row in csv.DictReader(handle):
+                yield parse_log_row(row)
 
 
 class LogReplay:
-    """Replay recorded log files with pacing control."""
+    """Replay recorded log files with pacing control.
+
+    ``path`` may be a plain CSV log, a compressed segment or the manifest of
+    a segmented log (or the base path it was recorded to). Events are
+    streamed from disk on every iteration rather than loaded up front.
+    """
 
     def __init__(self, path: Path) -> None:
         self.path = path
-        self._rows: List[ReplayEvent] = []
-        self._load()
-
-    def _load(self) -> None:
-        with self.path.open() as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                ts = float(row["timestamp"])
-                arb_id = int(row["id"], 16)
-                data = bytes(int(b, 16) for b in row["data"].split())
-                self._rows.append(ReplayEvent(ts, arb_id, data))
+
+    def __iter__(self) -> Iterator[ReplayEvent]:
+        return iter_log_events(self.path)
 
     def iter_events(self, speed: float = 1.0, loop: bool = False) -> Iterator[ReceivedMessage]:
         while True:
             base: Optional[float] = None
-            for event in self._rows:
+            started = time.monotonic()
+            for event in self:
                 if base is None:
                     base = event.timestamp
-                delay = (event.timestamp - base) / speed
+                delay = started + (event.timestamp - base) / speed - time.monotonic()
                 if delay > 0:
                     time.sleep(delay)
-                yield ReceivedMessage(time.time(), event.arbitration_id, event.data, False)
+                yield event.to_message(time.time())
             if not loop:
                 break
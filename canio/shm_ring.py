@@ -0,0 +1,214 @@
+"""Shared-memory frame ring between one capture process and any number of readers.
+
+The block starts with a 64-byte header, followed by ``capacity`` records in
+the :data:`core.rx_history.RECORD_DTYPE` layout. The header holds a magic
+value, the record size, the capacity, the number of frames written so far
+(``total``), a closed flag and the writer's process ID.
+
+The writer packs frame ``seq`` into slot ``seq % capacity`` and then
+publishes ``total = seq + 1``. It never waits for readers. Each reader
+keeps its own cursor, copies a run of slots and re-reads ``total``
+afterwards. Slots the writer may have reached in the meantime are
+discarded and counted in :attr:`RingReader.lost`, so a reader that falls
+more than ``capacity`` frames behind loses the oldest frames instead of
+seeing torn ones.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+from canio.can_bus import ReceivedMessage
+from core.rx_history import RECORD, RECORD_DTYPE
+
+DEFAULT_RING = "jadoe-can-ring"
+MAGIC = b"CANRING1"
+HEADER = struct.Struct("<8sII")
+TOTAL = struct.Struct("<Q")
+TOTAL_OFFSET = 16
+CLOSED_OFFSET = 24
+PID = struct.Struct("<I")
+PID_OFFSET = 28
+HEADER_SIZE = 64
+
+# Rings created by this process; readers here must leave their tracking alone.
+_created = set()
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill would terminate it; a block outlives its last handle only on POSIX.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _writer_pid(shm: shared_memory.SharedMemory) -> int:
+    """Process ID of the writer that still owns ``shm``, or 0 if the block is stale."""
+    if len(shm.buf) < HEADER_SIZE:
+        return 0
+    # A writer that has just created the block may not have written the header yet.
+    deadline = time.monotonic() + 1.0
+    while bytes(shm.buf[: len(MAGIC)]) == bytes(len(MAGIC)) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    if bytes(shm.buf[: len(MAGIC)]) != MAGIC or shm.buf[CLOSED_OFFSET]:
+        return 0
+    pid = PID.unpack_from(shm.buf, PID_OFFSET)[0]
+    return pid if pid and _process_alive(pid) else 0
+
+
+class SharedFrameRing:
+    """Writer side of the ring; creates the shared-memory block.
+
+    A block left behind by a writer that closed or died is replaced; one
+    whose writer is still running raises :class:`FileExistsError`.
+    """
+
+    def __init__(self, name: str = DEFAULT_RING, capacity: int = 1 << 18) -> None:
+        size = HEADER_SIZE + capacity * RECORD.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = shared_memory.SharedMemory(name=name)
+            if existing._name not in _created:  # type: ignore[attr-defined]
+                resource_tracker.unregister(existing._name, "shared_memory")  # type: ignore[attr-defined]
+            pid = _writer_pid(existing)
+            if pid:
+                existing.close()
+                raise FileExistsError(f"Frame ring {name!r} is still written by process {pid}") from None
+            existing.close()
+            existing.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created.add(self._shm._name)  # type: ignore[attr-defined]
+        self.name = name
+        self.capacity = capacity
+        self._buf = self._shm.buf
+        self._buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        HEADER.pack_into(self._buf, 0, MAGIC, RECORD.size, capacity)
+        PID.pack_into(self._buf, PID_OFFSET, os.getpid())
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def append(self, timestamp: float, arbitration_id: int, flags: int, data: bytes) -> None:
+        seq = self._total
+        RECORD.pack_into(
+            self._buf, HEADER_SIZE + (seq % self.capacity) * RECORD.size, timestamp, arbitration_id, flags, len(data), data
+        )
+        self._total = seq + 1
+        TOTAL.pack_into(self._buf, TOTAL_OFFSET, seq + 1)
+
+    def append_message(self, message: ReceivedMessage) -> None:
+        """:class:`CanBusController` callback writing each received frame."""
+        self.append(message.timestamp, message.arbitration_id, message.flags, message.data)
+
+    def close(self, unlink: bool = True) -> None:
+        """Mark the ring closed for readers and release it."""
+        if self._buf is None:
+            return
+        self._buf[CLOSED_OFFSET] = 1
+        self._buf.release()
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+            _created.discard(self._shm._name)  # type: ignore[attr-defined]
+
+
+class RingReader:
+    """Reader side with its own cursor; attaching and detaching never affects the writer.
+
+    ``start="latest"`` begins after the frames already in the ring,
+    ``"oldest"`` with the oldest one that is still intact.
+    """
+
+    def __init__(self, name: str = DEFAULT_RING, start: str = "latest") -> None:
+        self._shm = shared_memory.SharedMemory(name=name)
+        # Attaching registers the block with this process's resource tracker,
+        # which would unlink it when a reader exits; only the writer owns it.
+        if self._shm._name not in _created:  # type: ignore[attr-defined]
+            resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+        magic, record_size, capacity = HEADER.unpack_from(self._shm.buf, 0)
+        # The block exists before its creator has written the header.
+        deadline = time.monotonic() + 1.0
+        while magic == bytes(len(MAGIC)) and time.monotonic() < deadline:
+            time.sleep(0.001)
+            magic, record_size, capacity = HEADER.unpack_from(self._shm.buf, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self._shm.close()
+            raise ValueError(f"{name!r} is not a frame ring")
+        self.name = name
+        self.capacity = capacity
+        self.lost = 0
+        self._records: Optional[np.ndarray] = np.frombuffer(
+            self._shm.buf, dtype=RECORD_DTYPE, count=capacity, offset=HEADER_SIZE
+        )
+        total = self._writer_total()
+        self.cursor = total if start == "latest" else max(0, total - capacity + 1)
+
+    def _writer_total(self) -> int:
+        return TOTAL.unpack_from(self._shm.buf, TOTAL_OFFSET)[0]
+
+    @property
+    def closed(self) -> bool:
+        """True once the writer has closed the ring."""
+        return bool(self._shm.buf[CLOSED_OFFSET])
+
+    @property
+    def backlog(self) -> int:
+        return self._writer_total() - self.cursor
+
+    def read(self, max_count: int = 4096) -> np.ndarray:
+        """Copy up to ``max_count`` new records and advance the cursor."""
+        assert self._records is not None, "reader is closed"
+        total = self._writer_total()
+        oldest = total - self.capacity + 1
+        if self.cursor < oldest:
+            self.lost += oldest - self.cursor
+            self.cursor = oldest
+        end = min(total, self.cursor + max_count)
+        if end <= self.cursor:
+            return self._records[:0].copy()
+        first, last = self.cursor % self.capacity, end % self.capacity
+        if first < last or last == 0:
+            records = self._records[first : last or self.capacity].copy()
+        else:
+            records = np.concatenate((self._records[first:], self._records[:last]))
+        # Slots the writer reached while we were copying may be torn.
+        torn = self._writer_total() - self.capacity + 1 - self.cursor
+        if torn > 0:
+            self.lost += min(torn, len(records))
+            records = records[torn:]
+        self.cursor = end
+        return records
+
+    def messages(self, max_count: int = 4096) -> List[ReceivedMessage]:
+        records = self.read(max_count)
+        messages: List[ReceivedMessage] = []
+        data = records["data"]
+        for row, (timestamp, arbitration_id, flags, dlc) in enumerate(
+            zip(
+                records["timestamp"].tolist(),
+                records["arbitration_id"].tolist(),
+                records["flags"].tolist(),
+                records["dlc"].tolist(),
+            )
+        ):
+            messages.append(ReceivedMessage.from_flags(timestamp, arbitration_id, data[row, :dlc].tobytes(), flags))
+        return messages
+
+    def close(self) -> None:
+        self._records = None
+        self._shm.close()
@@ -0,0 +1,472 @@
+"""Local frame-streaming server and client.
+
+One process owns the bus (or any other frame source) and publishes every
+received frame to subscribers over a Unix domain socket or localhost TCP.
+Addresses are written ``unix:/path/to.sock`` or ``tcp:127.0.0.1:29536``.
+
+Wire format: every message is a ``<BI`` header (type, payload length)
+followed by the payload. ``FRAMES`` payloads are a run of records, each
+``<dIBB`` (timestamp, arbitration ID, ``core.models.FLAG_*`` flags, data
+length) followed by the data bytes. Frames that arrive while a write is in
+flight are sent together in the next batch.
+
+Clients send ``FILTER`` (a :mod:`core.filters` expression, empty for none)
+and ``SEND`` (one frame record to transmit on the server's bus). A client
+receives frames only once its first request has arrived, so a ``FILTER``
+sent right after connecting applies from the first frame. The server
+answers with ``ERROR`` for invalid requests. Before the next batch it sends
+``DROPPED`` (``<Q`` count) when frames were discarded for a slow subscriber.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from canio.can_bus import CanBusController, ReceivedMessage
+from core.config import BusConfig
+from core.dbc_manager import LoadedDbc
+from core.filters import CompiledFilter, FilterError, compile_filter
+
+STREAM_INTERFACE = "stream"
+HEADER = struct.Struct("<BI")
+RECORD = struct.Struct("<dIBB")
+DROPPED_COUNT = struct.Struct("<Q")
+
+FRAMES = 1
+FILTER = 2
+SEND = 3
+DROPPED = 4
+ERROR = 5
+
+
+def default_address() -> str:
+    if hasattr(socket, "AF_UNIX"):
+        return f"unix:{Path(tempfile.gettempdir()) / 'jadoe-can.sock'}"
+    return "tcp:127.0.0.1:29536"
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """Split ``address`` into a socket family and a ``bind``/``connect`` argument."""
+    if address.startswith("tcp:"):
+        host, _, port = address[4:].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    path = address[5:] if address.startswith("unix:") else address
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError("Unix domain sockets are not available here; use tcp:HOST:PORT")
+    return socket.AF_UNIX, path
+
+
+def acceptance_expression(filters: List[Dict[str, Any]]) -> Optional[str]:
+    """Filter expression equivalent to python-can ``can_filters``, for server-side filtering."""
+    if not filters:
+        return None
+    return " or ".join(f"{item['can_id']:#x}/{item['can_mask']:#x}" for item in filters)
+
+
+def pack_frame(message: ReceivedMessage) -> bytes:
+    return RECORD.pack(message.timestamp, message.arbitration_id, message.flags, len(message.data)) + message.data
+
+
+def unpack_frames(payload: bytes) -> List[ReceivedMessage]:
+    frames: List[ReceivedMessage] = []
+    offset = 0
+    size = RECORD.size
+    while offset < len(payload):
+        timestamp, arbitration_id, flags, length = RECORD.unpack_from(payload, offset)
+        offset += size
+        data = payload[offset : offset + length]
+        offset += length
+        frames.append(ReceivedMessage.from_flags(timestamp, arbitration_id, data, flags))
+    return frames
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Unlink a Unix socket left behind by a server that is gone; refuse one that still accepts."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        pass
+    else:
+        raise OSError(errno.EADDRINUSE, f"Another frame server is listening on {path}")
+    finally:
+        probe.close()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _message(kind: int, payload: bytes = b"") -> bytes:
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def _read_message(reader: BinaryIO) -> Optional[Tuple[int, bytes]]:
+    header = reader.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    kind, length = HEADER.unpack(header)
+    payload = reader.read(length) if length else b""
+    if len(payload) < length:
+        return None
+    return kind, payload
+
+
+class _Subscriber:
+    """Pending batch and writer thread for one connected client."""
+
+    def __init__(self, server: "FrameServer", sock: socket.socket) -> None:
+        self.server = server
+        self.sock = sock
+        self.filter: Optional[CompiledFilter] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+        # Set once the first request (normally FILTER) arrived; until then no frames are offered.
+        self.registered = False
+        self._wake = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+
+    def start(self) -> None:
+        self._writer.start()
+        self._reader.start()
+
+    def offer(self, message: ReceivedMessage, record: bytes) -> None:
+        flt = self.filter
+        if flt is not None and not flt(message.arbitration_id, message.data):
+            return
+        with self._wake:
+            if self.pending_bytes + len(record) > self.server.max_pending_bytes:
+                if self.server.slow_policy == "disconnect":
+                    self.closed = True
+                    self._wake.notify()
+                else:
+                    self.dropped += 1
+                return
+            self.pending.append(record)
+            self.pending_bytes += len(record)
+            self._wake.notify()
+
+    def _write_loop(self) -> None:
+        try:
+            while True:
+                with self._wake:
+                    while not self.pending and not self.dropped and not self.closed:
+                        self._wake.wait()
+                    if self.closed:
+                        break
+                if self.server.linger:
+                    time.sleep(self.server.linger)
+                with self._wake:
+                    records, self.pending = self.pending, []
+                    self.pending_bytes = 0
+                    dropped, self.dropped = self.dropped, 0
+                out = b""
+                if dropped:
+                    out += _message(DROPPED, DROPPED_COUNT.pack(dropped))
+                if records:
+                    out += _message(FRAMES, b"".join(records))
+                self.sock.sendall(out)
+                self.sent += len(records)
+        except OSError:
+            pass
+        self.close()
+
+    def _read_loop(self) -> None:
+        reader = self.sock.makefile("rb")
+        try:
+            while not self.closed:
+                message = _read_message(reader)
+                if message is None:
+                    break
+                self.server._handle_request(self, *message)
+        except OSError:
+            pass
+        finally:
+            reader.close()
+            self.close()
+
+    def send_error(self, text: str) -> None:
+        try:
+            self.sock.sendall(_message(ERROR, text.encode()))
+        except OSError:
+            self.close()
+
+    def close(self) -> None:
+        with self._wake:
+            self.closed = True
+            self._wake.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.server._remove(self)
+
+
+class FrameServer:
+    """Publishes frames to any number of local subscribers.
+
+    Frames come from :meth:`publish`, which takes a :class:`ReceivedMessage`
+    and can be used directly as a :class:`CanBusController` callback. When
+    ``bus_config`` is given the server owns that bus and also transmits
+    frames that clients ``SEND``.
+
+    Each subscriber has its own filter, pending batch and writer thread, so
+    one slow client never blocks the publisher or the others. Once a
+    client's backlog exceeds ``max_pending_bytes``, new frames for it are
+    dropped and counted (``slow_policy="drop"``) or it is disconnected
+    (``"disconnect"``).
+    """
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        bus_config: Optional[BusConfig] = None,
+        dbc: Optional[LoadedDbc] = None,
+        max_pending_bytes: int = 8 * 2**20,
+        slow_policy: str = "drop",
+        linger: float = 0.002,
+    ) -> None:
+        if slow_policy not in ("drop", "disconnect"):
+            raise ValueError(f"Unknown slow-consumer policy {slow_policy!r}")
+        self.address = address or default_address()
+        self.dbc = dbc
+        self.max_pending_bytes = max_pending_bytes
+        self.slow_policy = slow_policy
+        self.linger = linger
+        self.published = 0
+        self._subscribers: Tuple[_Subscriber, ...] = ()
+        # Every connected client, including those that have not sent a request yet.
+        self._clients: Tuple[_Subscriber, ...] = ()
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._accept_thread: Optional[threading.Thread] = None
+        self._bus: Optional[CanBusController] = None
+        if bus_config is not None:
+            self._bus = CanBusController(bus_config)
+            self._bus.set_callback(self.publish)
+
+    @property
+    def subscribers(self) -> Tuple[_Subscriber, ...]:
+        """Clients that receive frames, i.e. whose first request has arrived."""
+        return self._subscribers
+
+    def start(self) -> None:
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            _remove_stale_socket(str(target))
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(target)
+        sock.listen()
+        if family == socket.AF_INET:
+            host, port = sock.getsockname()[:2]
+            self.address = f"tcp:{host}:{port}"
+        self._sock = sock
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+        if self._bus is not None:
+            self._bus.start()
+
+    def stop(self) -> None:
+        if self._bus is not None:
+            self._bus.stop()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            family = sock.family
+            sock.close()
+            if family == socket.AF_UNIX:
+                try:
+                    os.unlink(parse_address(self.address)[1])  # type: ignore[arg-type]
+                except OSError:
+                    pass
+        for subscriber in self._clients:
+            subscriber.close()
+        if self._accept_thread is not None:
+            self._accept_thread.join(timeout=1)
+
+    def publish(self, message: ReceivedMessage) -> None:
+        self.published += 1
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        record = pack_frame(message)
+        for subscriber in subscribers:
+            subscriber.offer(message, record)
+
+    def _accept_loop(self) -> None:
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            if conn.family == socket.AF_INET:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _Subscriber(self, conn)
+            with self._lock:
+                self._clients = self._clients + (subscriber,)
+            subscriber.start()
+
+    def _remove(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+            self._clients = tuple(s for s in self._clients if s is not subscriber)
+
+    def _handle_request(self, subscriber: _Subscriber, kind: int, payload: bytes) -> None:
+        try:
+            self._dispatch(subscriber, kind, payload)
+        finally:
+            if not subscriber.registered:
+                with self._lock:
+                    if not subscriber.closed:
+                        subscriber.registered = True
+                        self._subscribers = self._subscribers + (subscriber,)
+
+    def _dispatch(self, subscriber: _Subscriber, kind: int, payload: bytes) -> None:
+        if kind == FILTER:
+            text = payload.decode(errors="replace").strip()
+            try:
+                subscriber.filter = compile_filter(text, self.dbc) if text else None
+            except FilterError as exc:
+                subscriber.send_error(f"filter: {exc}")
+        elif kind == SEND:
+            frames = unpack_frames(payload)
+            if self._bus is None:
+                subscriber.send_error("send: server has no bus")
+                return
+            for frame in frames:
+                try:
+                    self._bus.send(
+                        frame.arbitration_id,
+                        frame.data,
+                        frame.is_extended_id,
+                        is_fd=frame.is_fd,
+                        # A cleared BRS bit leaves the choice to the server's bus configuration.
+                        bitrate_switch=frame.bitrate_switch or None,
+                    )
+                except (RuntimeError, ValueError) as exc:
+                    subscriber.send_error(f"send: {exc}")
+        else:
+            subscriber.send_error(f"unknown request type {kind}")
+
+
+class StreamClient:
+    """Subscribes to a :class:`FrameServer` and delivers frames to ``callback``.
+
+    Frames keep the server's receive timestamps. :attr:`dropped` counts
+    frames the server discarded because this client fell behind.
+    ``on_close`` is called from the reader thread when the server ends the
+    connection (not after :meth:`close`); sending then raises
+    :class:`RuntimeError`.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        callback: Callable[[ReceivedMessage], None],
+        filter_expression: Optional[str] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+        on_close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        family, target = parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.connect(target)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._callback = callback
+        self._on_error = on_error
+        self._on_close = on_close
+        self._send_lock = threading.Lock()
+        self.dropped = 0
+        self.received = 0
+        self.errors: List[str] = []
+        self._running = True
+        # Always sent: the server starts streaming to a client once its first request arrived.
+        self.set_filter(filter_expression)
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def set_filter(self, expression: Optional[str]) -> None:
+        self._send(_message(FILTER, (expression or "").encode()))
+
+    def send(
+        self,
+        arbitration_id: int,
+        data: bytes,
+        is_extended_id: bool = False,
+        is_fd: Optional[bool] = None,
+        bitrate_switch: Optional[bool] = None,
+    ) -> None:
+        fd = len(data) > 8 if is_fd is None else is_fd
+        frame = ReceivedMessage(
+            time.time(), arbitration_id, data, is_extended_id, is_fd=fd, bitrate_switch=bool(bitrate_switch)
+        )
+        self._send(_message(SEND, pack_frame(frame)))
+
+    def _send(self, data: bytes) -> None:
+        try:
+            with self._send_lock:
+                self._sock.sendall(data)
+        except OSError as exc:
+            raise RuntimeError(f"Frame server connection lost: {exc}") from exc
+
+    def _read_loop(self) -> None:
+        reader = self._sock.makefile("rb")
+        try:
+            while self._running:
+                message = _read_message(reader)
+                if message is None:
+                    break
+                kind, payload = message
+                if kind == FRAMES:
+                    frames = unpack_frames(payload)
+                    self.received += len(frames)
+                    for frame in frames:
+                        self._callback(frame)
+                elif kind == DROPPED:
+                    self.dropped += DROPPED_COUNT.unpack(payload)[0]
+                elif kind == ERROR:
+                    text = payload.decode(errors="replace")
+                    self.errors.append(text)
+                    if self._on_error:
+                        self._on_error(text)
+        except (OSError, ValueError):
+            pass
+        finally:
+            reader.close()
+            lost, self._running = self._running, False
+            if lost and self._on_close:
+                self._on_close()
+
+    @property
+    def connected(self) -> bool:
+        return self._running
+
+    def close(self) -> None:
+        self._running = False
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout=1)
@@ -30,7 +30,7 @@ class VirtualCanGenerator:
         self._message_filter = set(messages) if messages else None
         self._randomize = randomize
         self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, name="virtual-generator", daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
@@ -54,6 +54,8 @@ class VirtualCanGenerator:
                     arbitration_id=message.frame_id,
                     data=data,
                     is_extended_id=message.is_extended_frame,
+                    is_fd=message.is_fd,
+                    bitrate_switch=message.is_fd,
                 )
                 self._callback(event)
             time.sleep(self._period)
@@ -0,0 +1,253 @@
+"""Bus load and per-ID bandwidth statistics computed from received frames."""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from core.config import BusConfig
+from core.models import FLAG_BRS, FLAG_ERROR, FLAG_EXTENDED, FLAG_FD
+
+# CRC delimiter, ACK slot, ACK delimiter, 7 bit EOF and 3 bit intermission.
+_TRAILER_BITS = 13
+_CRC15_POLY = 0x4599
+_FD_DLC_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+# Runs shorter than four bits can never reach five, even with a carried stuff bit.
+_LONG_RUNS = re.compile(r"0{4,}|1{4,}")
+
+
+def _crc15_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 7
+        for _ in range(8):
+            crc = ((crc << 1) ^ _CRC15_POLY) if crc & 0x4000 else crc << 1
+        table.append(crc & 0x7FFF)
+    return table
+
+
+_CRC15_TABLE = _crc15_table()
+
+
+def crc15(bits: str, data: bytes = b"", crc: int = 0) -> int:
+    """CAN CRC-15 over the bit string ``bits`` followed by the bytes ``data``.
+
+    ``crc`` continues from a previously computed register value.
+    """
+    for bit in bits:
+        top = ((crc >> 14) & 1) ^ (bit == "1")
+        crc = ((crc << 1) & 0x7FFF) ^ (_CRC15_POLY if top else 0)
+    for byte in data:
+        crc = ((crc << 8) & 0x7FFF) ^ _CRC15_TABLE[((crc >> 7) ^ byte) & 0xFF]
+    return crc
+
+
+def stuff_bits(bits: str) -> int:
+    """Number of dynamic stuff bits the bit string ``bits`` needs on the wire.
+
+    After five equal bits a complementary bit is inserted, and that bit
+    counts towards the next run. So a run of ``n`` equal bits (plus a
+    carried stuff bit of the same value) needs ``n // 5`` stuff bits.
+    """
+    count = 0
+    carry_end = -1
+    for match in _LONG_RUNS.finditer(bits):
+        start, end = match.span()
+        length = end - start + (start == carry_end)
+        count += length // 5
+        carry_end = end if length % 5 == 0 else -1
+    return count
+
+
+def _fd_dlc(length: int) -> int:
+    for dlc, size in enumerate(_FD_DLC_LENGTHS):
+        if size >= length:
+            return dlc
+    return 15
+
+
+@lru_cache(maxsize=4096)
+def _arbitration(arbitration_id: int, extended: bool) -> str:
+    if extended:
+        return f"0{arbitration_id >> 18 & 0x7FF:011b}11{arbitration_id & 0x3FFFF:018b}"
+    return f"0{arbitration_id & 0x7FF:011b}"
+
+
+@lru_cache(maxsize=4096)
+def _classic_head(arbitration_id: int, extended: bool, length: int) -> Tuple[str, int]:
+    # RTR, IDE, r0 (standard) or RTR, r1, r0 (extended), then the DLC.
+    head = _arbitration(arbitration_id, extended) + "000" + f"{min(length, 8):04b}"
+    return head, crc15(head)
+
+
+def frame_bits(arbitration_id: int, data: bytes, flags: int) -> Tuple[int, int]:
+    """Exact on-wire length of a data frame as ``(nominal_bits, data_phase_bits)``.
+
+    Covers SOF through intermission and includes dynamic stuff bits. FD
+    frames also include the stuff count and the fixed stuff bits of the
+    CRC field. ``data_phase_bits`` is the part sent at the data bitrate:
+    ESI through the CRC field when BRS is set, and 0 otherwise.
+    """
+    extended = bool(flags & FLAG_EXTENDED)
+    payload = f"{int.from_bytes(data, 'big'):0{8 * len(data)}b}" if data else ""
+    if not flags & FLAG_FD:
+        head, crc = _classic_head(arbitration_id, extended, len(data))
+        stuffed = head + payload + f"{crc15('', data, crc):015b}"
+        return len(stuffed) + stuff_bits(stuffed) + _TRAILER_BITS, 0
+    arbitration = _arbitration(arbitration_id, extended)
+    brs = bool(flags & FLAG_BRS)
+    # RRS, (IDE,) FDF, res, BRS | ESI, DLC.
+    arbitration_part = arbitration + ("0" if extended else "00") + "10" + ("1" if brs else "0")
+    data_part = "0" + f"{_fd_dlc(len(data)):04b}" + payload
+    arbitration_stuff = stuff_bits(arbitration_part)
+    data_stuff = stuff_bits(arbitration_part + data_part) - arbitration_stuff
+    # Stuff count (4) + CRC17/21, with a fixed stuff bit before every 4 bits.
+    crc_length = 17 if len(data) <= 16 else 21
+    crc_field = 4 + crc_length + 1 + (crc_length + 3) // 4
+    nominal = len(arbitration_part) + arbitration_stuff + _TRAILER_BITS
+    data_phase = len(data_part) + data_stuff + crc_field
+    if brs:
+        return nominal, data_phase
+    return nominal + data_phase, 0
+
+
+class _Window:
+    """Sliding sums over ``buckets`` fixed-width time buckets; O(1) amortised per add."""
+
+    __slots__ = ("frames", "bytes", "busy", "last")
+
+    def __init__(self, buckets: int) -> None:
+        self.frames = [0] * buckets
+        self.bytes = [0] * buckets
+        self.busy = [0.0] * buckets
+        self.last = -(1 << 62)
+
+    def add(self, bucket: int, size: int, busy: float) -> None:
+        count = len(self.frames)
+        if bucket > self.last:
+            if bucket - self.last >= count:
+                self.frames[:] = [0] * count
+                self.bytes[:] = [0] * count
+                self.busy[:] = [0.0] * count
+            else:
+                for stale in range(self.last + 1, bucket + 1):
+                    index = stale % count
+                    self.frames[index] = 0
+                    self.bytes[index] = 0
+                    self.busy[index] = 0.0
+            self.last = bucket
+        elif self.last - bucket >= count:
+            return
+        index = bucket % count
+        self.frames[index] += 1
+        self.bytes[index] += size
+        self.busy[index] += busy
+
+    def sums(self, now_bucket: int) -> Tuple[int, int, float]:
+        count = len(self.frames)
+        first = now_bucket - count + 1
+        if self.last < first:
+            return 0, 0, 0.0
+        frames = size = 0
+        busy = 0.0
+        for bucket in range(first, min(self.last, now_bucket) + 1):
+            index = bucket % count
+            frames += self.frames[index]
+            size += self.bytes[index]
+            busy += self.busy[index]
+        return frames, size, busy
+
+
+@dataclass
+class IdRate:
+    arbitration_id: int
+    frames_per_s: float
+    bytes_per_s: float
+    load: float  # share of bus time, 0..1
+
+
+@dataclass
+class BusLoadSnapshot:
+    timestamp: float
+    window: float
+    loads: Dict[str, float] = field(default_factory=dict)  # channel -> 0..1
+    frames_per_s: Dict[str, float] = field(default_factory=dict)
+    ids: List[IdRate] = field(default_factory=list)
+
+    def top_talkers(self, count: int = 10, key: str = "load") -> List[IdRate]:
+        return sorted(self.ids, key=lambda rate: getattr(rate, key), reverse=True)[:count]
+
+
+class BusStatistics:
+    """Bus load per channel and frames/bytes per second per ID over a sliding window.
+
+    :meth:`update` costs a memoised bit-length lookup plus a few bucket
+    additions per frame. The frame's bus time uses the bitrates of
+    ``config``: the nominal bitrate for arbitration and the data bitrate
+    for the BRS data phase. :meth:`snapshot` sums the buckets and is meant
+    for the GUI's refresh rate, not for the per-frame path.
+    """
+
+    MAX_MEMO = 65536
+
+    def __init__(self, config: BusConfig, window: float = 1.0, buckets: int = 10) -> None:
+        self.config = config
+        self.window = window
+        self.buckets = buckets
+        self._width = window / buckets
+        self._lock = threading.Lock()
+        self._bits: Dict[Tuple[int, int, bytes], Tuple[int, int]] = {}
+        self._channels: Dict[str, _Window] = {}
+        self._ids: Dict[int, _Window] = {}
+
+    def update(self, timestamp: float, arbitration_id: int, data: bytes, flags: int, channel: Optional[str] = None) -> None:
+        if flags & FLAG_ERROR:
+            return
+        key = (arbitration_id, flags, data)
+        bits = self._bits.get(key)
+        if bits is None:
+            if len(self._bits) >= self.MAX_MEMO:
+                self._bits.clear()
+            bits = self._bits[key] = frame_bits(arbitration_id, data, flags)
+        config = self.config
+        nominal, data_phase = bits
+        busy = nominal / config.bitrate
+        if data_phase:
+            busy += data_phase / (config.data_bitrate or config.bitrate)
+        bucket = int(timestamp / self._width)
+        size = len(data)
+        channel = channel or config.channel
+        with self._lock:
+            window = self._channels.get(channel)
+            if window is None:
+                window = self._channels[channel] = _Window(self.buckets)
+            window.add(bucket, size, busy)
+            window = self._ids.get(arbitration_id)
+            if window is None:
+                window = self._ids[arbitration_id] = _Window(self.buckets)
+            window.add(bucket, size, busy)
+
+    def snapshot(self, now: Optional[float] = None) -> BusLoadSnapshot:
+        now = time.time() if now is None else now
+        now_bucket = int(now / self._width)
+        snapshot = BusLoadSnapshot(timestamp=now, window=self.window)
+        with self._lock:
+            for channel, window in self._channels.items():
+                frames, _, busy = window.sums(now_bucket)
+                snapshot.loads[channel] = busy / self.window
+                snapshot.frames_per_s[channel] = frames / self.window
+            for arbitration_id, window in self._ids.items():
+                frames, size, busy = window.sums(now_bucket)
+                if frames:
+                    snapshot.ids.append(
+                        IdRate(arbitration_id, frames / self.window, size / self.window, busy / self.window)
+                    )
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._channels.clear()
+            self._ids.clear()
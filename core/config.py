@@ -4,7 +4,7 @@ from __future__ import annotations
 import json
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 
 CONFIG_DIR = Path.home() / ".jadoe"
@@ -19,6 +19,17 @@ class BusConfig:
     interface: str = "virtual"
     bitrate: int = 500000
     fd: bool = False
+    # CAN FD data-phase bitrate; ``None`` leaves the interface default.
+    data_bitrate: Optional[int] = None
+    # Sample points in percent. Only applied together with ``f_clock`` (the
+    # controller clock in Hz), from which python-can derives the bit timing.
+    sample_point: Optional[float] = None
+    data_sample_point: Optional[float] = None
+    f_clock: Optional[int] = None
+    # Acceptance filters handed to python-can as ``can_filters`` so the driver
+    # or kernel drops unwanted frames: ``{"can_id": int, "can_mask": int,
+    # "extended": bool}`` (``extended`` is optional).
+    filters: List[Dict[str, Any]] = field(default_factory=list)
 
     def to_kwargs(self) -> Dict[str, Any]:
         """Translate configuration to python-can Bus parameters."""
@@ -29,8 +40,47 @@ class BusConfig:
         }
         if self.fd:
             kwargs["fd"] = True
+            if self.data_bitrate:
+                kwargs["data_bitrate"] = self.data_bitrate
+        if self.f_clock and self.sample_point:
+            kwargs["timing"] = self.bit_timing()
+        if self.filters:
+            kwargs["can_filters"] = [dict(item) for item in self.filters]
         return kwargs
 
+    def bit_timing(self) -> Any:
+        """``can.BitTiming`` / ``can.BitTimingFd`` for the configured sample points."""
+        import can
+
+        if not (self.f_clock and self.sample_point):
+            raise ValueError("Bit timing needs f_clock and sample_point")
+        if self.fd:
+            return can.BitTimingFd.from_sample_point(
+                f_clock=self.f_clock,
+                nom_bitrate=self.bitrate,
+                nom_sample_point=self.sample_point,
+                data_bitrate=self.data_bitrate or self.bitrate,
+                data_sample_point=self.data_sample_point or self.sample_point,
+            )
+        return can.BitTiming.from_sample_point(self.f_clock, self.bitrate, self.sample_point)
+
+
+@dataclass
+class LogConfig:
+    """Session log output options."""
+
+    compression: Optional[str] = None  # None, "zlib", "lzma" or "zstd"
+    rotate_mb: Optional[float] = None
+    rotate_minutes: Optional[float] = None
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """Translate configuration to ``SessionLogger`` parameters."""
+        return {
+            "compression": self.compression,
+            "rotate_bytes": int(self.rotate_mb * 2**20) if self.rotate_mb else None,
+            "rotate_seconds": self.rotate_minutes * 60.0 if self.rotate_minutes else None,
+        }
+
 
 @dataclass
 class WorkspaceSettings:
@@ -40,6 +90,13 @@ class WorkspaceSettings:
     bus: BusConfig = field(default_factory=BusConfig)
     layout_state: Optional[str] = None
     tx_workspace: Dict[str, Any] = field(default_factory=dict)
+    logging: LogConfig = field(default_factory=LogConfig)
+    # Worker processes for the sharded decode stage; 0 decodes on the listener thread.
+    decode_workers: int = 0
+    # Frame-ID masks per DBC message name, for messages whose IDs carry varying
+    # bits (node addresses, counters). J1939 parameter groups are masked by PGN
+    # without an entry here.
+    id_masks: Dict[str, int] = field(default_factory=dict)
 
     @classmethod
     def load(cls, path: Path = CONFIG_FILE) -> "WorkspaceSettings":
@@ -52,6 +109,12 @@ class WorkspaceSettings:
             bus=BusConfig(**bus_data),
             layout_state=data.get("layout_state"),
             tx_workspace=data.get("tx_workspace", {}),
+            logging=LogConfig(**data.get("logging", {})),
+            decode_workers=data.get("decode_workers", 0),
+            id_masks={
+                name: int(mask, 0) if isinstance(mask, str) else mask
+                for name, mask in data.get("id_masks", {}).items()
+            },
         )
 
     def save(self, path: Path = CONFIG_FILE) -> None:
@@ -1,32 +1,114 @@
 """DBC management and decoding utilities."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import cantools
 from cantools.database import Database
 from cantools.database.can import Message, Signal
 
+from core import j1939
+
 
 class DbcLoadError(Exception):
     """Raised when DBC parsing fails."""
 
 
+def is_j1939(message: Message) -> bool:
+    return message.protocol == "j1939" and message.is_extended_frame
+
+
 @dataclass
 class LoadedDbc:
-    """Represents a loaded DBC with convenient lookups."""
+    """Represents a loaded DBC with convenient lookups.
+
+    Frame IDs are matched exactly unless the message has an ID mask, either
+    from ``id_masks`` (message name to mask) or, for J1939 parameter groups,
+    the PGN bits of its PDU format. Masked IDs are resolved once by trying
+    each distinct mask, most specific first, and memoised, so every later
+    lookup is a single dict access.
+
+    Every signal also gets a dense ID: the signals of each message occupy a
+    contiguous range, in definition order, so per-signal state can live in
+    flat arrays (see :meth:`signal_layout`).
+    """
 
     path: Path
     database: Database
+    id_masks: Dict[str, int] = field(default_factory=dict)
+
+    # Bounds the memo of resolved masked IDs; J1939 buses see a few hundred.
+    MAX_RESOLVED = 65536
+
+    def __post_init__(self) -> None:
+        self._exact: Dict[int, Message] = {}
+        self._by_pgn: Dict[int, Message] = {}
+        groups: Dict[int, Dict[int, Message]] = {}
+        for message in self.database.messages:
+            mask = self.id_masks.get(message.name)
+            if is_j1939(message):
+                self._by_pgn[j1939.pgn_of(message.frame_id)] = message
+                if mask is None:
+                    mask = j1939.id_mask(message.frame_id)
+            if mask is None:
+                self._exact[message.frame_id] = message
+            else:
+                groups.setdefault(mask, {})[message.frame_id & mask] = message
+        self._masked: List[Tuple[int, Dict[int, Message]]] = sorted(
+            groups.items(), key=lambda item: -bin(item[0]).count("1")
+        )
+        self._resolved: Dict[int, Optional[Message]] = {}
+        self._signal_layout: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self.signal_keys: List[Tuple[str, str]] = []
+        for message in self.database.messages:
+            names = tuple(signal.name for signal in message.signals)
+            self._signal_layout[message.name] = (len(self.signal_keys), names)
+            self.signal_keys.extend((message.name, name) for name in names)
 
     @property
     def messages(self) -> List[Message]:
         return list(self.database.messages)
 
+    @property
+    def has_j1939(self) -> bool:
+        return bool(self._by_pgn)
+
     def message_by_id(self, can_id: int) -> Optional[Message]:
-        return self.database.get_message_by_frame_id(can_id)
+        message = self._exact.get(can_id)
+        if message is not None or not self._masked:
+            return message
+        try:
+            return self._resolved[can_id]
+        except KeyError:
+            pass
+        for mask, table in self._masked:
+            message = table.get(can_id & mask)
+            if message is not None:
+                break
+        if len(self._resolved) < self.MAX_RESOLVED:
+            self._resolved[can_id] = message
+        return message
+
+    @property
+    def signal_count(self) -> int:
+        return len(self.signal_keys)
+
+    def signal_layout(self, message_name: str) -> Optional[Tuple[int, Tuple[str, ...]]]:
+        """First signal ID and signal names of ``message_name``; its IDs are ``first .. first + len(names) - 1``."""
+        return self._signal_layout.get(message_name)
+
+    def message_by_pgn(self, pgn: int) -> Optional[Message]:
+        return self._by_pgn.get(pgn)
+
+    def id_matcher(self, message: Message) -> Callable[[int], bool]:
+        """Predicate telling whether a frame ID belongs to ``message``."""
+        frame_id = message.frame_id
+        if self._exact.get(frame_id) is message:
+            return lambda can_id: can_id == frame_id
+        return lambda can_id: self.message_by_id(can_id) is message
 
     def decode(self, can_id: int, data: bytes) -> Dict[str, float]:
         message = self.message_by_id(can_id)
@@ -41,6 +123,96 @@ class LoadedDbc:
         return message.encode(signals)
 
 
+def message_signature(message: Message) -> Tuple:
+    """Everything about ``message`` that affects decoding or encoding; comments and timing are left out."""
+    return (
+        message.name,
+        message.length,
+        message.is_extended_frame,
+        message.is_fd,
+        tuple(
+            (
+                signal.name,
+                signal.start,
+                signal.length,
+                signal.byte_order,
+                signal.is_signed,
+                signal.is_float,
+                signal.scale,
+                signal.offset,
+                signal.minimum,
+                signal.maximum,
+                signal.unit,
+                tuple(sorted((int(key), str(value)) for key, value in (signal.choices or {}).items())),
+                signal.is_multiplexer,
+                tuple(signal.multiplexer_ids or ()),
+                signal.multiplexer_signal,
+            )
+            for signal in message.signals
+        ),
+    )
+
+
+@dataclass
+class DbcDiff:
+    """Frame IDs whose message definitions differ between two loads of a DBC."""
+
+    added: Set[int] = field(default_factory=set)
+    removed: Set[int] = field(default_factory=set)
+    changed: Set[int] = field(default_factory=set)
+
+    @property
+    def affected(self) -> Set[int]:
+        return self.added | self.removed | self.changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def describe(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+def diff_dbc(old: Optional[LoadedDbc], new: LoadedDbc) -> DbcDiff:
+    before = {message.frame_id: message_signature(message) for message in old.messages} if old else {}
+    after = {message.frame_id: message_signature(message) for message in new.messages}
+    return DbcDiff(
+        added=set(after) - set(before),
+        removed=set(before) - set(after),
+        changed={frame_id for frame_id in set(before) & set(after) if before[frame_id] != after[frame_id]},
+    )
+
+
+class DbcWatcher:
+    """Detects edits of a DBC file by polling its modification time and size.
+
+    A change is reported once the file has looked the same for two polls in
+    a row, so a reload never parses a half-written file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._seen = self._stat()
+        self._pending: Optional[Tuple[int, int]] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> bool:
+        current = self._stat()
+        if current == self._seen or current is None:
+            self._pending = None
+            return False
+        if current != self._pending:
+            self._pending = current
+            return False
+        self._seen, self._pending = current, None
+        return True
+
+
 class DbcManager:
     """Wrapper around cantools to manage DBC lifecycle."""
 
@@ -51,13 +223,31 @@ class DbcManager:
     def loaded(self) -> Optional[LoadedDbc]:
         return self._loaded
 
-    def load(self, path: Path) -> LoadedDbc:
+    def load(self, path: Path, id_masks: Optional[Dict[str, int]] = None) -> LoadedDbc:
+        self._loaded = self._parse(path, id_masks or {})
+        return self._loaded
+
+    @staticmethod
+    def _parse(path: Path, id_masks: Dict[str, int]) -> LoadedDbc:
         try:
             db = cantools.database.load_file(path)
         except Exception as exc:  # noqa: BLE001 - propagate as typed exception
             raise DbcLoadError(str(exc)) from exc
-        self._loaded = LoadedDbc(path=path, database=db)
-        return self._loaded
+        return LoadedDbc(path=path, database=db, id_masks=id_masks)
+
+    def reload(self) -> Tuple[LoadedDbc, DbcDiff]:
+        """Parse the loaded file again and swap it in; returns the new DBC and what changed.
+
+        The swap is a single reference assignment, so decoders reading
+        :attr:`loaded` on other threads see either the old or the new tables.
+        If parsing fails, the old DBC stays loaded.
+        """
+        old = self._loaded
+        if old is None:
+            raise DbcLoadError("No DBC loaded")
+        new = self._parse(old.path, old.id_masks)
+        self._loaded = new
+        return new, diff_dbc(old, new)
 
     def unload(self) -> None:
         self._loaded = None
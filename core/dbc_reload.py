@@ -0,0 +1,175 @@
+"""Background re-decode of the RX history after a DBC hot reload."""
+from __future__ import annotations
+
+import bisect
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from cantools.database.can import Message
+
+from core.dbc_manager import DbcDiff, LoadedDbc
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistory, SignalHistoryStore
+
+
+def affected_ids(ids: Iterable[int], diff: DbcDiff, *dbcs: Optional[LoadedDbc]) -> Set[int]:
+    """``diff.affected`` plus the IDs among ``ids`` that any of ``dbcs`` resolves to an affected message.
+
+    With ID masks, e.g. J1939 parameter groups, the frame IDs on the bus
+    differ from the ones in the DBC definitions.
+    """
+    affected = diff.affected
+    result = set(affected)
+    for loaded in dbcs:
+        if loaded is None:
+            continue
+        for arbitration_id in ids:
+            message = loaded.message_by_id(arbitration_id)
+            if message is not None and message.frame_id in affected:
+                result.add(arbitration_id)
+    return result
+
+
+class HistoryRedecoder:
+    """Brings the buffered history in line with a reloaded DBC, one batch at a time.
+
+    Only ``arbitration_ids`` (by default ``diff.affected``) are visited. Their resolved hot entries
+    are invalidated, so views decode them again with the new tables, while
+    cold entries are rebuilt from their records anyway. Watched signals of
+    affected messages are rebuilt from the buffered payloads into fresh
+    histories. Each one is swapped into the store once it has caught up
+    with live capture. The work runs on a background thread and yields
+    between batches, so capture and the GUI keep running.
+    """
+
+    def __init__(
+        self,
+        history: RxHistory,
+        loaded: LoadedDbc,
+        diff: DbcDiff,
+        signal_history: Optional[SignalHistoryStore] = None,
+        batch: int = 4096,
+        on_done: Optional[Callable[["HistoryRedecoder"], None]] = None,
+        arbitration_ids: Optional[Set[int]] = None,
+    ) -> None:
+        self.history = history
+        self.loaded = loaded
+        self.diff = diff
+        self.arbitration_ids = diff.affected if arbitration_ids is None else arbitration_ids
+        self.signal_history = signal_history
+        self.batch = batch
+        self.on_done = on_done
+        self.invalidated = 0
+        self.redecoded = 0
+        self.done = threading.Event()
+        self._cancelled = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="dbc-redecode", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def run(self) -> None:
+        try:
+            groups: Dict[str, Tuple[Message, List[int]]] = {}
+            for arbitration_id in sorted(self.arbitration_ids):
+                if self._cancelled:
+                    return
+                self._invalidate(arbitration_id)
+                message = self.loaded.message_by_id(arbitration_id)
+                if message is not None:
+                    groups.setdefault(message.name, (message, []))[1].append(arbitration_id)
+            for message, arbitration_ids in groups.values():
+                if self._cancelled:
+                    return
+                self._rebuild_signals(message, arbitration_ids)
+        finally:
+            self.done.set()
+            if self.on_done is not None and not self._cancelled:
+                self.on_done(self)
+
+    def _batches(self, positions: Sequence[int]) -> Iterator[Sequence[int]]:
+        for index in range(0, len(positions), self.batch):
+            if self._cancelled:
+                return
+            yield positions[index : index + self.batch]
+            time.sleep(0)  # let capture and the GUI run between batches
+
+    def _invalidate(self, arbitration_id: int) -> None:
+        history = self.history
+        positions = history.positions(arbitration_id)
+        hot_start = max(history.total - history.hot_capacity, history.first)
+        for seqs in self._batches(positions[bisect.bisect_left(positions, hot_start) :]):
+            for seq in seqs:
+                entry = history.get(seq)
+                if entry is not None and entry.is_resolved:
+                    entry.invalidate()
+                    self.invalidated += 1
+
+    def _positions(self, arbitration_ids: List[int], start: int) -> List[int]:
+        """Sequence numbers of ``arbitration_ids`` from ``start`` on, in order."""
+        runs = []
+        for arbitration_id in arbitration_ids:
+            positions = self.history.positions(arbitration_id)
+            runs.append(positions[bisect.bisect_left(positions, start) :])
+        return list(heapq.merge(*runs)) if len(runs) > 1 else list(runs[0])
+
+    def _rebuild_signals(self, message: Message, arbitration_ids: List[int]) -> None:
+        store = self.signal_history
+        if store is None:
+            return
+        names = [signal for watched, signal in store.watched if watched == message.name]
+        if not names:
+            return
+        rebuilt = {name: store.new_history() for name in names}
+        history = self.history
+        memo: Dict[bytes, Dict[str, float]] = {}
+        start = history.first
+        # Catch up with live capture, swap, then append what arrived in between.
+        for swapped in (False, True):
+            positions = self._positions(arbitration_ids, start)
+            for seqs in self._batches(positions):
+                self._append(history, message, seqs, rebuilt, memo, swapped)
+            if self._cancelled:
+                return
+            if positions:
+                start = positions[-1] + 1
+            if not swapped:
+                for name, fresh in rebuilt.items():
+                    store.replace(message.name, name, fresh)
+
+    def _append(
+        self,
+        history: RxHistory,
+        message: Message,
+        seqs: Sequence[int],
+        rebuilt: Dict[str, SignalHistory],
+        memo: Dict[bytes, Dict[str, float]],
+        only_newer: bool,
+    ) -> None:
+        for timestamp, data in history.frames(seqs):
+            decoded = memo.get(data)
+            if decoded is None:
+                try:
+                    decoded = message.decode(data, decode_choices=False)
+                except Exception:  # noqa: BLE001 - frames that no longer fit the definition are skipped
+                    decoded = {}
+                if len(memo) < 65536:
+                    memo[data] = decoded
+            for name, target in rebuilt.items():
+                value = decoded.get(name)
+                if value is None:
+                    continue
+                if only_newer:
+                    last = target.last()
+                    if last is not None and timestamp <= last[0]:
+                        continue
+                target.append(timestamp, float(value))
+            self.redecoded += 1
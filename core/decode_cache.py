@@ -0,0 +1,110 @@
+"""Memoised decode and hex formatting keyed by arbitration ID and payload."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+from core.dbc_manager import LoadedDbc
+
+
+@dataclass(frozen=True)
+class DecodedFrame:
+    """Decode result shared by every frame with the same ID and payload.
+
+    The ``decoded`` dict is shared between cache hits and must be treated as
+    read-only.
+    """
+
+    message_name: Optional[str]
+    data_hex: str
+    decoded: Dict[str, float] = field(default_factory=dict)
+
+
+def decode_frame(loaded: Optional[LoadedDbc], arbitration_id: int, data: bytes) -> DecodedFrame:
+    """Decode and format one frame without caching.
+
+    A payload that does not fit its message (too short, bad multiplexer
+    value) keeps the message name but decodes to no signals.
+    """
+    definition = loaded.message_by_id(arbitration_id) if loaded else None
+    decoded: Dict[str, float] = {}
+    if loaded and definition:
+        try:
+            decoded = loaded.decode(arbitration_id, data)
+        except Exception:  # noqa: BLE001 - a malformed frame must not stop the receive path
+            decoded = {}
+    return DecodedFrame(
+        message_name=definition.name if definition else None,
+        data_hex=data.hex(" ").upper(),
+        decoded=decoded,
+    )
+
+
+class DecodeCache:
+    """Per-ID last-payload cache backed by a bounded LRU of ``(ID, payload)``.
+
+    A frame repeating the previous payload of its ID costs one dict lookup
+    and a bytes comparison. Frames that alternate between a few payloads are
+    served from the LRU. The cache clears itself when a different
+    :class:`LoadedDbc` is passed in.
+    """
+
+    def __init__(self, lru_size: int = 4096) -> None:
+        self.lru_size = lru_size
+        self._last: Dict[int, Tuple[bytes, DecodedFrame]] = {}
+        self._lru: "OrderedDict[Tuple[int, bytes], DecodedFrame]" = OrderedDict()
+        self._dbc: Optional[LoadedDbc] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def lookup(self, loaded: Optional[LoadedDbc], arbitration_id: int, data: bytes) -> DecodedFrame:
+        with self._lock:
+            if loaded is not self._dbc:
+                self._clear()
+                self._dbc = loaded
+            last = self._last.get(arbitration_id)
+            if last is not None and last[0] == data:
+                self.hits += 1
+                return last[1]
+            key = (arbitration_id, data)
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                result = decode_frame(loaded, arbitration_id, data)
+                self._lru[key] = result
+                if len(self._lru) > self.lru_size:
+                    self._lru.popitem(last=False)
+            self._last[arbitration_id] = (data, result)
+            return result
+
+    def rebase(self, loaded: Optional[LoadedDbc], arbitration_ids: Set[int]) -> None:
+        """Switch to ``loaded`` and keep the cached results of every ID not in ``arbitration_ids``."""
+        with self._lock:
+            self._dbc = loaded
+            for arbitration_id in arbitration_ids:
+                self._last.pop(arbitration_id, None)
+            for key in [key for key in self._lru if key[0] in arbitration_ids]:
+                del self._lru[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def _clear(self) -> None:
+        self._last.clear()
+        self._lru.clear()
@@ -0,0 +1,253 @@
+"""Sharded multi-process decode stage.
+
+Frames are sharded by arbitration ID across worker processes, each of which
+loads its own copy of the DBC and keeps its own :class:`DecodeCache`. All
+frames of one ID go to the same worker, so per-ID order is preserved. A merge
+thread in the parent collects the results and hands them to listeners in
+``(timestamp, submission order)`` order.
+
+Each worker returns its results over its own pipe, so a worker that dies
+shows up as end-of-file on that pipe without blocking the others. It is
+restarted and given its unfinished batches again. After :data:`MAX_RESTARTS`
+restarts of one shard, that shard's frames are delivered undecoded instead,
+so one broken worker never stalls delivery for every ID.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.decode_cache import DecodeCache, DecodedFrame, decode_frame
+
+# (timestamp, arbitration_id, frame, tag)
+DecodedListener = Callable[[float, int, DecodedFrame, Any], None]
+# (timestamp, submission seq, arbitration_id, tag)
+_Meta = Tuple[float, int, int, Any]
+_Frames = List[Tuple[int, bytes]]
+
+MAX_RESTARTS = 3
+
+
+def _decode_worker(dbc_path: Optional[str], id_masks: Dict[str, int], inbox: Any, results: Any) -> None:
+    from core.dbc_manager import DbcManager
+
+    loaded = DbcManager().load(Path(dbc_path), id_masks) if dbc_path else None
+    cache = DecodeCache()
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        results.send([cache.lookup(loaded, arbitration_id, data) for arbitration_id, data in batch])
+
+
+def _undecoded(batch: _Frames) -> List[DecodedFrame]:
+    return [decode_frame(None, arbitration_id, data) for arbitration_id, data in batch]
+
+
+class ShardedDecoder:
+    """Decodes frames in ``workers`` processes and delivers them in timestamp order.
+
+    :meth:`submit` only appends to the shard's pending batch; full batches,
+    and partial ones after ``linger`` seconds, are sent to the workers. A
+    result is delivered once no other shard still has older work in flight.
+    Worker processes are spawned rather than forked, so the pool can be
+    started from a process that already runs Qt or listener threads.
+    """
+
+    def __init__(
+        self,
+        dbc_path: Optional[Path],
+        workers: Optional[int] = None,
+        batch: int = 256,
+        linger: float = 0.02,
+        id_masks: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.dbc_path = dbc_path
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch = batch
+        self.linger = linger
+        self.delivered = 0
+        self.restarts = 0
+        self._id_masks = dict(id_masks or {})
+        self._listeners: List[DecodedListener] = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._seq = 0
+        self._pending: List[_Frames] = [[] for _ in range(self.workers)]
+        self._pending_meta: List[List[_Meta]] = [[] for _ in range(self.workers)]
+        # When each shard's pending batch got its first frame (monotonic seconds).
+        self._pending_since = [0.0] * self.workers
+        # Batches sent to each worker and not yet answered, oldest first.
+        self._in_flight: List[Deque[Tuple[List[_Meta], _Frames]]] = [deque() for _ in range(self.workers)]
+        self._ready: List[Deque[Tuple[_Meta, DecodedFrame]]] = [deque() for _ in range(self.workers)]
+        self._restarts = [0] * self.workers
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes: List[Any] = [None] * self.workers
+        self._results: List[Any] = [None] * self.workers
+        self._processes: List[Any] = [None] * self.workers
+        for shard in range(self.workers):
+            self._spawn(shard)
+        self._running = True
+        self._merger = threading.Thread(target=self._merge_loop, name="decode-merge", daemon=True)
+        self._merger.start()
+
+    def _spawn(self, shard: int) -> None:
+        """Start the worker of ``shard`` with a fresh inbox and result pipe."""
+        inbox = self._context.Queue()
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_decode_worker,
+            args=(str(self.dbc_path) if self.dbc_path else None, self._id_masks, inbox, writer),
+            name=f"decode-{shard}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker may hold the write end, so its exit reads as end-of-file here.
+        writer.close()
+        self._inboxes[shard], self._results[shard], self._processes[shard] = inbox, reader, process
+
+    def add_listener(self, listener: DecodedListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: DecodedListener) -> None:
+        self._listeners.remove(listener)
+
+    @property
+    def outstanding(self) -> int:
+        """Frames submitted but not yet delivered."""
+        return self._seq - self.delivered
+
+    def submit(self, timestamp: float, arbitration_id: int, data: bytes, tag: Any = None) -> None:
+        shard = arbitration_id % self.workers
+        with self._lock:
+            pending = self._pending[shard]
+            if not pending:
+                self._pending_since[shard] = time.monotonic()
+            pending.append((arbitration_id, data))
+            self._pending_meta[shard].append((timestamp, self._seq, arbitration_id, tag))
+            self._seq += 1
+            if len(pending) >= self.batch:
+                self._send(shard)
+
+    def _send(self, shard: int) -> None:
+        metas, batch = self._pending_meta[shard], self._pending[shard]
+        self._pending[shard] = []
+        self._pending_meta[shard] = []
+        if self._restarts[shard] > MAX_RESTARTS:
+            self._ready[shard].extend(zip(metas, _undecoded(batch)))
+            return
+        self._in_flight[shard].append((metas, batch))
+        self._inboxes[shard].put(batch)
+
+    def _restart(self, shard: int) -> None:
+        """Replace the dead worker of ``shard`` and resend its unanswered batches; call under the lock."""
+        self._results[shard].close()
+        self._processes[shard].join(timeout=1)
+        self._restarts[shard] += 1
+        self.restarts += 1
+        in_flight = self._in_flight[shard]
+        if self._restarts[shard] > MAX_RESTARTS:
+            self._results[shard] = None
+            for metas, batch in in_flight:
+                self._ready[shard].extend(zip(metas, _undecoded(batch)))
+            in_flight.clear()
+            return
+        self._spawn(shard)
+        for _, batch in in_flight:
+            self._inboxes[shard].put(batch)
+
+    def flush(self) -> None:
+        """Send every partial batch to its worker."""
+        with self._lock:
+            for shard, pending in enumerate(self._pending):
+                if pending:
+                    self._send(shard)
+
+    def _flush_due(self, now: float) -> float:
+        """Send partial batches older than ``linger``; return when the next one falls due. Call under the lock."""
+        due = now + self.linger
+        for shard, pending in enumerate(self._pending):
+            if pending:
+                deadline = self._pending_since[shard] + self.linger
+                if deadline <= now:
+                    self._send(shard)
+                else:
+                    due = min(due, deadline)
+        return due
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Flush and wait until every submitted frame has been delivered."""
+        self.flush()
+        with self._idle:
+            return self._idle.wait_for(lambda: self.delivered == self._seq or not self._running, timeout)
+
+    def _merge_loop(self) -> None:
+        due = time.monotonic() + self.linger
+        while self._running:
+            with self._lock:
+                readers = {reader: shard for shard, reader in enumerate(self._results) if reader is not None}
+            answered = wait(list(readers), timeout=max(0.0, due - time.monotonic()))
+            with self._lock:
+                if not self._running:
+                    break
+                # Checked on every pass, so a quiet shard's batch goes out even while others are busy.
+                due = self._flush_due(time.monotonic())
+                for reader in answered:
+                    shard = readers[reader]
+                    try:
+                        frames = reader.recv()
+                    except (EOFError, OSError):
+                        self._restart(shard)
+                        continue
+                    self._ready[shard].extend(zip(self._in_flight[shard].popleft()[0], frames))
+                ready = self._collect()
+            if not ready:
+                continue
+            for (timestamp, _, arbitration_id, tag), frame in ready:
+                for listener in self._listeners:
+                    listener(timestamp, arbitration_id, frame, tag)
+            with self._idle:
+                self.delivered += len(ready)
+                self._idle.notify_all()
+
+    def _collect(self) -> List[Tuple[_Meta, DecodedFrame]]:
+        """Pop results in order while no shard with unfinished work could hold an older one."""
+        out: List[Tuple[_Meta, DecodedFrame]] = []
+        ready = self._ready
+        while True:
+            best = None
+            for shard, items in enumerate(ready):
+                if items:
+                    if best is None or items[0][0][:2] < ready[best][0][0][:2]:
+                        best = shard
+                elif self._in_flight[shard] or self._pending[shard]:
+                    return out
+            if best is None:
+                return out
+            out.append(ready[best].popleft())
+
+    def close(self) -> None:
+        """Stop the workers; results not yet delivered are discarded."""
+        with self._lock:
+            if not self._running:
+                return
+            # Set under the lock so the merge thread never restarts a worker that is being stopped.
+            self._running = False
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self._merger.join(timeout=1)
+        for reader in self._results:
+            if reader is not None:
+                reader.close()
+        with self._idle:
+            self._idle.notify_all()
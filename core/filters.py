@@ -0,0 +1,302 @@
+"""Software frame filter expressions compiled to predicate functions.
+
+Grammar (keywords are case-insensitive)::
+
+    expr      := term ("or" term)*
+    term      := factor ("and" factor)*
+    factor    := "not" factor | "(" expr ")" | atom
+    atom      := ID                      exact arbitration ID, e.g. 0x100
+               | ID "-" ID               inclusive ID range, e.g. 0x100-0x1FF
+               | ID "/" MASK             (frame_id & MASK) == (ID & MASK)
+               | MessageName             every frame of a DBC message
+               | Message.Signal OP NUMBER  with OP in < <= > >= == !=
+               | "data" "~" "PATTERN"    hex bytes found anywhere in the payload,
+                                         "??" matches any byte, e.g. "DE AD ?? EF"
+
+Example: ``0x100-0x1FF and not 0x1F0 or EngineData.Rpm > 3000``.
+
+Expressions are parsed once into nested closures. Expressions built only from
+ID atoms and message names are additionally memoised per arbitration ID, so
+evaluating them costs one dict lookup per frame. Every expression also gets
+an ID-level over-approximation (:meth:`CompiledFilter.may_match_id`) that
+index-backed searches use to skip IDs that can never match.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.dbc_manager import LoadedDbc
+
+Predicate = Callable[[int, bytes], bool]
+IdHint = Optional[Callable[[int], bool]]
+# (predicate, id_only, id_hint); an id_hint of None means any ID may match.
+Parsed = Tuple[Predicate, bool, IdHint]
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<num>0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<str>\"[^\"]*\")"
+    r"|(?P<op><=|>=|==|!=|<|>|\(|\)|-|/|\.|~)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*))"
+)
+_COMPARE = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class FilterError(ValueError):
+    """Raised when a filter expression cannot be parsed or resolved."""
+
+
+@dataclass
+class CompiledFilter:
+    """A parsed filter expression; call it with ``(arbitration_id, data)``."""
+
+    expression: str
+    predicate: Predicate
+    id_only: bool
+    id_hint: IdHint = None
+    _cache: Dict[int, bool] = field(default_factory=dict, repr=False)
+
+    def __call__(self, arbitration_id: int, data: bytes) -> bool:
+        if not self.id_only:
+            return self.predicate(arbitration_id, data)
+        result = self._cache.get(arbitration_id)
+        if result is None:
+            result = self._cache[arbitration_id] = self.predicate(arbitration_id, data)
+        return result
+
+    def may_match_id(self, arbitration_id: int) -> bool:
+        """False only if no frame with ``arbitration_id`` can match."""
+        if self.id_only:
+            return self(arbitration_id, b"")
+        return self.id_hint is None or self.id_hint(arbitration_id)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    position = 0
+    text = expression.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise FilterError(f"Unexpected character at {position}: {text[position:]!r}")
+        kind = match.lastgroup
+        assert kind
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _number(text: str) -> float:
+    return float(int(text, 16)) if text.lower().startswith("0x") else float(text)
+
+
+def _frame_id(text: str) -> int:
+    try:
+        return int(text, 0)
+    except ValueError as exc:
+        raise FilterError(f"Invalid arbitration ID {text!r}") from exc
+
+
+def _payload_pattern(text: str) -> Callable[[bytes], bool]:
+    parts = text.replace(" ", "")
+    if not parts or len(parts) % 2:
+        raise FilterError(f"Invalid byte pattern {text!r}")
+    pattern = b""
+    for index in range(0, len(parts), 2):
+        pair = parts[index : index + 2]
+        if pair == "??":
+            pattern += b"."
+            continue
+        try:
+            pattern += re.escape(bytes([int(pair, 16)]))
+        except ValueError as exc:
+            raise FilterError(f"Invalid byte {pair!r} in pattern {text!r}") from exc
+    search = re.compile(pattern, re.DOTALL).search
+    return lambda data: search(data) is not None
+
+
+def _all_hints(hints: List[IdHint]) -> IdHint:
+    known = tuple(hint for hint in hints if hint is not None)
+    if not known:
+        return None
+    return lambda i: all(hint(i) for hint in known)
+
+
+def _any_hint(hints: List[IdHint]) -> IdHint:
+    if any(hint is None for hint in hints):
+        return None
+    known = tuple(hints)
+    return lambda i: any(hint(i) for hint in known)  # type: ignore[misc]
+
+
+class _Parser:
+    """Recursive-descent parser returning ``(predicate, id_only, id_hint)`` triples."""
+
+    def __init__(self, tokens: List[Tuple[str, str]], dbc: Optional[LoadedDbc]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.dbc = dbc
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise FilterError("Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def keyword(self, word: str) -> bool:
+        token = self.peek()
+        if token and token[0] == "name" and token[1].lower() == word:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, value: str) -> None:
+        kind, text = self.take()
+        if text != value:
+            raise FilterError(f"Expected {value!r}, got {text!r}")
+
+    def parse(self) -> Parsed:
+        result = self.expr()
+        if self.peek() is not None:
+            raise FilterError(f"Unexpected token {self.peek()[1]!r}")  # type: ignore[index]
+        return result
+
+    def expr(self) -> Parsed:
+        parts = [self.term()]
+        while self.keyword("or"):
+            parts.append(self.term())
+        if len(parts) == 1:
+            return parts[0]
+        predicates = tuple(p for p, _, _ in parts)
+        return (
+            (lambda i, d: any(p(i, d) for p in predicates)),
+            all(flag for _, flag, _ in parts),
+            _any_hint([hint for _, _, hint in parts]),
+        )
+
+    def term(self) -> Parsed:
+        parts = [self.factor()]
+        while self.keyword("and"):
+            parts.append(self.factor())
+        if len(parts) == 1:
+            return parts[0]
+        # Cheap ID-only checks first so signal predicates decode as rarely as possible.
+        parts.sort(key=lambda part: not part[1])
+        predicates = tuple(p for p, _, _ in parts)
+        return (
+            (lambda i, d: all(p(i, d) for p in predicates)),
+            all(flag for _, flag, _ in parts),
+            _all_hints([hint for _, _, hint in parts]),
+        )
+
+    def factor(self) -> Parsed:
+        if self.keyword("not"):
+            inner, id_only, _ = self.factor()
+            negated: Predicate = lambda i, d: not inner(i, d)  # noqa: E731
+            return negated, id_only, (lambda i: negated(i, b"")) if id_only else None
+        token = self.peek()
+        if token == ("op", "("):
+            self.take()
+            result = self.expr()
+            self.expect(")")
+            return result
+        return self.atom()
+
+    def atom(self) -> Parsed:
+        kind, text = self.take()
+        if kind == "num":
+            first = _frame_id(text)
+            token = self.peek()
+            if token == ("op", "-"):
+                self.take()
+                last = _frame_id(self.take()[1])
+                return (lambda i, d: first <= i <= last), True, (lambda i: first <= i <= last)
+            if token == ("op", "/"):
+                self.take()
+                mask = _frame_id(self.take()[1])
+                expected = first & mask
+                return (lambda i, d: (i & mask) == expected), True, (lambda i: (i & mask) == expected)
+            return (lambda i, d: i == first), True, (lambda i: i == first)
+        if kind == "name":
+            if text.lower() == "data" and self.peek() == ("op", "~"):
+                self.take()
+                kind, pattern = self.take()
+                if kind != "str":
+                    raise FilterError(f"Expected a quoted byte pattern after data ~, got {pattern!r}")
+                matches = _payload_pattern(pattern.strip('"'))
+                return (lambda i, d: matches(d)), False, None
+            if self.peek() == ("op", "."):
+                self.take()
+                return self.signal_predicate(text, self.take()[1])
+            matches_id = self.id_matcher(self.message(text))
+            return (lambda i, d: matches_id(i)), True, matches_id
+        raise FilterError(f"Unexpected token {text!r}")
+
+    def message(self, name: str):
+        if not self.dbc:
+            raise FilterError(f"Message {name!r} needs a loaded DBC")
+        try:
+            return self.dbc.database.get_message_by_name(name)
+        except KeyError as exc:
+            raise FilterError(f"Unknown message {name!r}") from exc
+
+    def id_matcher(self, message) -> Callable[[int], bool]:
+        assert self.dbc
+        return self.dbc.id_matcher(message)
+
+    def signal_predicate(self, message_name: str, signal_name: str) -> Parsed:
+        message = self.message(message_name)
+        if signal_name not in {signal.name for signal in message.signals}:
+            raise FilterError(f"Unknown signal {message_name}.{signal_name}")
+        kind, op = self.take()
+        compare = _COMPARE.get(op)
+        if kind != "op" or compare is None:
+            raise FilterError(f"Expected comparison after {message_name}.{signal_name}, got {op!r}")
+        sign = 1.0
+        if self.peek() == ("op", "-"):
+            self.take()
+            sign = -1.0
+        kind, text = self.take()
+        if kind != "num":
+            raise FilterError(f"Expected a number, got {text!r}")
+        threshold = sign * _number(text)
+        matches_id = self.id_matcher(message)
+        decode = message.decode
+
+        def predicate(arbitration_id: int, data: bytes) -> bool:
+            if not matches_id(arbitration_id):
+                return False
+            try:
+                value = decode(data, decode_choices=False)[signal_name]
+            except Exception:  # noqa: BLE001 - malformed payloads never match
+                return False
+            return compare(value, threshold)
+
+        return predicate, False, matches_id
+
+
+def compile_filter(expression: str, dbc: Optional[LoadedDbc] = None) -> CompiledFilter:
+    """Parse ``expression`` once into a :class:`CompiledFilter`.
+
+    Raises:
+        FilterError: If the expression is malformed or names unknown messages
+            or signals.
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise FilterError("Empty filter expression")
+    predicate, id_only, id_hint = _Parser(tokens, dbc).parse()
+    return CompiledFilter(expression=expression, predicate=predicate, id_only=id_only, id_hint=id_hint)
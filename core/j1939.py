@@ -0,0 +1,165 @@
+"""J1939 identifier helpers and transport-protocol (BAM/CMDT) reassembly.
+
+A 29-bit J1939 identifier is ``priority(3) | EDP(1) | DP(1) | PF(8) | PS(8) | SA(8)``.
+For PDU1 messages (PF < 240) PS is the destination address and not part of
+the PGN. For PDU2 messages (PF >= 240) PS is the group extension.
+
+Payloads longer than 8 bytes travel over the transport protocol. A TP.CM
+frame (BAM to the global address, or RTS/CTS between two nodes) announces
+size and PGN, and up to 255 TP.DT frames carry 7 bytes each.
+:class:`TransportReassembler` follows both kinds passively from the frames
+seen on the bus.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+# Bits of the identifier that select the message of a PDU1 or PDU2 PGN.
+PDU1_MASK = 0x03FF0000
+PDU2_MASK = 0x03FFFF00
+
+PGN_TP_CM = 0xEC00
+PGN_TP_DT = 0xEB00
+GLOBAL_ADDRESS = 0xFF
+_PF_TP_CM = PGN_TP_CM >> 8
+_PF_TP_DT = PGN_TP_DT >> 8
+
+TP_RTS = 16
+TP_CTS = 17
+TP_END_OF_MSG_ACK = 19
+TP_BAM = 32
+TP_ABORT = 255
+
+# Longest gap between packets before a session is dropped (T2 of J1939-21).
+TP_TIMEOUT = 1.25
+
+
+@dataclass(frozen=True)
+class J1939Id:
+    priority: int
+    pgn: int
+    source: int
+    destination: int
+
+
+def is_pdu1(can_id: int) -> bool:
+    return (can_id >> 16) & 0xFF < 240
+
+
+def pgn_of(can_id: int) -> int:
+    """PGN of a 29-bit identifier; the destination of PDU1 messages is dropped."""
+    pgn = (can_id >> 8) & 0x3FFFF
+    return pgn & 0x3FF00 if is_pdu1(can_id) else pgn
+
+
+def id_mask(can_id: int) -> int:
+    """Identifier bits that select the message with this ID's PGN."""
+    return PDU1_MASK if is_pdu1(can_id) else PDU2_MASK
+
+
+def parse_id(can_id: int) -> J1939Id:
+    return J1939Id(
+        priority=(can_id >> 26) & 0x7,
+        pgn=pgn_of(can_id),
+        source=can_id & 0xFF,
+        destination=(can_id >> 8) & 0xFF if is_pdu1(can_id) else GLOBAL_ADDRESS,
+    )
+
+
+def make_id(pgn: int, source: int, priority: int = 6, destination: int = GLOBAL_ADDRESS) -> int:
+    if (pgn >> 8) & 0xFF < 240:
+        pgn = (pgn & 0x3FF00) | destination
+    return (priority & 0x7) << 26 | (pgn & 0x3FFFF) << 8 | (source & 0xFF)
+
+
+@dataclass
+class J1939Message:
+    """A reassembled transport-protocol payload."""
+
+    timestamp: float
+    pgn: int
+    source: int
+    destination: int
+    data: bytes
+
+
+@dataclass
+class _Session:
+    pgn: int
+    size: int
+    packets: int
+    last: float
+    received: Dict[int, bytes] = field(default_factory=dict)
+
+
+class TransportReassembler:
+    """Reassembles BAM and RTS/CTS transfers from the frames seen on the bus.
+
+    Feed every received frame to :meth:`feed`. Frames that are not TP.CM or
+    TP.DT return ``None`` at the cost of one shift and two comparisons.
+    Sessions are keyed by (source, destination), so transfers from
+    different nodes interleave freely. Packets may be repeated, as they are
+    when a receiver asks for retransmission with CTS. A session that is
+    aborted, overtaken by a new announcement or idle for longer than
+    ``timeout`` is counted in :attr:`dropped`.
+    """
+
+    def __init__(self, timeout: float = TP_TIMEOUT) -> None:
+        self.timeout = timeout
+        self.completed = 0
+        self.dropped = 0
+        self._sessions: Dict[Tuple[int, int], _Session] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._sessions)
+
+    def feed(self, timestamp: float, can_id: int, data: bytes) -> Optional[J1939Message]:
+        pf = (can_id >> 16) & 0xFF
+        if pf != _PF_TP_CM and pf != _PF_TP_DT:
+            return None
+        source = can_id & 0xFF
+        destination = (can_id >> 8) & 0xFF
+        key = (source, destination)
+        if pf == _PF_TP_CM:
+            self._control(timestamp, key, data)
+            return None
+        session = self._sessions.get(key)
+        if session is None or len(data) < 2:
+            return None
+        if timestamp - session.last > self.timeout:
+            del self._sessions[key]
+            self.dropped += 1
+            return None
+        sequence = data[0]
+        if not 1 <= sequence <= session.packets:
+            return None
+        session.received[sequence] = bytes(data[1:8])
+        session.last = timestamp
+        if len(session.received) < session.packets:
+            return None
+        del self._sessions[key]
+        self.completed += 1
+        payload = b"".join(session.received[index] for index in range(1, session.packets + 1))
+        return J1939Message(timestamp, session.pgn, source, destination, payload[: session.size])
+
+    def _control(self, timestamp: float, key: Tuple[int, int], data: bytes) -> None:
+        if len(data) < 8:
+            return
+        control = data[0]
+        if control in (TP_BAM, TP_RTS):
+            if key in self._sessions:
+                self.dropped += 1
+            size = data[1] | data[2] << 8
+            packets = data[3]
+            if not 9 <= size <= 1785 or packets != (size + 6) // 7:
+                self._sessions.pop(key, None)
+                return
+            pgn = data[5] | data[6] << 8 | data[7] << 16
+            self._sessions[key] = _Session(pgn, size, packets, timestamp)
+        elif control == TP_ABORT:
+            # Aborts come from either side of the connection.
+            for session_key in (key, (key[1], key[0])):
+                if self._sessions.pop(session_key, None) is not None:
+                    self.dropped += 1
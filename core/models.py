@@ -2,39 +2,144 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
 from cantools.database.can import Message
 
+if TYPE_CHECKING:
+    from core.decode_cache import DecodedFrame
+
+FLAG_EXTENDED = 0x01
+FLAG_ERROR = 0x02
+FLAG_FD = 0x04
+FLAG_BRS = 0x08
+FLAG_ESI = 0x10
+
+
+def frame_flags(
+    is_extended_id: bool = False,
+    is_error_frame: bool = False,
+    is_fd: bool = False,
+    bitrate_switch: bool = False,
+    error_state_indicator: bool = False,
+) -> int:
+    """Pack frame attributes into the ``FLAG_*`` bit set stored with every frame."""
+    return (
+        (FLAG_EXTENDED if is_extended_id else 0)
+        | (FLAG_ERROR if is_error_frame else 0)
+        | (FLAG_FD if is_fd else 0)
+        | (FLAG_BRS if bitrate_switch else 0)
+        | (FLAG_ESI if error_state_indicator else 0)
+    )
+
+
+def flags_label(flags: int) -> str:
+    """Short frame type for display, e.g. ``"FD BRS"``."""
+    if flags & FLAG_ERROR:
+        return "ERR"
+    parts = ["FD" if flags & FLAG_FD else "CAN"]
+    if flags & FLAG_BRS:
+        parts.append("BRS")
+    if flags & FLAG_ESI:
+        parts.append("ESI")
+    if flags & FLAG_EXTENDED:
+        parts.append("EXT")
+    return " ".join(parts)
+
+Decoder = Callable[[int, bytes], "DecodedFrame"]
+
 
-@dataclass
 class RxEntry:
-    """Represents a message in the receive buffer."""
+    """Represents a message in the receive buffer.
+
+    Only the raw frame is stored. ``data_hex``, ``decoded`` and
+    ``message_name`` are produced on first access by ``decoder`` (normally
+    the pipeline's :class:`~core.decode_cache.DecodeCache`) and kept on the
+    entry. With ``__slots__`` an entry is 88 bytes on CPython 3.11, not
+    counting the payload ``bytes`` object and the timestamp float. The old
+    eager dataclass cost about 600 bytes per frame once its ``__dict__``,
+    hex string and decoded dict were included.
+    """
+
+    __slots__ = ("timestamp", "arbitration_id", "channel", "flags", "data", "_decoder", "_frame")
+
+    def __init__(
+        self,
+        timestamp: float,
+        arbitration_id: int,
+        data: bytes = b"",
+        channel: Optional[str] = None,
+        flags: int = 0,
+        decoder: Optional[Decoder] = None,
+    ) -> None:
+        self.timestamp = timestamp
+        self.arbitration_id = arbitration_id
+        self.channel = channel
+        self.flags = flags
+        self.data = data
+        self._decoder = decoder
+        self._frame: Optional["DecodedFrame"] = None
+
+    def __repr__(self) -> str:
+        return f"RxEntry(timestamp={self.timestamp!r}, arbitration_id={self.arbitration_id:#x}, data={self.data_hex!r})"
 
-    timestamp: float
-    arbitration_id: int
-    dlc: int
-    data_hex: str
-    decoded: Dict[str, float] = field(default_factory=dict)
-    message_name: Optional[str] = None
+    @property
+    def dlc(self) -> int:
+        return len(self.data)
 
+    @property
+    def is_extended_id(self) -> bool:
+        return bool(self.flags & FLAG_EXTENDED)
 
-class RxBuffer:
-    """Bounded buffer for received frames."""
+    @property
+    def is_error_frame(self) -> bool:
+        return bool(self.flags & FLAG_ERROR)
+
+    @property
+    def is_fd(self) -> bool:
+        return bool(self.flags & FLAG_FD)
+
+    @property
+    def bitrate_switch(self) -> bool:
+        return bool(self.flags & FLAG_BRS)
 
-    def __init__(self, limit: int = 2000) -> None:
-        self.limit = limit
-        self._entries: List[RxEntry] = []
+    def _resolve(self) -> "DecodedFrame":
+        frame = self._frame
+        if frame is None:
+            if self._decoder is not None:
+                frame = self._decoder(self.arbitration_id, self.data)
+            else:
+                from core.decode_cache import decode_frame
 
-    def append(self, entry: RxEntry) -> None:
-        self._entries.insert(0, entry)
-        if len(self._entries) > self.limit:
-            self._entries.pop()
+                frame = decode_frame(None, self.arbitration_id, self.data)
+            self._frame = frame
+        return frame
 
     @property
-    def entries(self) -> List[RxEntry]:
-        return list(self._entries)
+    def data_hex(self) -> str:
+        return self._resolve().data_hex
+
+    @property
+    def decoded(self) -> Dict[str, float]:
+        return self._resolve().decoded
+
+    @property
+    def message_name(self) -> Optional[str]:
+        return self._resolve().message_name
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._frame is not None
+
+    def invalidate(self) -> None:
+        """Forget the cached decode so the next access decodes against the current DBC."""
+        self._frame = None
+
+    def prime(self, frame: "DecodedFrame") -> None:
+        """Store a decode result computed elsewhere, e.g. by a decode worker."""
+        if self._frame is None:
+            self._frame = frame
 
 
 @dataclass
@@ -0,0 +1,190 @@
+"""Sampling profiler and per-stage timers for field diagnostics.
+
+:class:`SamplingProfiler` samples the Python stacks of every thread through
+``sys._current_frames()`` from a background thread. It writes them in the
+collapsed-stack format (``thread;outer;...;inner count`` per line), which
+speedscope, FlameGraph and similar tools import directly.
+
+:data:`STAGES` times the hot stages of the receive path. Timing is off until
+:meth:`StageTimers.enable` is called. While off, instrumented code pays one
+attribute check per stage::
+
+    start = STAGES.start()
+    ...
+    STAGES.stop("decode", start)
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# The sampled frames of ``threading`` internals add nothing but depth.
+_SKIP_FILES = (threading.__file__,)
+
+
+@dataclass
+class StageStat:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_ms * 1000.0 / self.count if self.count else 0.0
+
+
+class StageTimers:
+    """Thread-safe accumulators of call count, total and maximum time per stage."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StageStat] = {}
+
+    def enable(self) -> None:
+        with self._lock:
+            self._stats = {}
+        self.enabled = True
+
+    def disable(self) -> Dict[str, StageStat]:
+        """Stop timing and return what was collected."""
+        self.enabled = False
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self) -> float:
+        """Start time for :meth:`stop`; 0.0 while timing is off."""
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, stage: str, start: float) -> None:
+        if not start:
+            return
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            stat = self._stats.get(stage)
+            if stat is None:
+                stat = self._stats[stage] = StageStat()
+            stat.count += 1
+            stat.total_ms += elapsed
+            if elapsed > stat.max_ms:
+                stat.max_ms = elapsed
+
+
+STAGES = StageTimers()
+
+
+@dataclass
+class ProfileResult:
+    duration: float
+    samples: int
+    stacks: Counter = field(default_factory=Counter)
+    stages: Dict[str, StageStat] = field(default_factory=dict)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stage_summary(self) -> List[str]:
+        return [
+            f"{name}: {stat.count} calls, {stat.total_ms:.1f} ms total, "
+            f"{stat.mean_us:.1f} us mean, {stat.max_ms:.2f} ms max"
+            for name, stat in sorted(self.stages.items(), key=lambda item: -item[1].total_ms)
+        ]
+
+    def write(self, path: Path) -> Path:
+        """Write ``path`` (collapsed stacks) and ``path`` + ``.stages.json``; returns the stacks file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.collapsed())
+        summary = {
+            "duration_s": self.duration,
+            "samples": self.samples,
+            "stages": {name: {**asdict(stat), "mean_us": stat.mean_us} for name, stat in self.stages.items()},
+        }
+        path.with_name(path.name + ".stages.json").write_text(json.dumps(summary, indent=2))
+        return path
+
+
+class SamplingProfiler:
+    """Samples every thread's stack each ``interval`` seconds and enables :data:`STAGES` meanwhile."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop.clear()
+        self._started = time.perf_counter()
+        STAGES.enable()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ProfileResult:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return ProfileResult(
+            duration=time.perf_counter() - self._started,
+            samples=self._samples,
+            stacks=self._stacks,
+            stages=STAGES.disable(),
+        )
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        labels: Dict[object, str] = {}
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts: List[str] = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    if code.co_filename not in _SKIP_FILES:
+                        label = labels.get(code)
+                        if label is None:
+                            label = labels[code] = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                        parts.append(label)
+                    frame = frame.f_back
+                parts.append(names.get(ident, f"thread-{ident}"))
+                parts.reverse()
+                self._stacks[";".join(parts)] += 1
+            self._samples += 1
+
+
+@contextmanager
+def profiling(path: Optional[Path], interval: float = 0.005) -> Iterator[Optional[SamplingProfiler]]:
+    """Profile the enclosed block into ``path`` (no-op when ``path`` is ``None``)."""
+    if path is None:
+        yield None
+        return
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        result = profiler.stop()
+        result.write(path)
+        print(f"profile: {result.samples} samples written to {path}", file=sys.stderr)
+        for line in result.stage_summary():
+            print(f"  {line}", file=sys.stderr)
@@ -0,0 +1,335 @@
+"""Tiered receive history: a hot ring of entries plus memory-mapped spill segments."""
+from __future__ import annotations
+
+import bisect
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models import Decoder, RxEntry
+
+MAX_DATA = 64
+TIME_BUCKET = 1024
+RECORD = struct.Struct(f"<dIBB{MAX_DATA}s")
+RECORD_DTYPE = np.dtype(
+    [("timestamp", "<f8"), ("arbitration_id", "<u4"), ("flags", "u1"), ("dlc", "u1"), ("data", "u1", (MAX_DATA,))]
+)
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+_SpillDone = Callable[[int, bytearray, Optional[OSError]], None]
+
+
+def _spill_worker(requests: "queue.SimpleQueue[Optional[Tuple[int, Path, bytearray, _SpillDone]]]") -> None:
+    """Write full segment buffers to disk until ``None`` arrives; holds no reference to the history."""
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        segment, path, buffer, done = request
+        try:
+            path.write_bytes(buffer)
+        except OSError as exc:
+            done(segment, buffer, exc)
+        else:
+            done(segment, buffer, None)
+        del request, buffer, done
+
+
+class RxHistory:
+    """Every frame of the session, addressable by sequence number.
+
+    Each appended frame is packed into a fixed 78-byte record
+    (:data:`RECORD_DTYPE`) in the current segment buffer. Full segments are
+    written to ``spill_dir`` by a background thread, so appending never waits
+    for the disk, and read back through ``np.memmap`` once written; until
+    then they are read from the retired buffer. Frame data resident in
+    memory is limited to the current segment, segments still being written,
+    the hot ring and a few open maps. The newest ``hot_capacity`` frames are
+    also kept as :class:`RxEntry` objects so live views reuse their cached
+    decode. Older frames are rebuilt from their records on access.
+
+    Sequence numbers start at 0 for the first frame since :meth:`clear`.
+    ``max_segments`` bounds the history by dropping the oldest segments,
+    which advances :attr:`first`. ``None`` keeps every segment, so disk and
+    index memory then grow without bound. A segment that cannot be written
+    stays in memory and the error is kept in :attr:`spill_error`.
+
+    Two indexes are kept up to date on append for :mod:`core.search`: the
+    sorted sequence numbers of every arbitration ID and the first timestamp
+    of every :data:`TIME_BUCKET` frames. They stay in RAM at about 8 bytes per
+    retained frame. When segments are dropped, index entries below
+    :attr:`first` are pruned once they make up half of an array, so an index
+    holds at most about twice what is retained. With the defaults
+    (128 segments of 65536 frames) that is 8.4M frames, 650 MB on disk and
+    64-128 MiB of index.
+    """
+
+    def __init__(
+        self,
+        hot_capacity: int = 65536,
+        segment_frames: int = 65536,
+        spill_dir: Optional[Path] = None,
+        max_segments: Optional[int] = 128,
+        open_maps: int = 8,
+        decoder: Optional[Decoder] = None,
+    ) -> None:
+        self.hot_capacity = hot_capacity
+        self.segment_frames = segment_frames
+        self.max_segments = max_segments
+        self.decoder = decoder
+        self._open_maps = open_maps
+        self._lock = threading.Lock()
+        self._spilled = threading.Condition(self._lock)
+        self._pending_spills = 0
+        self._spill_requests: "queue.SimpleQueue[Optional[Tuple[int, Path, bytearray, _SpillDone]]]" = queue.SimpleQueue()
+        self._spill_thread: Optional[threading.Thread] = None
+        self.spill_error: Optional[OSError] = None
+        if spill_dir is None:
+            spill_dir = Path(tempfile.mkdtemp(prefix="rx-history-"))
+            self._finalizer = weakref.finalize(self, shutil.rmtree, str(spill_dir), True)
+        else:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+        self.spill_dir = spill_dir
+        self._reset()
+
+    def _reset(self) -> None:
+        self._hot: List[Optional[RxEntry]] = [None] * self.hot_capacity
+        self._buffer = bytearray(self.segment_frames * RECORD.size)
+        self._total = 0
+        self._first = 0
+        self._segment_paths: List[Path] = []
+        # Retired segment buffers not yet on disk, by segment number.
+        self._buffers: Dict[int, bytearray] = {}
+        self._positions: Dict[int, array] = {}
+        self._bucket_starts = array("d")
+        # Bucket number of _bucket_starts[0]; earlier buckets were pruned.
+        self._bucket_base = 0
+        self._maps: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._total - self._first
+
+    @property
+    def first(self) -> int:
+        """Sequence number of the oldest retained frame."""
+        return self._first
+
+    @property
+    def total(self) -> int:
+        """Number of frames appended so far; the next sequence number."""
+        return self._total
+
+    def append(self, entry: RxEntry) -> None:
+        data = entry.data
+        with self._lock:
+            seq = self._total
+            offset = seq % self.segment_frames
+            RECORD.pack_into(
+                self._buffer, offset * RECORD.size, entry.timestamp, entry.arbitration_id, entry.flags, len(data), data
+            )
+            if self.hot_capacity:
+                self._hot[seq % self.hot_capacity] = entry
+            positions = self._positions.get(entry.arbitration_id)
+            if positions is None:
+                positions = self._positions[entry.arbitration_id] = array("q")
+            positions.append(seq)
+            if seq % TIME_BUCKET == 0:
+                self._bucket_starts.append(entry.timestamp)
+            self._total = seq + 1
+            if offset == self.segment_frames - 1:
+                self._spill(seq // self.segment_frames)
+
+    def _spill(self, segment: int) -> None:
+        """Retire the full current buffer and queue it for writing; call under the lock."""
+        path = self.spill_dir / f"segment-{segment:06d}.rec"
+        buffer, self._buffer = self._buffer, bytearray(self.segment_frames * RECORD.size)
+        self._buffers[segment] = buffer
+        self._segment_paths.append(path)
+        if self._spill_thread is None:
+            self._spill_thread = threading.Thread(
+                target=_spill_worker, args=(self._spill_requests,), name="rx-history-spill", daemon=True
+            )
+            self._spill_thread.start()
+            weakref.finalize(self, self._spill_requests.put, None)
+        self._pending_spills += 1
+        self._spill_requests.put((segment, path, buffer, self._spill_done))
+        if self.max_segments is not None and len(self._segment_paths) > self.max_segments:
+            dropped = len(self._segment_paths) - self.max_segments - 1
+            old = self._segment_paths[dropped]
+            self._maps.pop(dropped, None)
+            self._buffers.pop(dropped, None)
+            old.unlink(missing_ok=True)
+            self._first = max(self._first, (dropped + 1) * self.segment_frames)
+            self._prune_indexes()
+
+    def _spill_done(self, segment: int, buffer: bytearray, error: Optional[OSError]) -> None:
+        """Called by the spill thread once ``buffer`` was written (or failed to be)."""
+        with self._lock:
+            if self._buffers.get(segment) is buffer:
+                if error is None:
+                    del self._buffers[segment]
+                else:
+                    self.spill_error = error
+            elif error is None:
+                # Dropped or cleared while it was being written.
+                self.spill_dir.joinpath(f"segment-{segment:06d}.rec").unlink(missing_ok=True)
+            self._pending_spills -= 1
+            self._spilled.notify_all()
+
+    def flush(self) -> None:
+        """Wait until every full segment queued so far has been written to disk."""
+        with self._spilled:
+            self._spilled.wait_for(lambda: not self._pending_spills)
+
+    def _prune_indexes(self) -> None:
+        """Drop index entries below :attr:`first` from arrays where they are at least half; call under the lock.
+
+        Pruned arrays are replaced rather than shortened in place, so a search
+        still walking the previous array is not disturbed.
+        """
+        first = self._first
+        for arbitration_id, positions in list(self._positions.items()):
+            dead = bisect.bisect_left(positions, first)
+            if dead == len(positions):
+                del self._positions[arbitration_id]
+            elif dead * 2 >= len(positions):
+                self._positions[arbitration_id] = positions[dead:]
+        dead = first // TIME_BUCKET - self._bucket_base
+        if dead * 2 >= len(self._bucket_starts):
+            self._bucket_starts = self._bucket_starts[dead:]
+            self._bucket_base += dead
+
+    def _records(self, segment: int) -> np.ndarray:
+        """Record array of ``segment``; the current one and those not yet written are viewed in memory."""
+        buffer = self._buffer if segment >= len(self._segment_paths) else self._buffers.get(segment)
+        if buffer is not None:
+            return np.frombuffer(buffer, dtype=RECORD_DTYPE)
+        records = self._maps.get(segment)
+        if records is None:
+            records = np.memmap(self._segment_paths[segment], dtype=RECORD_DTYPE, mode="r")
+            self._maps[segment] = records
+            if len(self._maps) > self._open_maps:
+                self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(segment)
+        return records
+
+    def _entry(self, record: np.void) -> RxEntry:
+        dlc = int(record["dlc"])
+        return RxEntry(
+            float(record["timestamp"]),
+            int(record["arbitration_id"]),
+            record["data"][:dlc].tobytes(),
+            flags=int(record["flags"]),
+            decoder=self.decoder,
+        )
+
+    def get(self, seq: int) -> Optional[RxEntry]:
+        """Entry with sequence number ``seq``, or ``None`` if it is not retained."""
+        with self._lock:
+            if not self._first <= seq < self._total:
+                return None
+            if self.hot_capacity and seq >= self._total - self.hot_capacity:
+                return self._hot[seq % self.hot_capacity]
+            segment, offset = divmod(seq, self.segment_frames)
+            return self._entry(self._records(segment)[offset])
+
+    def page(self, start: int, count: int) -> List[RxEntry]:
+        """Entries ``start .. start + count - 1`` in chronological order, clipped to what is retained."""
+        start = max(start, self._first)
+        end = min(start + count, self._total)
+        return [entry for entry in (self.get(seq) for seq in range(start, end)) if entry is not None]
+
+    def latest(self, count: int) -> List[RxEntry]:
+        """The newest ``count`` entries, newest first."""
+        total = self._total
+        entries = self.page(total - count, count)
+        entries.reverse()
+        return entries
+
+    def ids(self) -> List[int]:
+        """Arbitration IDs seen since the last :meth:`clear`, except those whose frames were all dropped."""
+        return list(self._positions)
+
+    def positions(self, arbitration_id: int) -> Sequence[int]:
+        """Sorted sequence numbers of ``arbitration_id``; may still include some dropped frames below :attr:`first`."""
+        return self._positions.get(arbitration_id, ())
+
+    def _select(self, seqs: Sequence[int]) -> Iterator[np.ndarray]:
+        """Records of ``seqs`` (ascending or descending), one array per run within a segment; call under the lock."""
+        index = 0
+        while index < len(seqs):
+            segment = seqs[index] // self.segment_frames
+            end = index
+            while end < len(seqs) and seqs[end] // self.segment_frames == segment:
+                end += 1
+            offsets = np.fromiter((seq % self.segment_frames for seq in seqs[index:end]), dtype=np.int64)
+            yield self._records(segment)[offsets]
+            index = end
+
+    def payloads(self, seqs: Sequence[int]) -> List[bytes]:
+        """Payloads of retained frames ``seqs`` (ascending or descending), without building entries."""
+        result: List[bytes] = []
+        with self._lock:
+            for records in self._select(seqs):
+                data = records["data"]
+                for row, dlc in enumerate(records["dlc"].tolist()):
+                    result.append(data[row, :dlc].tobytes())
+        return result
+
+    def timestamps(self, seqs: Sequence[int]) -> List[float]:
+        """Timestamps of retained frames ``seqs``, like :meth:`payloads`."""
+        result: List[float] = []
+        with self._lock:
+            for records in self._select(seqs):
+                result.extend(records["timestamp"].tolist())
+        return result
+
+    def frames(self, seqs: Sequence[int]) -> List[Tuple[float, bytes]]:
+        """``(timestamp, payload)`` of the frames among ``seqs`` (ascending or descending) that are still retained.
+
+        Reads both under one lock acquisition, so a segment dropped meanwhile
+        cannot make the two disagree or be read after its file was removed.
+        """
+        result: List[Tuple[float, bytes]] = []
+        with self._lock:
+            first = self._first
+            kept = [seq for seq in seqs if first <= seq < self._total]
+            for records in self._select(kept):
+                data = records["data"]
+                for row, (timestamp, dlc) in enumerate(zip(records["timestamp"].tolist(), records["dlc"].tolist())):
+                    result.append((timestamp, data[row, :dlc].tobytes()))
+        return result
+
+    def index_at(self, timestamp: float) -> int:
+        """Sequence number of the first retained frame at or after ``timestamp``."""
+        with self._lock:
+            bucket = max(
+                bisect.bisect_right(self._bucket_starts, timestamp) - 1 + self._bucket_base, self._first // TIME_BUCKET
+            )
+            start = max(bucket * TIME_BUCKET, self._first)
+            while start < self._total:
+                segment, offset = divmod(start, self.segment_frames)
+                end = min((start // TIME_BUCKET + 1) * TIME_BUCKET, self._total, (segment + 1) * self.segment_frames)
+                stamps = self._records(segment)["timestamp"][offset : offset + end - start]
+                found = int(np.searchsorted(stamps, timestamp))
+                if found < end - start:
+                    return start + found
+                start = end
+            return self._total
+
+    def clear(self) -> None:
+        self.flush()
+        with self._lock:
+            for path in self._segment_paths:
+                path.unlink(missing_ok=True)
+            self._reset()
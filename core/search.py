@@ -0,0 +1,107 @@
+"""Index-backed search over the RX history."""
+from __future__ import annotations
+
+import bisect
+import heapq
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.filters import CompiledFilter
+from core.rx_history import RxHistory
+
+
+class HistorySearch:
+    """Finds frames in an :class:`RxHistory` matching a filter expression.
+
+    Only the position lists of IDs that :meth:`CompiledFilter.may_match_id`
+    accepts are visited. They are merged lazily from the starting point
+    outwards. ID-only queries are answered from the index alone. Payload
+    and signal conditions read payloads in chunks and stop at the first
+    match, so stepping to the next hit never scans the whole session.
+    Payload verdicts are memoised per ``(ID, payload)`` because real traffic
+    repeats payloads heavily.
+    """
+
+    MAX_MEMO = 65536
+
+    def __init__(self, history: RxHistory, query: CompiledFilter, chunk: int = 4096) -> None:
+        self.history = history
+        self.query = query
+        self.chunk = chunk
+        self._id_matches: Dict[int, bool] = {}
+        self._payload_matches: Dict[Tuple[int, bytes], bool] = {}
+
+    def _candidate_ids(self) -> List[int]:
+        ids: List[int] = []
+        for arbitration_id in self.history.ids():
+            matches = self._id_matches.get(arbitration_id)
+            if matches is None:
+                matches = self._id_matches[arbitration_id] = self.query.may_match_id(arbitration_id)
+            if matches:
+                ids.append(arbitration_id)
+        return ids
+
+    def _forward(self, after: int) -> Iterator[Tuple[int, int]]:
+        start, limit = max(after + 1, self.history.first), self.history.total
+        streams = []
+        for arbitration_id in self._candidate_ids():
+            positions = self.history.positions(arbitration_id)
+            first = bisect.bisect_left(positions, start)
+            last = bisect.bisect_left(positions, limit)
+            streams.append(self._stream(arbitration_id, positions, range(first, last)))
+        return heapq.merge(*streams)
+
+    def _backward(self, before: int) -> Iterator[Tuple[int, int]]:
+        start, first_seq = min(before, self.history.total), self.history.first
+        streams = []
+        for arbitration_id in self._candidate_ids():
+            positions = self.history.positions(arbitration_id)
+            last = bisect.bisect_left(positions, start)
+            first = bisect.bisect_left(positions, first_seq)
+            streams.append(self._stream(arbitration_id, positions, range(last - 1, first - 1, -1)))
+        return heapq.merge(*streams, reverse=True)
+
+    @staticmethod
+    def _stream(arbitration_id: int, positions, indexes: range) -> Iterator[Tuple[int, int]]:
+        for index in indexes:
+            yield positions[index], arbitration_id
+
+    def _first_match(self, candidates: Iterator[Tuple[int, int]]) -> Optional[int]:
+        if self.query.id_only:
+            hit = next(candidates, None)
+            return hit[0] if hit else None
+        predicate = self.query.predicate
+        memo = self._payload_matches
+        while True:
+            batch = list(islice(candidates, self.chunk))
+            if not batch:
+                return None
+            payloads = self.history.payloads([seq for seq, _ in batch])
+            for (seq, arbitration_id), data in zip(batch, payloads):
+                key = (arbitration_id, data)
+                matches = memo.get(key)
+                if matches is None:
+                    if len(memo) >= self.MAX_MEMO:
+                        memo.clear()
+                    matches = memo[key] = predicate(arbitration_id, data)
+                if matches:
+                    return seq
+
+    def next(self, after: int) -> Optional[int]:
+        """First matching sequence number greater than ``after``."""
+        return self._first_match(self._forward(after))
+
+    def previous(self, before: int) -> Optional[int]:
+        """Last matching sequence number less than ``before``."""
+        return self._first_match(self._backward(before))
+
+    def count(self) -> Optional[int]:
+        """Number of retained matches for ID-only queries; ``None`` when payloads would have to be scanned."""
+        if not self.query.id_only:
+            return None
+        first, total = self.history.first, self.history.total
+        count = 0
+        for arbitration_id in self._candidate_ids():
+            positions = self.history.positions(arbitration_id)
+            count += bisect.bisect_left(positions, total) - bisect.bisect_left(positions, first)
+        return count
@@ -0,0 +1,292 @@
+"""Streaming comparison of two recorded sessions.
+
+Both logs are read with :func:`canio.logger.iter_log_events` and merged by
+time relative to each log's first frame (plus an optional offset), so only
+per-ID counters and a short window of unpaired frames are held in memory.
+Within an ID, a frame pairs with the first frame of the other log that is
+no more than ``window`` seconds away. Paired payloads are compared byte for
+byte, or signal by signal when a DBC is given. Frames that find no partner
+count as unmatched.
+
+With ``workers > 1`` the logs are still parsed and merged once, in the
+calling process, and the merged frames are handed in batches to worker
+processes by ``arbitration_id % workers``. The workers do the pairing and
+signal comparison for their IDs; the per-ID results are combined at the end.
+"""
+from __future__ import annotations
+
+import heapq
+import multiprocessing
+import queue
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from canio.logger import ReplayEvent, iter_log_events
+from core.dbc_manager import DbcManager, LoadedDbc
+
+GOLDEN = 0
+CANDIDATE = 1
+# Merged frames per batch sent to a worker.
+SHARD_BATCH = 4096
+
+
+@dataclass
+class DiffTolerances:
+    # Relative difference of frame counts and mean cycle times that is still accepted.
+    count: float = 0.01
+    cycle: float = 0.1
+    # Largest accepted absolute signal difference, per signal name and otherwise.
+    signal: float = 0.0
+    signals: Dict[str, float] = field(default_factory=dict)
+    # Seconds within which a frame pairs with one of the same ID in the other log.
+    window: float = 0.05
+
+    def for_signal(self, name: str) -> float:
+        return self.signals.get(name, self.signal)
+
+
+@dataclass
+class IdDiff:
+    """Comparison of one arbitration ID between the golden and the candidate log."""
+
+    arbitration_id: int
+    name: Optional[str] = None
+    counts: List[int] = field(default_factory=lambda: [0, 0])
+    cycle_totals: List[float] = field(default_factory=lambda: [0.0, 0.0])
+    paired: int = 0
+    unmatched: List[int] = field(default_factory=lambda: [0, 0])
+    payload_mismatches: int = 0
+    signal_max_diff: Dict[str, float] = field(default_factory=dict)
+    # (golden relative time, golden payload, candidate payload) of the first mismatch.
+    first_mismatch: Optional[Tuple[float, bytes, bytes]] = None
+
+    def mean_cycle(self, side: int) -> Optional[float]:
+        count = self.counts[side]
+        return self.cycle_totals[side] / (count - 1) if count > 1 else None
+
+    def issues(self, tolerances: DiffTolerances) -> List[str]:
+        found: List[str] = []
+        golden, candidate = self.counts
+        if abs(golden - candidate) > tolerances.count * max(golden, candidate):
+            found.append(f"count {golden} -> {candidate}")
+        cycle_golden, cycle_candidate = self.mean_cycle(GOLDEN), self.mean_cycle(CANDIDATE)
+        if cycle_golden and cycle_candidate and abs(cycle_candidate - cycle_golden) > tolerances.cycle * cycle_golden:
+            found.append(f"cycle {cycle_golden * 1000:.2f} -> {cycle_candidate * 1000:.2f} ms")
+        signals = [
+            f"{name} by {diff:g}"
+            for name, diff in sorted(self.signal_max_diff.items())
+            if diff > tolerances.for_signal(name)
+        ]
+        if signals:
+            found.append("signals differ: " + ", ".join(signals))
+        elif self.payload_mismatches and not self.signal_max_diff:
+            found.append(f"{self.payload_mismatches} of {self.paired} payloads differ")
+        unpaired = sum(self.unmatched)
+        if golden and candidate and unpaired > tolerances.count * max(golden, candidate):
+            found.append(f"unpaired {self.unmatched[GOLDEN]} golden / {self.unmatched[CANDIDATE]} candidate")
+        return found
+
+
+@dataclass
+class SessionDiff:
+    ids: Dict[int, IdDiff]
+    tolerances: DiffTolerances
+
+    def differences(self) -> List[Tuple[IdDiff, List[str]]]:
+        """IDs with at least one difference beyond the tolerances, in ID order."""
+        result = []
+        for arbitration_id in sorted(self.ids):
+            diff = self.ids[arbitration_id]
+            issues = diff.issues(self.tolerances)
+            if issues:
+                result.append((diff, issues))
+        return result
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for diff, issues in self.differences():
+            label = f"{diff.arbitration_id:#x}" + (f" {diff.name}" if diff.name else "")
+            lines.append(f"{label}: " + "; ".join(issues))
+        lines.append(f"{len(lines)} of {len(self.ids)} IDs differ")
+        return lines
+
+
+class _IdState:
+    __slots__ = ("diff", "last", "pending", "decoded")
+
+    def __init__(self, diff: IdDiff) -> None:
+        self.diff = diff
+        self.last: List[Optional[float]] = [None, None]
+        self.pending: Tuple[Deque[Tuple[float, bytes]], Deque[Tuple[float, bytes]]] = (deque(), deque())
+        # Last (payload, signals) decoded per side; cyclic frames often repeat.
+        self.decoded: List[Optional[Tuple[bytes, Dict[str, float]]]] = [None, None]
+
+
+def _relative(events: Iterator[ReplayEvent], side: int, offset: float) -> Iterator[Tuple[float, int, int, bytes]]:
+    start: Optional[float] = None
+    for event in events:
+        if start is None:
+            start = event.timestamp - offset
+        yield event.timestamp - start, side, event.arbitration_id, event.data
+
+
+def _merged(golden: Path, candidate: Path, offset: float) -> Iterator[Tuple[float, int, int, bytes]]:
+    """``(relative time, side, arbitration ID, data)`` of both logs in time order."""
+    return heapq.merge(
+        _relative(iter_log_events(golden), GOLDEN, 0.0),
+        _relative(iter_log_events(candidate), CANDIDATE, offset),
+    )
+
+
+class _Comparator:
+    def __init__(self, tolerances: DiffTolerances, dbc: Optional[LoadedDbc]) -> None:
+        self.tolerances = tolerances
+        self.dbc = dbc
+        self.states: Dict[int, _IdState] = {}
+
+    def state(self, arbitration_id: int) -> _IdState:
+        state = self.states.get(arbitration_id)
+        if state is None:
+            message = self.dbc.message_by_id(arbitration_id) if self.dbc else None
+            state = self.states[arbitration_id] = _IdState(IdDiff(arbitration_id, message.name if message else None))
+        return state
+
+    def feed(self, timestamp: float, side: int, arbitration_id: int, data: bytes) -> None:
+        state = self.state(arbitration_id)
+        diff = state.diff
+        diff.counts[side] += 1
+        last = state.last[side]
+        if last is not None:
+            diff.cycle_totals[side] += timestamp - last
+        state.last[side] = timestamp
+        # Frames merge in time order, so nothing older than the horizon can pair any more.
+        horizon = timestamp - self.tolerances.window
+        for pending_side in (GOLDEN, CANDIDATE):
+            pending = state.pending[pending_side]
+            while pending and pending[0][0] < horizon:
+                pending.popleft()
+                diff.unmatched[pending_side] += 1
+        other = state.pending[1 - side]
+        if not other:
+            state.pending[side].append((timestamp, data))
+            return
+        other_time, other_data = other.popleft()
+        diff.paired += 1
+        if data == other_data:
+            return
+        diff.payload_mismatches += 1
+        golden, candidate = (data, other_data) if side == GOLDEN else (other_data, data)
+        if diff.first_mismatch is None:
+            diff.first_mismatch = (timestamp if side == GOLDEN else other_time, golden, candidate)
+        self._compare_signals(state, golden, candidate)
+
+    def _compare_signals(self, state: _IdState, golden: bytes, candidate: bytes) -> None:
+        message = self.dbc.message_by_id(state.diff.arbitration_id) if self.dbc else None
+        if message is None:
+            return
+        values = []
+        for side, data in ((GOLDEN, golden), (CANDIDATE, candidate)):
+            cached = state.decoded[side]
+            if cached is None or cached[0] != data:
+                try:
+                    cached = (data, message.decode(data, decode_choices=False))
+                except Exception:  # noqa: BLE001 - undecodable payloads are compared as bytes only
+                    return
+                state.decoded[side] = cached
+            values.append(cached[1])
+        maxima = state.diff.signal_max_diff
+        for name, value in values[GOLDEN].items():
+            other = values[CANDIDATE].get(name)
+            if other is None:
+                continue
+            maxima[name] = max(abs(float(other) - float(value)), maxima.get(name, 0.0))
+
+    def finish(self) -> Dict[int, IdDiff]:
+        for state in self.states.values():
+            for side in (GOLDEN, CANDIDATE):
+                state.diff.unmatched[side] += len(state.pending[side])
+                state.pending[side].clear()
+        return {arbitration_id: state.diff for arbitration_id, state in self.states.items()}
+
+
+def _compare_worker(inbox, results, tolerances: DiffTolerances, dbc_path: Optional[str]) -> None:
+    """Feed the merged frame batches arriving on ``inbox`` until ``None``, then put the per-ID results."""
+    dbc = DbcManager().load(Path(dbc_path)) if dbc_path else None
+    comparator = _Comparator(tolerances, dbc)
+    feed = comparator.feed
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        for item in batch:
+            feed(*item)
+    results.put(comparator.finish())
+
+
+def _compare_sharded(
+    golden: Path, candidate: Path, tolerances: DiffTolerances, dbc_path: Optional[str], offset: float, workers: int
+) -> Dict[int, IdDiff]:
+    context = multiprocessing.get_context("spawn")
+    inboxes = [context.Queue(maxsize=8) for _ in range(workers)]
+    results = context.Queue()
+    processes = [
+        context.Process(target=_compare_worker, args=(inbox, results, tolerances, dbc_path), daemon=True)
+        for inbox in inboxes
+    ]
+    for process in processes:
+        process.start()
+    try:
+        batches: List[List[Tuple[float, int, int, bytes]]] = [[] for _ in range(workers)]
+        for item in _merged(golden, candidate, offset):
+            shard = item[2] % workers
+            batch = batches[shard]
+            batch.append(item)
+            if len(batch) >= SHARD_BATCH:
+                inboxes[shard].put(batch)
+                batches[shard] = []
+        for shard, batch in enumerate(batches):
+            if batch:
+                inboxes[shard].put(batch)
+            inboxes[shard].put(None)
+        ids: Dict[int, IdDiff] = {}
+        # Shards own disjoint IDs, so their results simply add up.
+        for _ in range(workers):
+            while True:
+                try:
+                    ids.update(results.get(timeout=1.0))
+                    break
+                except queue.Empty:
+                    if any(process.exitcode not in (None, 0) for process in processes):
+                        raise RuntimeError("A session diff worker failed") from None
+        return ids
+    finally:
+        for process in processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+
+
+def compare_sessions(
+    golden: Path,
+    candidate: Path,
+    tolerances: Optional[DiffTolerances] = None,
+    dbc_path: Optional[Path] = None,
+    offset: float = 0.0,
+    workers: int = 1,
+) -> SessionDiff:
+    """Compare ``candidate`` against ``golden``; ``offset`` shifts the candidate's relative time.
+
+    ``golden`` and ``candidate`` are anything :class:`canio.logger.LogReplay`
+    accepts: plain CSV logs, compressed segments or segmented-log manifests.
+    """
+    tolerances = tolerances or DiffTolerances()
+    dbc = str(dbc_path) if dbc_path else None
+    if workers > 1:
+        return SessionDiff(_compare_sharded(golden, candidate, tolerances, dbc, offset, workers), tolerances)
+    comparator = _Comparator(tolerances, DbcManager().load(dbc_path) if dbc_path else None)
+    feed = comparator.feed
+    for timestamp, side, arbitration_id, data in _merged(golden, candidate, offset):
+        feed(timestamp, side, arbitration_id, data)
+    return SessionDiff(comparator.finish(), tolerances)
@@ -0,0 +1,249 @@
+"""Per-signal time-series history with incremental min/max decimation."""
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SignalKey = Tuple[str, str]
+
+
+class _Ring:
+    """Fixed-capacity ring of parallel float64 columns, oldest item first."""
+
+    def __init__(self, capacity: int, columns: int) -> None:
+        self.capacity = capacity
+        self.data = np.empty((columns, capacity), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def push(self, *values: float) -> None:
+        self.data[:, self.head] = values
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def segments(self) -> List[np.ndarray]:
+        """Chronological views (no copies) covering the stored items."""
+        if self.size < self.capacity:
+            return [self.data[:, : self.size]]
+        return [self.data[:, self.head :], self.data[:, : self.head]]
+
+    def oldest(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return float(self.data[0, 0 if self.size < self.capacity else self.head])
+
+    def count_in(self, t0: float, t1: float) -> int:
+        total = 0
+        for segment in self.segments():
+            keys = segment[0]
+            total += int(np.searchsorted(keys, t1, "right") - np.searchsorted(keys, t0, "left"))
+        return total
+
+    def select(self, t0: float, t1: float) -> np.ndarray:
+        parts = []
+        for segment in self.segments():
+            keys = segment[0]
+            lo = np.searchsorted(keys, t0, "left")
+            hi = np.searchsorted(keys, t1, "right")
+            if hi > lo:
+                parts.append(segment[:, lo:hi])
+        if not parts:
+            return np.empty((self.data.shape[0], 0))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+
+class _Pending:
+    """Partially filled min/max bucket of one decimation level."""
+
+    __slots__ = ("count", "t_start", "t_min", "v_min", "t_max", "v_max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.t_start = self.t_min = self.v_min = self.t_max = self.v_max = 0.0
+
+    def merge(self, t_start: float, t_min: float, v_min: float, t_max: float, v_max: float) -> None:
+        if not self.count:
+            self.t_start, self.t_min, self.v_min, self.t_max, self.v_max = t_start, t_min, v_min, t_max, v_max
+        else:
+            if v_min < self.v_min:
+                self.t_min, self.v_min = t_min, v_min
+            if v_max > self.v_max:
+                self.t_max, self.v_max = t_max, v_max
+        self.count += 1
+
+    def as_tuple(self) -> Tuple[float, float, float, float, float]:
+        return self.t_start, self.t_min, self.v_min, self.t_max, self.v_max
+
+
+def _envelope(buckets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Turn ``(t_start, t_min, v_min, t_max, v_max)`` buckets into time-ordered points."""
+    count = buckets.shape[1]
+    t = np.empty(2 * count)
+    v = np.empty(2 * count)
+    min_first = buckets[1] <= buckets[3]
+    t[0::2] = np.where(min_first, buckets[1], buckets[3])
+    v[0::2] = np.where(min_first, buckets[2], buckets[4])
+    t[1::2] = np.where(min_first, buckets[3], buckets[1])
+    v[1::2] = np.where(min_first, buckets[4], buckets[2])
+    return t, v
+
+
+class SignalHistory:
+    """Ring buffer of ``(timestamp, value)`` samples plus min/max decimation levels.
+
+    Each decimation level stores buckets summarising ``factor`` times more raw
+    samples than the level below by their minimum and maximum. Buckets are
+    completed incrementally while appending, so a query only touches the
+    coarsest level that still resolves the requested width and never scans the
+    raw samples of a long range.
+    Samples must be appended in non-decreasing timestamp order.
+    """
+
+    def __init__(self, capacity: int = 16384, level_capacity: int = 4096, factor: int = 8, levels: int = 5) -> None:
+        self.factor = factor
+        self._raw = _Ring(capacity, 2)
+        self._levels = [_Ring(level_capacity, 5) for _ in range(levels)]
+        self._pending = [_Pending() for _ in range(levels)]
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self._raw.size
+
+    def append(self, timestamp: float, value: float) -> None:
+        with self._lock:
+            self._raw.push(timestamp, value)
+            self.total += 1
+            bucket = (timestamp, timestamp, value, timestamp, value)
+            for ring, pending in zip(self._levels, self._pending):
+                pending.merge(*bucket)
+                if pending.count < self.factor:
+                    break
+                bucket = pending.as_tuple()
+                ring.push(*bucket)
+                pending.count = 0
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            if not self._raw.size:
+                return None
+            index = (self._raw.head - 1) % self._raw.capacity
+            return float(self._raw.data[0, index]), float(self._raw.data[1, index])
+
+    def query(self, t0: float, t1: float, max_points: int = 2000) -> Tuple[np.ndarray, np.ndarray]:
+        """Return at most about ``max_points`` points covering ``[t0, t1]``.
+
+        Raw samples are returned when they fit; otherwise the finest level
+        whose buckets fit is returned as a min/max envelope (two points per
+        bucket), with the not yet completed buckets appended as its tail.
+        """
+        with self._lock:
+            raw_oldest = self._raw.oldest()
+            raw_covers = raw_oldest is not None and raw_oldest <= t0
+            if raw_covers or not self._levels or self._levels[0].size == 0:
+                if self._raw.count_in(t0, t1) <= max_points:
+                    selected = self._raw.select(t0, t1)
+                    return selected[0].copy(), selected[1].copy()
+            budget = max(1, max_points // 2)
+            chosen = len(self._levels) - 1
+            for level, ring in enumerate(self._levels):
+                oldest = ring.oldest()
+                covers = oldest is not None and oldest <= t0
+                if ring.count_in(t0, t1) <= budget and (covers or level == len(self._levels) - 1):
+                    chosen = level
+                    break
+            buckets = self._levels[chosen].select(t0, t1)
+            tail = _Pending()
+            for pending in reversed(self._pending[: chosen + 1]):
+                if pending.count:
+                    tail.merge(*pending.as_tuple())
+            if tail.count and tail.t_start <= t1 and max(tail.t_min, tail.t_max) >= t0:
+                buckets = np.concatenate([buckets, np.array(tail.as_tuple()).reshape(5, 1)], axis=1)
+            return _envelope(buckets)
+
+
+class SignalHistoryStore:
+    """Histories for the signals currently being watched, keyed by ``(message, signal)``."""
+
+    def __init__(self, capacity: int = 16384, level_capacity: int = 4096, factor: int = 8, levels: int = 5) -> None:
+        self._options = dict(capacity=capacity, level_capacity=level_capacity, factor=factor, levels=levels)
+        self._histories: Dict[SignalKey, SignalHistory] = {}
+        self._by_message: Dict[str, Dict[str, SignalHistory]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def watched(self) -> List[SignalKey]:
+        return list(self._histories)
+
+    @property
+    def active(self) -> bool:
+        """True while at least one signal is watched."""
+        return bool(self._by_message)
+
+    def watch(self, message_name: str, signal_name: str) -> SignalHistory:
+        key = (message_name, signal_name)
+        with self._lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = SignalHistory(**self._options)
+                self._histories[key] = history
+                signals = dict(self._by_message.get(message_name, {}))
+                signals[signal_name] = history
+                self._by_message = {**self._by_message, message_name: signals}
+        return history
+
+    def unwatch(self, message_name: str, signal_name: str) -> None:
+        with self._lock:
+            if self._histories.pop((message_name, signal_name), None) is None:
+                return
+            signals = {k: v for k, v in self._by_message.get(message_name, {}).items() if k != signal_name}
+            by_message = dict(self._by_message)
+            if signals:
+                by_message[message_name] = signals
+            else:
+                by_message.pop(message_name, None)
+            self._by_message = by_message
+
+    def history(self, message_name: str, signal_name: str) -> Optional[SignalHistory]:
+        return self._histories.get((message_name, signal_name))
+
+    def new_history(self) -> SignalHistory:
+        """An empty history with this store's options, e.g. for rebuilding one off-line."""
+        return SignalHistory(**self._options)
+
+    def replace(self, message_name: str, signal_name: str, history: SignalHistory) -> bool:
+        """Swap in ``history`` for a watched signal; False if it is no longer watched."""
+        key = (message_name, signal_name)
+        with self._lock:
+            if key not in self._histories:
+                return False
+            self._histories[key] = history
+            signals = dict(self._by_message[message_name])
+            signals[signal_name] = history
+            self._by_message = {**self._by_message, message_name: signals}
+        return True
+
+    def ingest(self, message_name: str, timestamp: float, decoded: Dict[str, float]) -> None:
+        """Append the watched signals of one decoded frame."""
+        signals = self._by_message.get(message_name)
+        if not signals:
+            return
+        for signal_name, history in signals.items():
+            value = decoded.get(signal_name)
+            if value is None:
+                continue
+            try:
+                history.append(timestamp, float(getattr(value, "value", value)))
+            except (TypeError, ValueError):
+                continue
+
+    def query(
+        self, message_name: str, signal_name: str, t0: float, t1: float, max_points: int = 2000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        history = self.history(message_name, signal_name)
+        if history is None:
+            return np.empty(0), np.empty(0)
+        return history.query(t0, t1, max_points)
@@ -0,0 +1,196 @@
+"""Running statistics for every decoded signal.
+
+:class:`SignalStatistics` keeps count, min, max, mean and variance, the last
+value, when it last changed and its rate of change for each signal of a
+:class:`LoadedDbc`. State lives in flat numpy arrays indexed by the DBC's
+signal IDs (:meth:`LoadedDbc.signal_layout`), one contiguous range per
+message.
+
+:meth:`update` only appends the frame's values to a small per-message
+batch. A full batch, or any read, folds the batch into the arrays with
+vectorised operations: the batch mean and sum of squared deviations are
+merged into the running ones (the pairwise form of Welford's update), so
+the per-frame cost stays flat however many signals are tracked. Signals
+missing from a frame, such as inactive multiplexed signals, are skipped.
+
+Only messages in :attr:`SignalStatistics.watched` are recorded (the
+controller watches the message shown in the signal view), so keeping
+statistics does not force every received frame to be decoded.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.dbc_manager import LoadedDbc
+
+
+def _numeric(value: object) -> float:
+    """``value`` as a float, NaN when missing or not numeric; choice values give their raw number."""
+    if value is None:
+        return math.nan
+    try:
+        return float(getattr(value, "value", value))  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return math.nan
+
+
+@dataclass(frozen=True)
+class SignalStat:
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+    std: float
+    last: float
+    last_change: Optional[float]
+    rate: Optional[float]
+
+    @property
+    def variance(self) -> float:
+        return self.std * self.std
+
+
+class SignalStatistics:
+    """Per-signal running statistics for one loaded DBC; thread-safe."""
+
+    def __init__(self, loaded: LoadedDbc, batch: int = 256) -> None:
+        self.loaded = loaded
+        self.batch = batch
+        size = loaded.signal_count
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.minimum = np.full(size, np.inf)
+        self.maximum = np.full(size, -np.inf)
+        self.last = np.full(size, np.nan)
+        self.last_time = np.full(size, np.nan)
+        self.last_change = np.full(size, np.nan)
+        self.rate = np.full(size, np.nan)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[List[float], List[List[float]]]] = {}
+        # Messages whose frames are recorded; replaced, never mutated.
+        self.watched: FrozenSet[str] = frozenset()
+
+    def set_watched(self, message_names: Iterable[str]) -> None:
+        """Record only frames of ``message_names`` from now on; statistics gathered so far are kept."""
+        self.watched = frozenset(message_names)
+
+    def update(self, message_name: str, timestamp: float, decoded: Dict[str, float]) -> None:
+        """Record one decoded frame of ``message_name`` if it is watched."""
+        if message_name not in self.watched:
+            return
+        layout = self.loaded.signal_layout(message_name)
+        if layout is None:
+            return
+        row = [_numeric(decoded.get(name)) for name in layout[1]]
+        with self._lock:
+            pending = self._pending.get(message_name)
+            if pending is None:
+                pending = self._pending[message_name] = ([], [])
+            pending[0].append(timestamp)
+            pending[1].append(row)
+            if len(pending[0]) >= self.batch:
+                self._fold(message_name)
+
+    def stats(self, message_name: str) -> Dict[str, SignalStat]:
+        """Statistics of the signals of ``message_name`` that have been seen."""
+        layout = self.loaded.signal_layout(message_name)
+        if layout is None:
+            return {}
+        first, names = layout
+        with self._lock:
+            if message_name in self._pending:
+                self._fold(message_name)
+            result: Dict[str, SignalStat] = {}
+            for offset, name in enumerate(names):
+                index = first + offset
+                count = int(self.count[index])
+                if not count:
+                    continue
+                change, rate = self.last_change[index], self.rate[index]
+                result[name] = SignalStat(
+                    count=count,
+                    minimum=float(self.minimum[index]),
+                    maximum=float(self.maximum[index]),
+                    mean=float(self.mean[index]),
+                    std=math.sqrt(self.m2[index] / (count - 1)) if count > 1 else 0.0,
+                    last=float(self.last[index]),
+                    last_change=None if math.isnan(change) else float(change),
+                    rate=None if math.isnan(rate) else float(rate),
+                )
+            return result
+
+    def rebased(self, loaded: LoadedDbc, changed_ids: Set[int]) -> "SignalStatistics":
+        """Statistics for ``loaded`` carrying over every message whose frame ID is not in ``changed_ids``.
+
+        ``changed_ids`` is typically :attr:`DbcDiff.affected` of a hot reload.
+        """
+        fresh = SignalStatistics(loaded, self.batch)
+        fresh.watched = self.watched
+        reset = {message.name for message in loaded.messages if message.frame_id in changed_ids}
+        with self._lock:
+            for message_name in list(self._pending):
+                self._fold(message_name)
+            arrays = ("count", "mean", "m2", "minimum", "maximum", "last", "last_time", "last_change", "rate")
+            for index, (message_name, signal_name) in enumerate(loaded.signal_keys):
+                if message_name in reset:
+                    continue
+                layout = self.loaded.signal_layout(message_name)
+                if layout is None or signal_name not in layout[1]:
+                    continue
+                source = layout[0] + layout[1].index(signal_name)
+                for attribute in arrays:
+                    getattr(fresh, attribute)[index] = getattr(self, attribute)[source]
+        return fresh
+
+    def _fold(self, message_name: str) -> None:
+        """Merge the pending batch of ``message_name`` into the arrays; call under the lock."""
+        times_list, rows = self._pending.pop(message_name)
+        first, names = self.loaded.signal_layout(message_name)  # type: ignore[misc]
+        span = slice(first, first + len(names))
+        block = np.array(rows, dtype=np.float64)
+        times = np.array(times_list, dtype=np.float64)
+        valid = ~np.isnan(block)
+        batch_count = valid.sum(axis=0)
+        seen = batch_count > 0
+
+        # Count, mean and M2: merge the batch moments into the running ones.
+        count = self.count[span]
+        total = count + batch_count
+        batch_mean = np.divide(np.where(valid, block, 0.0).sum(axis=0), batch_count, out=np.zeros(len(names)), where=seen)
+        deviation = np.where(valid, block - batch_mean, 0.0)
+        batch_m2 = (deviation * deviation).sum(axis=0)
+        delta = batch_mean - self.mean[span]
+        weight = np.divide(batch_count, total, out=np.zeros(len(names)), where=seen)
+        self.mean[span] += delta * weight
+        self.m2[span] += batch_m2 + delta * delta * count * weight
+        self.count[span] = total
+        self.minimum[span] = np.minimum(self.minimum[span], np.where(valid, block, np.inf).min(axis=0))
+        self.maximum[span] = np.maximum(self.maximum[span], np.where(valid, block, -np.inf).max(axis=0))
+
+        # Last value, last change and rate: each valid sample against the one before it.
+        columns = np.arange(len(names))
+        rows_index = np.arange(len(block))[:, None]
+        valid_rows = np.where(valid, rows_index, -1)
+        before = np.vstack([np.full(len(names), -1), np.maximum.accumulate(valid_rows, axis=0)[:-1]])
+        prior = np.where(before >= 0, block[np.maximum(before, 0), columns], self.last[span])
+        changed = valid & (block != prior)
+        last_row = valid_rows.max(axis=0)
+        prior_row = before[np.maximum(last_row, 0), columns]
+        value = block[np.maximum(last_row, 0), columns]
+        stamp = times[np.maximum(last_row, 0)]
+        prior_value = np.where(prior_row >= 0, block[np.maximum(prior_row, 0), columns], self.last[span])
+        prior_stamp = np.where(prior_row >= 0, times[np.maximum(prior_row, 0)], self.last_time[span])
+        elapsed = stamp - prior_stamp
+        has_slope = seen & (elapsed > 0)
+        slope = np.divide(value - prior_value, elapsed, out=np.zeros(len(names)), where=has_slope)
+        self.rate[span] = np.where(has_slope, slope, self.rate[span])
+        change_row = len(block) - 1 - np.argmax(changed[::-1], axis=0)
+        self.last_change[span] = np.where(changed.any(axis=0), times[change_row], self.last_change[span])
+        self.last[span] = np.where(seen, value, self.last[span])
+        self.last_time[span] = np.where(seen, stamp, self.last_time[span])
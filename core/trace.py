@@ -0,0 +1,89 @@
+"""Per-ID state table backing the fixed trace view."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from core.models import RxEntry
+
+
+@dataclass
+class IdState:
+    """Latest frame and incremental cycle-time statistics for one arbitration ID."""
+
+    arbitration_id: int
+    row: int
+    entry: RxEntry
+    count: int = 1
+    last_delta: Optional[float] = None
+    min_cycle: Optional[float] = None
+    max_cycle: Optional[float] = None
+    cycle_total: float = 0.0
+
+    @property
+    def avg_cycle(self) -> Optional[float]:
+        if self.count < 2:
+            return None
+        return self.cycle_total / (self.count - 1)
+
+    def update(self, entry: RxEntry) -> None:
+        delta = entry.timestamp - self.entry.timestamp
+        self.entry = entry
+        self.count += 1
+        self.last_delta = delta
+        self.cycle_total += delta
+        if self.min_cycle is None or delta < self.min_cycle:
+            self.min_cycle = delta
+        if self.max_cycle is None or delta > self.max_cycle:
+            self.max_cycle = delta
+
+
+class FixedTraceTable:
+    """One row per arbitration ID, updated in O(1) per received frame.
+
+    Rows keep the order in which IDs were first seen so a view can address
+    them by a stable index. IDs touched since the last :meth:`take_changed`
+    call are tracked so the view only repaints rows that actually changed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, IdState] = {}
+        self._rows: List[IdState] = []
+        self._changed: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def rows(self) -> List[IdState]:
+        """Row-ordered states; the list only ever grows until :meth:`clear`."""
+        return self._rows
+
+    def get(self, arbitration_id: int) -> Optional[IdState]:
+        return self._by_id.get(arbitration_id)
+
+    def update(self, entry: RxEntry) -> IdState:
+        with self._lock:
+            state = self._by_id.get(entry.arbitration_id)
+            if state is None:
+                state = IdState(arbitration_id=entry.arbitration_id, row=len(self._rows), entry=entry)
+                self._by_id[entry.arbitration_id] = state
+                self._rows.append(state)
+            else:
+                state.update(entry)
+            self._changed.add(state.row)
+        return state
+
+    def take_changed(self) -> List[int]:
+        """Return the sorted rows changed since the previous call."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return sorted(changed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id = {}
+            self._rows = []
+            self._changed = set()
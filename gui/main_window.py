@@ -6,11 +6,15 @@ from typing import Dict, Optional
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from core.models import RxEntry, TxMessageModel
+from core.bus_stats import BusLoadSnapshot
+from core.models import TxMessageModel
+from core.signal_stats import SignalStat
 from gui.console import ConsoleWidget
 from gui.message_monitor import MessageMonitor
 from gui.generator_panel import GeneratorPanel
+from gui.plot_dock import SignalPlotDock
 from gui.signal_view import SignalView
+from gui.statistics_dock import BusStatisticsPanel
 from gui.transmit_panel import TransmitPanel
 
 
@@ -21,11 +25,17 @@ class MainWindow(QtWidgets.QMainWindow):
     disconnect_requested = QtCore.Signal()
     start_logging_requested = QtCore.Signal()
     stop_logging_requested = QtCore.Signal()
+    arm_trigger_requested = QtCore.Signal()
+    fire_trigger_requested = QtCore.Signal()
     start_replay_requested = QtCore.Signal()
     stop_replay_requested = QtCore.Signal()
     start_virtual_requested = QtCore.Signal(int, list, bool)
     stop_virtual_requested = QtCore.Signal()
     theme_toggle_requested = QtCore.Signal()
+    filter_changed = QtCore.Signal(str)
+    filter_logging_toggled = QtCore.Signal(bool)
+    find_requested = QtCore.Signal(str, bool)
+    profile_requested = QtCore.Signal(float)
 
     def __init__(self) -> None:
         super().__init__()
@@ -36,6 +46,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.signal_view = SignalView()
         self.tx_panel = TransmitPanel()
         self.generator_panel = GeneratorPanel()
+        self.plot_panel = SignalPlotDock()
+        self.statistics_panel = BusStatisticsPanel()
         self.console = ConsoleWidget()
 
         self._build_ui()
@@ -58,6 +70,14 @@ class MainWindow(QtWidgets.QMainWindow):
         generator_dock.setWidget(self.generator_panel)
         self.addDockWidget(QtCore.Qt.RightDockWidgetArea, generator_dock)
 
+        plot_dock = QtWidgets.QDockWidget("Signal Plot", self)
+        plot_dock.setWidget(self.plot_panel)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, plot_dock)
+
+        statistics_dock = QtWidgets.QDockWidget("Bus Statistics", self)
+        statistics_dock.setWidget(self.statistics_panel)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, statistics_dock)
+
         self.generator_panel.start_requested.connect(self.start_virtual_requested.emit)
         self.generator_panel.stop_requested.connect(self.stop_virtual_requested.emit)
 
@@ -78,6 +98,8 @@ class MainWindow(QtWidgets.QMainWindow):
             "Disconnect": ("ctrl+d", self.disconnect_requested.emit),
             "Start Logging": ("ctrl+l", self.start_logging_requested.emit),
             "Stop Logging": ("ctrl+shift+l", self.stop_logging_requested.emit),
+            "Arm Trigger": ("ctrl+shift+g", self.arm_trigger_requested.emit),
+            "Fire Trigger": ("f9", self.fire_trigger_requested.emit),
             "Start Replay": ("ctrl+r", self.start_replay_requested.emit),
             "Stop Replay": ("ctrl+shift+r", self.stop_replay_requested.emit),
             "Toggle Theme": ("ctrl+t", self.theme_toggle_requested.emit),
@@ -98,28 +120,104 @@ class MainWindow(QtWidgets.QMainWindow):
         stop_virtual.triggered.connect(self.generator_panel.stop_requested.emit)
         toolbar.addAction(stop_virtual)
 
+        self.fixed_trace_action = QtGui.QAction("Fixed Trace", self)
+        self.fixed_trace_action.setShortcut("ctrl+shift+f")
+        self.fixed_trace_action.setCheckable(True)
+        self.fixed_trace_action.toggled.connect(self.monitor.set_fixed_mode)
+        toolbar.addAction(self.fixed_trace_action)
+
+        self.profile_action = QtGui.QAction("Profile 10 s", self)
+        self.profile_action.setShortcut("ctrl+shift+p")
+        self.profile_action.setToolTip("Record a sampling profile of all threads for 10 seconds")
+        self.profile_action.triggered.connect(lambda: self.profile_requested.emit(10.0))
+        toolbar.addAction(self.profile_action)
+
+        go_to_time = QtGui.QAction("Go to Time", self)
+        go_to_time.setShortcut("ctrl+g")
+        go_to_time.triggered.connect(self._go_to_time)
+        toolbar.addAction(go_to_time)
+
+        filter_bar = self.addToolBar("Filter")
+        filter_bar.setMovable(False)
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter, e.g. 0x100-0x1FF or EngineData.Rpm > 3000")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.editingFinished.connect(lambda: self.filter_changed.emit(self.filter_edit.text()))
+        filter_bar.addWidget(QtWidgets.QLabel("Filter: "))
+        filter_bar.addWidget(self.filter_edit)
+        self.filter_logging_action = QtGui.QAction("Filter Logging", self)
+        self.filter_logging_action.setCheckable(True)
+        self.filter_logging_action.setToolTip("Apply the filter to logged frames as well")
+        self.filter_logging_action.toggled.connect(self.filter_logging_toggled.emit)
+        filter_bar.addAction(self.filter_logging_action)
+
+        filter_bar.addSeparator()
+        self.find_edit = QtWidgets.QLineEdit()
+        self.find_edit.setPlaceholderText('Find, e.g. 0x7DF, EngineData.Rpm > 6000 or data ~ "DE AD ?? EF"')
+        self.find_edit.setClearButtonEnabled(True)
+        self.find_edit.returnPressed.connect(lambda: self.find_requested.emit(self.find_edit.text(), True))
+        filter_bar.addWidget(QtWidgets.QLabel(" Find: "))
+        filter_bar.addWidget(self.find_edit)
+        find_focus = QtGui.QAction("Find", self)
+        find_focus.setShortcut("ctrl+f")
+        find_focus.triggered.connect(lambda: self.find_edit.setFocus())
+        self.addAction(find_focus)
+        # The trace lists newest first, so F3 walks down the view towards older frames.
+        for text, shortcut, older in (("Find Older", "f3", True), ("Find Newer", "shift+f3", False)):
+            action = QtGui.QAction(text, self)
+            action.setShortcut(shortcut)
+            action.triggered.connect(lambda _=False, older=older: self.find_requested.emit(self.find_edit.text(), older))
+            filter_bar.addAction(action)
+
     def _build_statusbar(self) -> None:
         self.status_messages = QtWidgets.QLabel("Disconnected")
         self.status_rx_count = QtWidgets.QLabel("Rx: 0")
         self.status_logging = QtWidgets.QLabel("Logging: stopped")
         self.status_virtual = QtWidgets.QLabel("Virtual: off")
+        self.status_decode_cache = QtWidgets.QLabel("Decode cache: -")
+        self.status_bus_load = QtWidgets.QLabel("Load: -")
         bar = self.statusBar()
         bar.addPermanentWidget(self.status_messages)
         bar.addPermanentWidget(self.status_rx_count)
         bar.addPermanentWidget(self.status_logging)
         bar.addPermanentWidget(self.status_virtual)
+        bar.addPermanentWidget(self.status_decode_cache)
+        bar.addPermanentWidget(self.status_bus_load)
+
+    def set_rx_count(self, count: int) -> None:
+        self.status_rx_count.setText(f"Rx: {count}")
 
-    def update_rx(self, entries: Dict[str, RxEntry]) -> None:
-        self.monitor.update_entries(list(entries.values()))
-        self.status_rx_count.setText(f"Rx: {len(entries)}")
+    def _go_to_time(self) -> None:
+        history = self.monitor.history
+        if history is None or not len(history):
+            return
+        first = history.get(history.first)
+        if first is None:
+            return
+        seconds, ok = QtWidgets.QInputDialog.getDouble(
+            self, "Go to Time", "Seconds since first retained frame", 0.0, 0.0, 1e9, 3
+        )
+        if ok:
+            self.monitor.scroll_to_time(first.timestamp + seconds)
 
     def update_signals(self, signals: Dict[str, Dict[str, str]]) -> None:
         self.signal_view.update_signals(signals)
 
+    def update_signal_statistics(self, stats: Dict[str, SignalStat]) -> None:
+        self.signal_view.update_statistics(stats)
+
     def set_tx_models(self, models: Dict[str, TxMessageModel]) -> None:
         self.tx_panel.set_messages(models)
         self.tx_panel.connect_signals()
         self.generator_panel.set_messages(list(models.keys()))
+        self.plot_panel.set_messages([model.message for model in models.values()])
+
+    def update_tx_models(self, models: Dict[str, TxMessageModel]) -> None:
+        """Swap in models from a reloaded DBC without resetting watched plot signals."""
+        names_changed = list(models) != list(self.tx_panel.models)
+        self.tx_panel.set_messages(models)
+        if names_changed:
+            self.generator_panel.set_messages(list(models.keys()))
 
     def log_message(self, text: str) -> None:
         self.console.log(text)
@@ -133,6 +231,29 @@ class MainWindow(QtWidgets.QMainWindow):
             label += f" ({path.name})"
         self.status_logging.setText(label)
 
+    def set_filter_error(self, error: Optional[str]) -> None:
+        self.filter_edit.setToolTip(error or "")
+        self.filter_edit.setStyleSheet("border: 1px solid #E5533D;" if error else "")
+
+    def set_find_error(self, error: Optional[str]) -> None:
+        self.find_edit.setToolTip(error or "")
+        self.find_edit.setStyleSheet("border: 1px solid #E5533D;" if error else "")
+
+    def set_profiling(self, active: bool) -> None:
+        self.profile_action.setEnabled(not active)
+        self.profile_action.setText("Profiling..." if active else "Profile 10 s")
+
+    def show_status(self, text: str, timeout_ms: int = 3000) -> None:
+        self.statusBar().showMessage(text, timeout_ms)
+
+    def set_bus_statistics(self, snapshot: BusLoadSnapshot, names: Dict[int, str]) -> None:
+        loads = ", ".join(f"{channel} {load:.1%}" for channel, load in snapshot.loads.items())
+        self.status_bus_load.setText(f"Load: {loads or '-'}")
+        self.statistics_panel.update_snapshot(snapshot, names)
+
+    def set_decode_cache_rate(self, hit_rate: float) -> None:
+        self.status_decode_cache.setText(f"Decode cache: {hit_rate:.0%} hits")
+
     def set_virtual_status(self, active: bool) -> None:
         self.status_virtual.setText("Virtual: on" if active else "Virtual: off")
 
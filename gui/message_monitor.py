@@ -1,51 +1,326 @@
 """Message monitor table view."""
 from __future__ import annotations
 
-from typing import Callable, List, Optional
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
 
 from PySide6 import QtCore, QtWidgets
 
-from core.models import RxEntry
+from core.models import RxEntry, flags_label
+from core.rx_history import RxHistory
+from core.trace import FixedTraceTable, IdState
 
 
-class MessageMonitor(QtWidgets.QTableWidget):
+def _format_ms(value: Optional[float]) -> str:
+    return "" if value is None else f"{value * 1000.0:.1f}"
+
+
+class RxTraceModel(QtCore.QAbstractTableModel):
+    """Chronological trace over an :class:`RxHistory`, newest first.
+
+    The row count is a snapshot taken by :meth:`refresh`, so rows map to
+    stable sequence numbers between refreshes. Rows in the cold tier are
+    fetched in pages and only when the view paints them.
+    """
+
+    HEADERS = ["Time", "ID (hex)", "ID (dec)", "Name", "Type", "DLC", "Data", "Decoded"]
+    PAGE_SIZE = 256
+    MAX_PAGES = 64
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._history: Optional[RxHistory] = None
+        self._total = 0
+        self._first = 0
+        self._pages: "OrderedDict[int, Tuple[int, List[RxEntry]]]" = OrderedDict()
+
+    def set_history(self, history: RxHistory) -> None:
+        self.beginResetModel()
+        self._history = history
+        self._total = history.total
+        self._first = history.first
+        self._pages.clear()
+        self.endResetModel()
+
+    def refresh(self) -> int:
+        """Pick up frames appended or dropped since the last call; returns rows added."""
+        history = self._history
+        if history is None:
+            return 0
+        total, first = history.total, history.first
+        if total < self._total:
+            self.set_history(history)
+            return 0
+        added = total - self._total
+        if added:
+            self.beginInsertRows(QtCore.QModelIndex(), 0, added - 1)
+            self._total = total
+            self.endInsertRows()
+        dropped = first - self._first
+        if dropped > 0:
+            rows = self._total - self._first
+            self.beginRemoveRows(QtCore.QModelIndex(), rows - dropped, rows - 1)
+            self._first = first
+            self._pages.clear()
+            self.endRemoveRows()
+        return added
+
+    @property
+    def history(self) -> Optional[RxHistory]:
+        return self._history
+
+    def redecode(self) -> None:
+        """Drop cached pages and repaint names and decoded values, e.g. after a DBC reload."""
+        self._pages.clear()
+        rows = self.rowCount()
+        if rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, len(self.HEADERS) - 1))
+
+    def seq(self, row: int) -> int:
+        return self._total - 1 - row
+
+    def row(self, seq: int) -> int:
+        return self._total - 1 - seq
+
+    def entry(self, row: int) -> Optional[RxEntry]:
+        history = self._history
+        seq = self.seq(row)
+        if history is None or not self._first <= seq < self._total:
+            return None
+        if seq >= history.total - history.hot_capacity:
+            return history.get(seq)
+        page = seq // self.PAGE_SIZE
+        cached = self._pages.get(page)
+        if cached is None:
+            cached = (max(page * self.PAGE_SIZE, history.first), history.page(page * self.PAGE_SIZE, self.PAGE_SIZE))
+            self._pages[page] = cached
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        start, entries = cached
+        index = seq - start
+        return entries[index] if 0 <= index < len(entries) else None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 - Qt API
+        return 0 if parent.isValid() else self._total - self._first
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 - Qt API
+        return len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole) -> Any:  # noqa: N802
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        entry = self.entry(index.row())
+        if entry is None:
+            return None
+        column = index.column()
+        if column == 0:
+            return f"{entry.timestamp:.3f}"
+        if column == 1:
+            return hex(entry.arbitration_id)
+        if column == 2:
+            return str(entry.arbitration_id)
+        if column == 3:
+            return entry.message_name or ""
+        if column == 4:
+            return flags_label(entry.flags)
+        if column == 5:
+            return str(entry.dlc)
+        if column == 6:
+            return entry.data_hex
+        return "; ".join(f"{k}={v}" for k, v in entry.decoded.items())
+
+
+class FixedTraceModel(QtCore.QAbstractTableModel):
+    """Fixed trace: one row per arbitration ID backed by a :class:`FixedTraceTable`."""
+
+    HEADERS = [
+        "Time",
+        "ID (hex)",
+        "ID (dec)",
+        "Name",
+        "Type",
+        "DLC",
+        "Data",
+        "Count",
+        "Δt (ms)",
+        "Min (ms)",
+        "Max (ms)",
+        "Avg (ms)",
+    ]
+
+    def __init__(self, table: FixedTraceTable, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._table = table
+        self._rows = 0
+
+    def reset(self) -> None:
+        self.beginResetModel()
+        self._rows = len(self._table)
+        self.endResetModel()
+
+    def refresh(self, changed_rows: List[int]) -> None:
+        """Insert newly seen IDs and repaint only the rows in ``changed_rows``."""
+        total = len(self._table)
+        if total < self._rows:
+            self.reset()
+            return
+        if total > self._rows:
+            self.beginInsertRows(QtCore.QModelIndex(), self._rows, total - 1)
+            self._rows = total
+            self.endInsertRows()
+        last_column = len(self.HEADERS) - 1
+        for row in changed_rows:
+            if row < self._rows:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+    def state(self, row: int) -> Optional[IdState]:
+        if 0 <= row < self._rows:
+            return self._table.rows[row]
+        return None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 - Qt API
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 - Qt API
+        return len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole) -> Any:  # noqa: N802
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        state = self._table.rows[index.row()]
+        entry = state.entry
+        column = index.column()
+        if column == 0:
+            return f"{entry.timestamp:.3f}"
+        if column == 1:
+            return hex(entry.arbitration_id)
+        if column == 2:
+            return str(entry.arbitration_id)
+        if column == 3:
+            return entry.message_name or ""
+        if column == 4:
+            return flags_label(entry.flags)
+        if column == 5:
+            return str(entry.dlc)
+        if column == 6:
+            return entry.data_hex
+        if column == 7:
+            return str(state.count)
+        if column == 8:
+            return _format_ms(state.last_delta)
+        if column == 9:
+            return _format_ms(state.min_cycle)
+        if column == 10:
+            return _format_ms(state.max_cycle)
+        return _format_ms(state.avg_cycle)
+
+
+class MessageMonitor(QtWidgets.QTableView):
+    """RX trace with a chronological mode and a CANoe-style fixed (per-ID) mode."""
+
     selection_changed = QtCore.Signal(int)
 
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
         super().__init__(parent)
-        self.setColumnCount(7)
-        self.setHorizontalHeaderLabels([
-            "Time",
-            "ID (hex)",
-            "ID (dec)",
-            "Name",
-            "DLC",
-            "Data",
-            "Decoded",
-        ])
         self.setAlternatingRowColors(True)
         self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
         self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.verticalHeader().setVisible(False)
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerItem)
         self.horizontalHeader().setStretchLastSection(True)
-        self._entries: List[RxEntry] = []
-        self.itemSelectionChanged.connect(self._on_selection_changed)
-
-    def update_entries(self, entries: List[RxEntry]) -> None:
-        self._entries = entries
-        self.setRowCount(len(entries))
-        for row, entry in enumerate(entries):
-            self._set_row(row, entry)
-
-    def _set_row(self, row: int, entry: RxEntry) -> None:
-        self.setItem(row, 0, QtWidgets.QTableWidgetItem(f"{entry.timestamp:.3f}"))
-        self.setItem(row, 1, QtWidgets.QTableWidgetItem(hex(entry.arbitration_id)))
-        self.setItem(row, 2, QtWidgets.QTableWidgetItem(str(entry.arbitration_id)))
-        self.setItem(row, 3, QtWidgets.QTableWidgetItem(entry.message_name or ""))
-        self.setItem(row, 4, QtWidgets.QTableWidgetItem(str(entry.dlc)))
-        self.setItem(row, 5, QtWidgets.QTableWidgetItem(entry.data_hex))
-        decoded = "; ".join(f"{k}={v}" for k, v in entry.decoded.items())
-        self.setItem(row, 6, QtWidgets.QTableWidgetItem(decoded))
+        self._trace_model = RxTraceModel(self)
+        self._fixed_model: Optional[FixedTraceModel] = None
+        self._fixed_mode = False
+        self._set_model(self._trace_model)
+
+    @property
+    def fixed_mode(self) -> bool:
+        return self._fixed_mode
+
+    def set_fixed_source(self, table: FixedTraceTable) -> None:
+        """Attach the per-ID table rendered in fixed mode."""
+        self._fixed_model = FixedTraceModel(table, self)
+        if self._fixed_mode:
+            self._fixed_model.reset()
+            self._set_model(self._fixed_model)
+
+    def set_fixed_mode(self, enabled: bool) -> None:
+        if enabled and not self._fixed_model:
+            return
+        self._fixed_mode = enabled
+        if enabled:
+            assert self._fixed_model
+            self._fixed_model.reset()
+            self._set_model(self._fixed_model)
+        else:
+            self._set_model(self._trace_model)
+
+    @property
+    def history(self) -> Optional[RxHistory]:
+        return self._trace_model.history
+
+    def set_history(self, history: RxHistory) -> None:
+        self._trace_model.set_history(history)
+
+    def redecode(self) -> None:
+        """Repaint names and decoded values after the DBC changed under the history."""
+        self._trace_model.redecode()
+        if self._fixed_mode and self._fixed_model:
+            self._fixed_model.reset()
+
+    def refresh_history(self) -> None:
+        """Show newly received frames without moving a scrolled-back view."""
+        scrollbar = self.verticalScrollBar()
+        position = scrollbar.value()
+        added = self._trace_model.refresh()
+        if added and position > 0 and not self._fixed_mode:
+            scrollbar.setValue(position + added)
+
+    def scroll_to_time(self, timestamp: float) -> None:
+        """Select and show the first frame at or after ``timestamp`` in the chronological trace."""
+        history = self._trace_model.history
+        if self._fixed_mode or history is None or not len(history):
+            return
+        self.select_seq(min(history.index_at(timestamp), history.total - 1))
+
+    def current_seq(self) -> Optional[int]:
+        """Sequence number of the selected frame in the chronological trace."""
+        rows = self.selectionModel().selectedRows()
+        if self._fixed_mode or not rows:
+            return None
+        return self._trace_model.seq(rows[0].row())
+
+    def select_seq(self, seq: int) -> None:
+        """Select and centre the frame with sequence number ``seq``."""
+        self.refresh_history()
+        row = self._trace_model.row(seq)
+        if not 0 <= row < self._trace_model.rowCount():
+            return
+        index = self._trace_model.index(row, 0)
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+
+    def refresh_fixed(self, changed_rows: List[int]) -> None:
+        if self._fixed_model:
+            self._fixed_model.refresh(changed_rows)
+
+    def _set_model(self, model: QtCore.QAbstractTableModel) -> None:
+        self.setModel(model)
+        self.selectionModel().selectionChanged.connect(self._on_selection_changed)
 
     def _on_selection_changed(self) -> None:
         rows = self.selectionModel().selectedRows()
@@ -58,4 +333,8 @@ class MessageMonitor(QtWidgets.QTableWidget):
         rows = self.selectionModel().selectedRows()
         if not rows:
             return None
-        return self._entries[rows[0].row()]
+        row = rows[0].row()
+        if self._fixed_mode and self._fixed_model:
+            state = self._fixed_model.state(row)
+            return state.entry if state else None
+        return self._trace_model.entry(row)
@@ -0,0 +1,273 @@
+"""Live signal plotting dock drawn with plain QPainter."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from core.signal_history import SignalHistoryStore
+
+SPANS = [("10 s", 10.0), ("1 min", 60.0), ("10 min", 600.0), ("1 h", 3600.0)]
+# Point budget of even a one-pixel strip: enough for the raw samples of a few
+# level-0 buckets, so a narrow strip is not left to coarse buckets that start
+# before it (and so draws nothing).
+MIN_STRIP_POINTS = 64
+
+
+@dataclass
+class PlotTrace:
+    message: str
+    signal: str
+    color: QtGui.QColor
+    minimum: float
+    maximum: float
+    last_point: Optional[Tuple[float, float]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.message}.{self.signal}"
+
+
+class SignalPlotCanvas(QtWidgets.QWidget):
+    """Scrolling strip chart that only paints newly appended time.
+
+    Every tick the backing pixmap is scrolled left by the elapsed pixels and
+    only the exposed strip on the right is drawn from decimated history, so
+    the cost per frame depends on the widget width, not on the bus load.
+    """
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setMinimumHeight(120)
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self._store: Optional[SignalHistoryStore] = None
+        self._traces: List[PlotTrace] = []
+        self._span = SPANS[0][1]
+        self._stacked = True
+        self._pixmap = QtGui.QPixmap()
+        self._right_time = 0.0
+        self._needs_full = True
+        self._timer = QtCore.QTimer(self)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.setInterval(16)
+        self._timer.timeout.connect(self._tick)
+
+    def set_store(self, store: SignalHistoryStore) -> None:
+        self._store = store
+        self._needs_full = True
+
+    def set_span(self, seconds: float) -> None:
+        self._span = seconds
+        self._needs_full = True
+
+    def set_stacked(self, stacked: bool) -> None:
+        self._stacked = stacked
+        self._needs_full = True
+
+    def add_trace(self, trace: PlotTrace) -> None:
+        self._traces.append(trace)
+        self._needs_full = True
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def remove_trace(self, message: str, signal: str) -> None:
+        self._traces = [t for t in self._traces if (t.message, t.signal) != (message, signal)]
+        self._needs_full = True
+        if not self._traces:
+            self._timer.stop()
+            self.update()
+
+    def clear_traces(self) -> None:
+        self._traces = []
+        self._timer.stop()
+        self._needs_full = True
+        self.update()
+
+    # Rendering
+    def resizeEvent(self, event: QtGui.QResizeEvent) -> None:  # noqa: N802 - Qt API
+        self._needs_full = True
+        super().resizeEvent(event)
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:  # noqa: N802 - Qt API
+        painter = QtGui.QPainter(self)
+        if self._pixmap.isNull() or not self._traces:
+            painter.fillRect(self.rect(), self.palette().base())
+            painter.setPen(self.palette().text().color())
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "Select signals to plot")
+            return
+        painter.drawPixmap(0, 0, self._pixmap)
+        for index, trace in enumerate(self._traces):
+            top, _ = self._lane(index)
+            painter.setPen(trace.color)
+            painter.drawText(4, int(top) + 12, trace.label)
+
+    def _tick(self) -> None:
+        if not self._store or not self._traces or self.width() <= 0 or self.height() <= 0:
+            return
+        now = time.time()
+        pixels_per_second = self.width() / self._span
+        if self._needs_full or self._pixmap.size() != self.size():
+            self._redraw_all(now)
+            self.update()
+            return
+        dx = int((now - self._right_time) * pixels_per_second)
+        if dx <= 0:
+            return
+        if dx >= self.width():
+            self._redraw_all(now)
+        else:
+            t0 = self._right_time
+            self._right_time += dx / pixels_per_second
+            self._pixmap.scroll(-dx, 0, self._pixmap.rect())
+            for trace in self._traces:
+                if trace.last_point:
+                    x, y = trace.last_point
+                    trace.last_point = (x - dx, y)
+            self._draw_strip(self.width() - dx, self.width(), t0, self._right_time)
+        self.update()
+
+    def _redraw_all(self, now: float) -> None:
+        self._pixmap = QtGui.QPixmap(self.size())
+        self._right_time = now
+        for trace in self._traces:
+            trace.last_point = None
+        self._needs_full = False
+        self._draw_strip(0, self.width(), now - self._span, now)
+
+    def _lane(self, index: int) -> Tuple[float, float]:
+        if not self._stacked:
+            return 0.0, float(self.height())
+        height = self.height() / max(1, len(self._traces))
+        return index * height, height
+
+    def _draw_strip(self, x0: int, x1: int, t0: float, t1: float) -> None:
+        assert self._store
+        painter = QtGui.QPainter(self._pixmap)
+        painter.fillRect(QtCore.QRect(x0, 0, x1 - x0, self.height()), self.palette().base())
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+        pixels_per_second = self.width() / self._span
+        origin = self._right_time - self._span
+        rescale = False
+        for index, trace in enumerate(self._traces):
+            t, v = self._store.query(trace.message, trace.signal, t0, t1, max_points=max(MIN_STRIP_POINTS, 2 * (x1 - x0)))
+            if not len(t):
+                continue
+            lo, hi = float(v.min()), float(v.max())
+            if lo < trace.minimum or hi > trace.maximum:
+                margin = (max(hi, trace.maximum) - min(lo, trace.minimum)) * 0.1 or 1.0
+                trace.minimum = min(lo, trace.minimum) - margin
+                trace.maximum = max(hi, trace.maximum) + margin
+                rescale = True
+            top, height = self._lane(index)
+            scale = (height - 4) / (trace.maximum - trace.minimum)
+            xs = (t - origin) * pixels_per_second
+            ys = top + height - 2 - (v - trace.minimum) * scale
+            points = [QtCore.QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+            if trace.last_point:
+                points.insert(0, QtCore.QPointF(*trace.last_point))
+            painter.setPen(trace.color)
+            painter.drawPolyline(QtGui.QPolygonF(points))
+            last = points[-1]
+            trace.last_point = (last.x(), last.y())
+        painter.end()
+        if rescale:
+            self._needs_full = True
+
+
+class SignalPlotDock(QtWidgets.QWidget):
+    """Signal picker plus :class:`SignalPlotCanvas`."""
+
+    watch_changed = QtCore.Signal(str, str, bool)
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self.signal_tree = QtWidgets.QTreeWidget()
+        self.signal_tree.setHeaderLabels(["Signal", "Unit"])
+        self.signal_tree.setUniformRowHeights(True)
+        self.signal_tree.itemChanged.connect(self._on_item_changed)
+        self.span_combo = QtWidgets.QComboBox()
+        for label, seconds in SPANS:
+            self.span_combo.addItem(label, seconds)
+        self.stacked_box = QtWidgets.QCheckBox("Stacked")
+        self.stacked_box.setChecked(True)
+        self.canvas = SignalPlotCanvas()
+
+        self.span_combo.currentIndexChanged.connect(lambda _: self.canvas.set_span(self.span_combo.currentData()))
+        self.stacked_box.toggled.connect(self.canvas.set_stacked)
+
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(QtWidgets.QLabel("Window:"))
+        controls.addWidget(self.span_combo)
+        controls.addWidget(self.stacked_box)
+        controls.addStretch()
+
+        right = QtWidgets.QVBoxLayout()
+        right.addLayout(controls)
+        right.addWidget(self.canvas, 1)
+
+        splitter = QtWidgets.QSplitter()
+        splitter.addWidget(self.signal_tree)
+        plot_area = QtWidgets.QWidget()
+        plot_area.setLayout(right)
+        splitter.addWidget(plot_area)
+        splitter.setStretchFactor(1, 3)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(splitter)
+
+        self._ranges: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._colors = 0
+
+    def set_store(self, store: SignalHistoryStore) -> None:
+        self.canvas.set_store(store)
+
+    def set_messages(self, messages: List) -> None:
+        """Populate the picker from cantools messages, unchecking everything."""
+        for message_name, signal_name in list(self._ranges):
+            if self._is_checked(message_name, signal_name):
+                self.watch_changed.emit(message_name, signal_name, False)
+        self.canvas.clear_traces()
+        self.signal_tree.blockSignals(True)
+        self.signal_tree.clear()
+        self._ranges = {}
+        for message in messages:
+            parent = QtWidgets.QTreeWidgetItem([message.name, ""])
+            for signal in message.signals:
+                item = QtWidgets.QTreeWidgetItem([signal.name, signal.unit or ""])
+                item.setCheckState(0, QtCore.Qt.Unchecked)
+                item.setData(0, QtCore.Qt.UserRole, (message.name, signal.name))
+                parent.addChild(item)
+                minimum = signal.minimum if signal.minimum is not None else 0.0
+                maximum = signal.maximum if signal.maximum is not None else minimum
+                self._ranges[(message.name, signal.name)] = (float(minimum), float(maximum))
+            self.signal_tree.addTopLevelItem(parent)
+        self.signal_tree.blockSignals(False)
+
+    def _is_checked(self, message_name: str, signal_name: str) -> bool:
+        for i in range(self.signal_tree.topLevelItemCount()):
+            parent = self.signal_tree.topLevelItem(i)
+            for j in range(parent.childCount()):
+                item = parent.child(j)
+                if item.data(0, QtCore.Qt.UserRole) == (message_name, signal_name):
+                    return item.checkState(0) == QtCore.Qt.Checked
+        return False
+
+    def _on_item_changed(self, item: QtWidgets.QTreeWidgetItem, column: int) -> None:
+        key = item.data(0, QtCore.Qt.UserRole)
+        if not key:
+            return
+        message_name, signal_name = key
+        checked = item.checkState(0) == QtCore.Qt.Checked
+        if checked:
+            minimum, maximum = self._ranges.get(key, (0.0, 0.0))
+            if maximum <= minimum:
+                maximum = minimum + 1.0
+            color = QtGui.QColor.fromHsv((self._colors * 137) % 360, 200, 230)
+            self._colors += 1
+            self.canvas.add_trace(PlotTrace(message_name, signal_name, color, minimum, maximum))
+        else:
+            self.canvas.remove_trace(message_name, signal_name)
+        self.watch_changed.emit(message_name, signal_name, checked)
@@ -5,17 +5,28 @@ from typing import Dict, Optional
 
 from PySide6 import QtWidgets
 
+from core.signal_stats import SignalStat
+
+STAT_COLUMN = 5
+
 
 class SignalView(QtWidgets.QTableWidget):
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
         super().__init__(parent)
-        self.setColumnCount(5)
+        self.setColumnCount(12)
         self.setHorizontalHeaderLabels([
             "Signal",
             "Phys",
             "Raw",
             "Unit",
             "Range",
+            "Count",
+            "Min",
+            "Max",
+            "Mean",
+            "Std Dev",
+            "Last Change",
+            "Rate/s",
         ])
         self.setAlternatingRowColors(True)
         self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
@@ -30,3 +41,23 @@ class SignalView(QtWidgets.QTableWidget):
             self.setItem(row, 2, QtWidgets.QTableWidgetItem(str(meta.get("raw"))))
             self.setItem(row, 3, QtWidgets.QTableWidgetItem(meta.get("unit", "")))
             self.setItem(row, 4, QtWidgets.QTableWidgetItem(meta.get("range", "")))
+
+    def update_statistics(self, stats: Dict[str, SignalStat]) -> None:
+        """Fill the statistics columns of the rows whose signal is in ``stats``."""
+        for row in range(self.rowCount()):
+            item = self.item(row, 0)
+            stat = stats.get(item.text()) if item else None
+            if stat is None:
+                cells = [""] * 7
+            else:
+                cells = [
+                    str(stat.count),
+                    f"{stat.minimum:g}",
+                    f"{stat.maximum:g}",
+                    f"{stat.mean:.6g}",
+                    f"{stat.std:.6g}",
+                    f"{stat.last_change:.3f}" if stat.last_change is not None else "",
+                    f"{stat.rate:.6g}" if stat.rate is not None else "",
+                ]
+            for offset, text in enumerate(cells):
+                self.setItem(row, STAT_COLUMN + offset, QtWidgets.QTableWidgetItem(text))
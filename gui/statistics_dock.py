@@ -0,0 +1,58 @@
+"""Bus statistics dock: load per channel and top talkers."""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from PySide6 import QtCore, QtWidgets
+
+from core.bus_stats import BusLoadSnapshot
+
+
+class BusStatisticsPanel(QtWidgets.QWidget):
+    """Shows bus load per channel and the IDs using the most bus time."""
+
+    HEADERS = ["ID (hex)", "Name", "Frames/s", "Bytes/s", "Load %"]
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None, talkers: int = 20) -> None:
+        super().__init__(parent)
+        self.talkers = talkers
+        self.load_layout = QtWidgets.QFormLayout()
+        self._bars: Dict[str, QtWidgets.QProgressBar] = {}
+
+        self.table = QtWidgets.QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setAlternatingRowColors(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(self.load_layout)
+        layout.addWidget(QtWidgets.QLabel("Top talkers"))
+        layout.addWidget(self.table)
+
+    def update_snapshot(self, snapshot: BusLoadSnapshot, names: Dict[int, str]) -> None:
+        for channel, load in snapshot.loads.items():
+            bar = self._bars.get(channel)
+            if bar is None:
+                bar = self._bars[channel] = QtWidgets.QProgressBar()
+                bar.setRange(0, 1000)
+                self.load_layout.addRow(channel, bar)
+            bar.setValue(min(1000, int(load * 1000)))
+            bar.setFormat(f"{load:.1%}  ({snapshot.frames_per_s.get(channel, 0.0):.0f} frames/s)")
+
+        talkers = snapshot.top_talkers(self.talkers)
+        self.table.setRowCount(len(talkers))
+        for row, rate in enumerate(talkers):
+            values = [
+                hex(rate.arbitration_id),
+                names.get(rate.arbitration_id, ""),
+                f"{rate.frames_per_s:.1f}",
+                f"{rate.bytes_per_s:.0f}",
+                f"{rate.load * 100.0:.2f}",
+            ]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(value)
+                if column >= 2:
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
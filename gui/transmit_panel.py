@@ -43,11 +43,18 @@ class TransmitPanel(QtWidgets.QWidget):
         self._models: Dict[str, TxMessageModel] = {}
         self._cyclic_running = False
 
+    @property
+    def models(self) -> Dict[str, TxMessageModel]:
+        return self._models
+
     def set_messages(self, models: Dict[str, TxMessageModel]) -> None:
+        current = self.message_combo.currentText()
         self._models = models
         self.message_combo.clear()
         for name in models:
             self.message_combo.addItem(name)
+        if current in models:
+            self.message_combo.setCurrentText(current)
         self._rebuild_signals()
 
     def _rebuild_signals(self) -> None:
@@ -87,5 +94,13 @@ class TransmitPanel(QtWidgets.QWidget):
         self.cyclic_button.setText("Stop cyclic" if active else "Start cyclic")
         self.toggle_cyclic.emit(name, {k: v.value for k, v in model.signals.items()}, period, active)
 
+    def set_cyclic_stopped(self, name: str) -> None:
+        """Reflect that cyclic transmission of ``name`` was stopped by the controller, e.g. after an error."""
+        model = self._models.get(name)
+        if model is not None:
+            model.active = False
+        if self.message_combo.currentText() == name:
+            self.cyclic_button.setText("Start cyclic")
+
     def connect_signals(self) -> None:
         self.message_combo.currentTextChanged.connect(lambda _: self._rebuild_signals())
@@ -0,0 +1,56 @@
+"""Dialog for arming trigger-based capture."""
+from __future__ import annotations
+
+from typing import Optional
+
+from PySide6 import QtWidgets
+
+
+class TriggerDialog(QtWidgets.QDialog):
+    """Collects the trigger condition and the pre/post-trigger windows."""
+
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None, expression: str = "") -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Arm Trigger Capture")
+        self.expression_edit = QtWidgets.QLineEdit(expression)
+        self.expression_edit.setPlaceholderText("e.g. 0x7DF or EngineData.Rpm > 6000 (empty = manual only)")
+        self.pre_spin = QtWidgets.QDoubleSpinBox()
+        self.pre_spin.setRange(0.0, 3600.0)
+        self.pre_spin.setValue(5.0)
+        self.pre_spin.setSuffix(" s")
+        self.post_spin = QtWidgets.QDoubleSpinBox()
+        self.post_spin.setRange(0.0, 3600.0)
+        self.post_spin.setValue(5.0)
+        self.post_spin.setSuffix(" s")
+        self.error_box = QtWidgets.QCheckBox("Trigger on error frames")
+        self.error_box.setChecked(True)
+
+        form = QtWidgets.QFormLayout()
+        form.addRow("Condition", self.expression_edit)
+        form.addRow("Pre-trigger", self.pre_spin)
+        form.addRow("Post-trigger", self.post_spin)
+        form.addRow("", self.error_box)
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    @property
+    def expression(self) -> str:
+        return self.expression_edit.text().strip()
+
+    @property
+    def pre_trigger(self) -> float:
+        return self.pre_spin.value()
+
+    @property
+    def post_trigger(self) -> float:
+        return self.post_spin.value()
+
+    @property
+    def on_error_frame(self) -> bool:
+        return self.error_box.isChecked()
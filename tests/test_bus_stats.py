@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from core.bus_stats import BusStatistics, crc15, frame_bits, stuff_bits
+from core.config import BusConfig
+from core.models import FLAG_BRS, FLAG_EXTENDED, FLAG_FD
+
+
+def _stuff_reference(bits: str) -> int:
+    count, last, run = 0, "", 0
+    for bit in bits:
+        run = run + 1 if bit == last else 1
+        last = bit
+        if run == 5:
+            count += 1
+            last, run = ("1" if bit == "0" else "0"), 1
+    return count
+
+
+def _crc_reference(bits: str) -> int:
+    crc = 0
+    for bit in bits:
+        top = ((crc >> 14) & 1) ^ (bit == "1")
+        crc = ((crc << 1) & 0x7FFF) ^ (0x4599 if top else 0)
+    return crc
+
+
+def test_stuffing_and_crc_match_bitwise_reference() -> None:
+    rng = random.Random(7)
+    for _ in range(500):
+        bits = "".join(rng.choice(rng.choice(["01", "0001", "0111"])) for _ in range(rng.randint(1, 200)))
+        assert stuff_bits(bits) == _stuff_reference(bits)
+        head = bits[:30]
+        data = bytes(rng.randrange(256) for _ in range(rng.randint(0, 8)))
+        assert crc15(head, data) == _crc_reference(head + "".join(f"{b:08b}" for b in data))
+
+
+def test_frame_lengths() -> None:
+    nominal, data_phase = frame_bits(0x555, bytes([0x55] * 8), 0)
+    assert data_phase == 0 and 111 <= nominal <= 135
+    assert frame_bits(0x18FEF100, bytes(8), FLAG_EXTENDED)[0] > frame_bits(0x100, bytes(8), 0)[0]
+    nominal, data_phase = frame_bits(0x123, bytes(64), FLAG_FD | FLAG_BRS)
+    assert nominal < 40 and data_phase > 64 * 8
+    assert frame_bits(0x123, bytes(64), FLAG_FD)[1] == 0
+
+
+def test_load_and_top_talkers_over_sliding_window() -> None:
+    config = BusConfig(channel="can0", bitrate=500_000)
+    stats = BusStatistics(config, window=1.0, buckets=10)
+    bits = frame_bits(0x100, bytes(8), 0)[0]
+    for i in range(1000):
+        stats.update(100.0 + i * 0.001, 0x100, bytes(8), 0)
+        if i % 10 == 0:
+            stats.update(100.0 + i * 0.001, 0x200, bytes(2), 0)
+    snapshot = stats.snapshot(now=100.999)
+    rates = {rate.arbitration_id: rate for rate in snapshot.ids}
+    assert rates[0x100].frames_per_s == pytest.approx(1000, rel=0.02)
+    assert rates[0x200].bytes_per_s == pytest.approx(200, rel=0.05)
+    assert snapshot.loads["can0"] > rates[0x100].load == pytest.approx(bits * 1000 / 500_000, rel=0.02)
+    assert [rate.arbitration_id for rate in snapshot.top_talkers(2)] == [0x100, 0x200]
+    assert stats.snapshot(now=105.0).loads["can0"] == 0.0
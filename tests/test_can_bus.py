@@ -0,0 +1,37 @@
+import threading
+
+import can
+
+from canio.can_bus import CanBusController, ReceivedMessage
+from core.config import BusConfig
+
+
+def test_fd_frames_round_trip_on_virtual_bus() -> None:
+    config = BusConfig(channel="test-fd", interface="virtual", fd=True, data_bitrate=2_000_000)
+    received = []
+    done = threading.Event()
+
+    def on_message(message: ReceivedMessage) -> None:
+        received.append(message)
+        done.set()
+
+    listener = CanBusController(config)
+    listener.set_callback(on_message)
+    listener.start()
+    sender = CanBusController(config)
+    sender.start()
+    try:
+        sender.send(0x123, bytes(range(64)))
+        assert done.wait(2.0)
+    finally:
+        sender.stop()
+        listener.stop()
+    message = received[0]
+    assert message.is_fd and message.bitrate_switch and message.data == bytes(range(64))
+
+
+def test_bit_timing_from_sample_points() -> None:
+    config = BusConfig(fd=True, bitrate=500_000, data_bitrate=2_000_000, f_clock=80_000_000, sample_point=80.0)
+    kwargs = config.to_kwargs()
+    assert kwargs["data_bitrate"] == 2_000_000
+    assert isinstance(kwargs["timing"], can.BitTimingFd)
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+from app.convert import convert, main
+from canio.can_bus import ReceivedMessage
+from canio.formats import parse_asc_line, parse_candump_line
+from canio.logger import LogReplay, SessionLogger
+
+
+def _write_log(path: Path, frames: int) -> None:
+    logger = SessionLogger(path)
+    for i in range(frames):
+        arbitration_id = 0x100 if i % 2 else 0x18FEF100
+        logger.log(ReceivedMessage(1000.0 + i * 0.001, arbitration_id, bytes([i % 256, 1, 2, 3, 4, 5, 6, 7]), False))
+    logger.close()
+
+
+def test_parsers() -> None:
+    event = parse_candump_line("(1600000000.500000) can0 18FEF100#DEADBEEF")
+    assert event and event.arbitration_id == 0x18FEF100 and event.data == bytes.fromhex("DEADBEEF")
+    event = parse_asc_line("   0.010000 1  123             Rx   d 2 01 02")
+    assert event and event.arbitration_id == 0x123 and event.data == b"\x01\x02"
+    assert parse_asc_line("Begin Triggerblock") is None
+
+
+def test_roundtrip_through_all_formats_in_parallel(tmp_path: Path) -> None:
+    source = tmp_path / "session.csv"
+    _write_log(source, 500)
+    candump = tmp_path / "out.log"
+    asc = tmp_path / "out.asc"
+    back = tmp_path / "back.csv"
+    assert convert(source, candump, "candump", jobs=2, chunk_bytes=997) == 500
+    assert convert(candump, asc, "asc", jobs=2, chunk_bytes=1013) == 500
+    assert convert(asc, back, "csv", jobs=2, chunk_bytes=1201) == 500
+    original = list(LogReplay(source))
+    result = list(LogReplay(back))
+    assert [(e.arbitration_id, e.data) for e in result] == [(e.arbitration_id, e.data) for e in original]
+    assert abs((result[-1].timestamp - result[0].timestamp) - 0.499) < 1e-6
+
+
+def test_decoded_csv(tmp_path: Path) -> None:
+    source = tmp_path / "session.csv"
+    _write_log(source, 20)
+    target = tmp_path / "decoded.csv"
+    progress = []
+    convert(source, target, "csv", dbc_path=Path("data/sample.dbc"), jobs=1, progress=lambda *a: progress.append(a))
+    lines = target.read_text().splitlines()
+    assert lines[0] == "timestamp,id,dlc,data,flags,name,signals"
+    assert ",ExampleMessage,Speed=" in lines[2]
+    assert progress[-1][2] == 20
+
+
+def test_decoded_csv_names_choices_like_the_application(tmp_path: Path) -> None:
+    dbc = tmp_path / "choices.dbc"
+    dbc.write_text(Path("data/sample.dbc").read_text() + '\nVAL_ 256 Rpm 770 "Idle" ;\n')
+    source = tmp_path / "session.csv"
+    _write_log(source, 20)
+    target = tmp_path / "decoded.csv"
+    convert(source, target, "csv", dbc_path=dbc, jobs=2, chunk_bytes=300)
+    assert ";Rpm=Idle" in target.read_text().splitlines()[2]
+
+
+def test_cli_reports_a_bad_dbc_and_writes_a_profile(tmp_path: Path, capsys) -> None:
+    source = tmp_path / "session.csv"
+    _write_log(source, 20)
+    bad = tmp_path / "bad.dbc"
+    bad.write_text("BO_ nonsense")
+    assert main([str(source), str(tmp_path / "out"), "--to", "npy", "--dbc", str(bad)]) == 2
+    assert main([str(source), str(tmp_path / "out.csv"), "--dbc", str(bad), "--quiet"]) == 2
+    assert capsys.readouterr().err.count("Conversion failed") == 2
+    profile = tmp_path / "convert.collapsed.txt"
+    assert main([str(source), str(tmp_path / "out.log"), "--to", "candump", "--quiet", "--profile", str(profile)]) == 0
+    assert profile.exists()
+
+
+def test_fd_frames_keep_flags_through_every_format() -> None:
+    from canio.formats import format_asc, format_candump, format_csv
+    from canio.logger import ReplayEvent
+    from core.models import FLAG_BRS, FLAG_EXTENDED, FLAG_FD
+
+    flags = FLAG_FD | FLAG_BRS | FLAG_EXTENDED
+    event = ReplayEvent(10.5, 0x18DA00F1, bytes(range(64)), flags)
+    line = format_candump(event)
+    assert "18DA00F1##1" in line
+    assert parse_candump_line(line).flags == flags  # type: ignore[union-attr]
+    parsed = parse_asc_line(format_asc(event, 10.0))
+    assert parsed and parsed.flags == flags and parsed.data == event.data
+    assert format_csv(event).rstrip().endswith(f",{flags}")
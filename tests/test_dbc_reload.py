@@ -0,0 +1,109 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.pipeline import RxPipeline
+from canio.can_bus import ReceivedMessage
+from core.dbc_manager import DbcLoadError, DbcManager, DbcWatcher, diff_dbc
+from core.dbc_reload import HistoryRedecoder
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistoryStore
+
+SAMPLE = Path("data/sample.dbc")
+
+
+def _edited_copy(tmp_path: Path) -> Path:
+    path = tmp_path / "sample.dbc"
+    shutil.copy(SAMPLE, path)
+    return path
+
+
+def _rescale_speed(path: Path) -> None:
+    text = path.read_text()
+    assert "(0.01,0)" in text
+    path.write_text(text.replace("(0.01,0)", "(0.1,0)", 1))
+
+
+def test_diff_reports_only_changed_messages(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    manager = DbcManager()
+    old = manager.load(path)
+    assert not diff_dbc(old, DbcManager().load(path))
+    _rescale_speed(path)
+    loaded, diff = manager.reload()
+    assert manager.loaded is loaded and loaded is not old
+    assert diff.changed == {0x100} and not diff.added and not diff.removed
+    assert diff.describe() == "0 added, 0 removed, 1 changed"
+
+
+def test_diff_notices_frame_length_and_fd_changes(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    old = DbcManager().load(path)
+    path.write_text(path.read_text().replace("ExampleMessage: 8", "ExampleMessage: 16", 1))
+    assert diff_dbc(old, DbcManager().load(path)).changed == {0x100}
+    fd = DbcManager().load(SAMPLE)
+    fd.database.get_message_by_frame_id(0x100).is_fd = True
+    assert diff_dbc(old, fd).changed == {0x100}
+
+
+def test_failed_reload_keeps_previous_dbc(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    manager = DbcManager()
+    old = manager.load(path)
+    path.write_text("BO_ not a dbc")
+    with pytest.raises(DbcLoadError):
+        manager.reload()
+    assert manager.loaded is old
+
+
+def test_watcher_waits_for_file_to_settle(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    watcher = DbcWatcher(path)
+    assert not watcher.poll()
+    path.write_text(path.read_text() + "\n")
+    assert not watcher.poll()
+    assert watcher.poll()
+    assert not watcher.poll()
+
+
+def test_rebase_keeps_unaffected_cache_entries(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    manager = DbcManager()
+    pipeline = RxPipeline(manager, RxHistory())
+    old = manager.load(path)
+    pipeline.decode(0x100, bytes(8))
+    pipeline.decode(0x7FF, b"\x01")
+    _rescale_speed(path)
+    loaded, diff = manager.reload()
+    pipeline.decode_cache.rebase(loaded, diff.affected)
+    hits, misses = pipeline.decode_cache.hits, pipeline.decode_cache.misses
+    pipeline.decode(0x7FF, b"\x01")
+    pipeline.decode(0x100, bytes(8))
+    assert (pipeline.decode_cache.hits, pipeline.decode_cache.misses) == (hits + 1, misses + 1)
+    assert old is not loaded
+
+
+def test_redecoder_refreshes_entries_and_watched_signals(tmp_path) -> None:
+    path = _edited_copy(tmp_path)
+    manager = DbcManager()
+    history = RxHistory()
+    store = SignalHistoryStore()
+    pipeline = RxPipeline(manager, history, signal_history=store)
+    loaded = manager.load(path)
+    store.watch("ExampleMessage", "Speed")
+    payload = loaded.encode("ExampleMessage", {"Speed": 10.0, "Rpm": 0})
+    entries = [pipeline.process(ReceivedMessage(float(i), 0x100, payload, False)) for i in range(10)]
+    pipeline.process(ReceivedMessage(10.0, 0x200, b"\x01", False))
+    assert entries[-1].decoded["Speed"] == pytest.approx(10.0)
+
+    _rescale_speed(path)
+    loaded, diff = manager.reload()
+    pipeline.decode_cache.rebase(loaded, diff.affected)
+    redecoder = HistoryRedecoder(history, loaded, diff, store, batch=4)
+    redecoder.run()
+
+    assert redecoder.done.is_set() and redecoder.invalidated >= 1 and redecoder.redecoded == 10
+    assert entries[-1].decoded["Speed"] == pytest.approx(100.0)
+    rebuilt = store.history("ExampleMessage", "Speed")
+    assert len(rebuilt) == 10 and rebuilt.last() == pytest.approx((9.0, 100.0))
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from core.dbc_manager import DbcManager
+from core.decode_cache import DecodeCache
+
+
+def test_repeated_and_alternating_payloads_hit() -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    message = loaded.database.get_message_by_name("ExampleMessage")
+    a = message.encode({"Speed": 10.0, "Rpm": 100})
+    b = message.encode({"Speed": 20.0, "Rpm": 200})
+    cache = DecodeCache(lru_size=8)
+
+    first = cache.lookup(loaded, message.frame_id, a)
+    assert first.message_name == "ExampleMessage"
+    assert first.decoded["Speed"] == pytest.approx(10.0)
+    assert cache.lookup(loaded, message.frame_id, a) is first
+    cache.lookup(loaded, message.frame_id, b)
+    assert cache.lookup(loaded, message.frame_id, a) is first
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.hit_rate == pytest.approx(0.5)
+
+
+def test_lru_is_bounded_and_dbc_change_clears() -> None:
+    cache = DecodeCache(lru_size=2)
+    for value in range(4):
+        cache.lookup(None, 0x1, bytes([value]))
+    assert cache.lookup(None, 0x1, bytes([0])).data_hex == "00"
+    assert cache.misses == 5
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    assert cache.lookup(loaded, 0x100, bytes(8)).message_name == "ExampleMessage"
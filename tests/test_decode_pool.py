@@ -0,0 +1,83 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app.pipeline import RxPipeline
+from canio.can_bus import ReceivedMessage
+from core.dbc_manager import DbcManager
+from core.decode_pool import ShardedDecoder
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistoryStore
+
+SAMPLE = Path("data/sample.dbc")
+
+
+def test_results_are_merged_in_timestamp_order() -> None:
+    pool = ShardedDecoder(SAMPLE, workers=2, batch=7)
+    delivered = []
+    pool.add_listener(lambda timestamp, arbitration_id, frame, tag: delivered.append((timestamp, arbitration_id, frame, tag)))
+    try:
+        for index in range(300):
+            arbitration_id = 0x100 if index % 3 else 0x101
+            pool.submit(index * 0.001, arbitration_id, bytes([index % 256]) + bytes(7), index)
+        assert pool.drain(timeout=30.0)
+    finally:
+        pool.close()
+    assert [tag for *_, tag in delivered] == list(range(300))
+    named = [frame for _, arbitration_id, frame, _ in delivered if arbitration_id == 0x100]
+    assert all(frame.message_name == "ExampleMessage" for frame in named)
+    assert all(frame.message_name is None for _, arbitration_id, frame, _ in delivered if arbitration_id == 0x101)
+    assert pool.outstanding == 0
+
+
+def test_pipeline_primes_entries_and_records_signals() -> None:
+    manager = DbcManager()
+    manager.load(SAMPLE)
+    pipeline = RxPipeline(manager, RxHistory(hot_capacity=64, segment_frames=64))
+    pipeline.signal_history = SignalHistoryStore()
+    pipeline.signal_history.watch("ExampleMessage", "Speed")
+    pipeline.set_decode_pool(ShardedDecoder(SAMPLE, workers=2))
+    entries = [pipeline.process(ReceivedMessage(index * 0.01, 0x100, bytes(8), False)) for index in range(20)]
+    try:
+        assert pipeline.decode_pool is not None and pipeline.decode_pool.drain(timeout=30.0)
+    finally:
+        pipeline.set_decode_pool(None)
+    assert all(entry is not None and entry.is_resolved for entry in entries)
+    history = pipeline.signal_history.history("ExampleMessage", "Speed")
+    assert history is not None and len(history) == 20
+
+
+def test_bad_payloads_and_dead_workers_do_not_stall_delivery() -> None:
+    pool = ShardedDecoder(SAMPLE, workers=2, batch=4)
+    delivered = []
+    pool.add_listener(lambda timestamp, arbitration_id, frame, tag: delivered.append(frame))
+    try:
+        # Too short for ExampleMessage: decodes to no signals instead of killing the worker.
+        pool.submit(0.0, 0x100, b"\x01")
+        assert pool.drain(timeout=30.0)
+        assert delivered[0].message_name == "ExampleMessage" and delivered[0].decoded == {}
+        pool._processes[0].kill()
+        for index in range(1, 41):
+            pool.submit(index * 0.001, 0x100 + index % 2, bytes(8))
+        assert pool.drain(timeout=30.0)
+        assert len(delivered) == 41 and pool.restarts == 1
+        assert all(frame.decoded for frame in delivered[1:] if frame.message_name)
+    finally:
+        pool.close()
+
+
+def test_partial_batches_go_out_by_age_per_shard() -> None:
+    # A long linger keeps the merge thread from flushing on its own during the test.
+    pool = ShardedDecoder(SAMPLE, workers=2, batch=16, linger=10.0)
+    try:
+        pool.submit(0.0, 0x101, bytes(8))
+        time.sleep(0.01)
+        pool.submit(0.001, 0x100, bytes(8))
+        with pool._lock:
+            due = pool._flush_due(pool._pending_since[1] + 10.0)
+            assert not pool._pending[1] and len(pool._in_flight[1]) == 1
+            assert pool._pending[0] and due == pytest.approx(pool._pending_since[0] + 10.0)
+        assert pool.drain(timeout=30.0) and pool.delivered == 2
+    finally:
+        pool.close()
@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from canio.can_bus import ReceivedMessage
+from canio.export import export_columnar
+from canio.logger import SessionLogger
+from core.dbc_manager import DbcManager
+
+
+def test_export_columnar_roundtrip(tmp_path: Path) -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    message = loaded.database.get_message_by_name("ExampleMessage")
+    log_path = tmp_path / "session.csv"
+    logger = SessionLogger(log_path, compression="zlib", chunk_rows=7)
+    for i in range(50):
+        logger.log(ReceivedMessage(i * 0.01, message.frame_id, message.encode({"Speed": i, "Rpm": 10 * i}), False))
+        logger.log(ReceivedMessage(i * 0.01, 0x7FF, bytes(2), False))
+    logger.close()
+
+    manifest_file = export_columnar(log_path, loaded, tmp_path / "columns", chunk_rows=16)
+    manifest = json.loads(manifest_file.read_text())
+    assert manifest["unmatched_frames"] == 50
+    info = manifest["messages"]["ExampleMessage"]
+    assert info["rows"] == 50
+    assert info["signals"]["Speed"]["unit"] == "km/h"
+    assert info["signals"]["Speed"]["scale"] == pytest.approx(0.01)
+
+    rpm = np.load(tmp_path / "columns" / info["signals"]["Rpm"]["file"], mmap_mode="r")
+    timestamps = np.load(tmp_path / "columns" / info["timestamp"], mmap_mode="r")
+    assert rpm.shape == (50,)
+    assert rpm[49] == 490
+    assert timestamps[10] == pytest.approx(0.1)
+
+
+def test_masked_ids_share_message_columns(tmp_path: Path) -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"), {"ExampleMessage": 0x7F0})
+    message = loaded.database.get_message_by_name("ExampleMessage")
+    log_path = tmp_path / "session.csv"
+    logger = SessionLogger(log_path)
+    for i in range(100):
+        logger.log(ReceivedMessage(i * 0.01, 0x100 + i % 2, message.encode({"Speed": 0, "Rpm": i}), False))
+    logger.close()
+
+    manifest = json.loads(export_columnar(log_path, loaded, tmp_path / "columns", chunk_rows=16).read_text())
+    info = manifest["messages"]["ExampleMessage"]
+    assert info["rows"] == 100 and manifest["unmatched_frames"] == 0
+    rpm = np.load(tmp_path / "columns" / info["signals"]["Rpm"]["file"])
+    assert rpm.tolist() == list(range(100))
+
+
+def test_clashing_names_get_their_own_files(tmp_path: Path) -> None:
+    dbc = tmp_path / "clash.dbc"
+    text = Path("data/sample.dbc").read_text().replace(
+        ' SG_ Speed : 0|16@1+ (0.01,0) [0|250] "km/h" ECU2\n SG_ Rpm : 16|16@1+ (1,0) [0|8000] "rpm" ECU2',
+        ' SG_ timestamp : 0|8@1+ (1,0) [0|255] "" ECU2\n SG_ Ab : 8|8@1+ (1,0) [0|255] "" ECU2\n'
+        ' SG_ AB : 16|8@1+ (1,0) [0|255] "" ECU2',
+    )
+    dbc.write_text(text)
+    loaded = DbcManager().load(dbc)
+    log_path = tmp_path / "session.csv"
+    logger = SessionLogger(log_path)
+    for i in range(10):
+        logger.log(ReceivedMessage(i * 0.5, 0x100, bytes([i, 2 * i, 3 * i]) + bytes(5), False))
+    logger.close()
+
+    manifest = json.loads(export_columnar(log_path, loaded, tmp_path / "columns", chunk_rows=4).read_text())
+    info = manifest["messages"]["ExampleMessage"]
+    files = {name: signal["file"] for name, signal in info["signals"].items()}
+    assert len(set(files.values()) | {info["timestamp"]}) == 4
+    for name, factor in (("timestamp", 1), ("Ab", 2), ("AB", 3)):
+        assert np.load(tmp_path / "columns" / files[name]).tolist() == [factor * i for i in range(10)]
+    assert np.load(tmp_path / "columns" / info["timestamp"]).tolist() == [i * 0.5 for i in range(10)]
+
+
+def test_many_messages_stay_within_open_file_limit(tmp_path: Path) -> None:
+    resource = pytest.importorskip("resource")
+    messages = "".join(
+        f'BO_ {0x200 + index} M{index}: 8 ECU1\n'
+        + "".join(f' SG_ S{bit} : {bit * 8}|8@1+ (1,0) [0|255] "" ECU2\n' for bit in range(4))
+        + "\n"
+        for index in range(100)
+    )
+    dbc = tmp_path / "many.dbc"
+    dbc.write_text(Path("data/sample.dbc").read_text().replace("CM_ BO_ 256", messages + "CM_ BO_ 256"))
+    loaded = DbcManager().load(dbc)
+    log_path = tmp_path / "session.csv"
+    logger = SessionLogger(log_path)
+    for index in range(300):
+        logger.log(ReceivedMessage(index * 0.01, 0x200 + index % 100, bytes(8), False))
+    logger.close()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, hard), hard))
+    try:
+        manifest = json.loads(export_columnar(log_path, loaded, tmp_path / "columns", chunk_rows=2).read_text())
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert len(manifest["messages"]) == 100 and manifest["messages"]["M7"]["rows"] == 3
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+
+from core.config import BusConfig
+from core.dbc_manager import DbcManager
+from core.filters import FilterError, compile_filter
+
+
+def test_id_terms() -> None:
+    flt = compile_filter("0x100-0x1FF and not 0x1F0 or 0x700/0x700")
+    assert flt.id_only
+    assert flt(0x100, b"")
+    assert not flt(0x1F0, b"")
+    assert flt(0x7DF, b"")
+    assert not flt(0x050, b"")
+
+
+def test_message_and_signal_predicates() -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    message = loaded.database.get_message_by_name("ExampleMessage")
+    fast = message.encode({"Speed": 120.0, "Rpm": 3500})
+    slow = message.encode({"Speed": 20.0, "Rpm": 800})
+    flt = compile_filter("ExampleMessage.Rpm > 3000 and ExampleMessage.Speed >= 100", loaded)
+    assert not flt.id_only
+    assert flt(message.frame_id, fast)
+    assert not flt(message.frame_id, slow)
+    assert not flt(0x101, fast)
+    assert compile_filter("ExampleMessage", loaded)(message.frame_id, slow)
+
+
+@pytest.mark.parametrize("expression", ["", "0x100 and", "(0x100", "Unknown", "0x100 ?"])
+def test_invalid_expressions(expression: str) -> None:
+    with pytest.raises(FilterError):
+        compile_filter(expression)
+
+
+def test_acceptance_filters_passed_to_python_can() -> None:
+    config = BusConfig(filters=[{"can_id": 0x100, "can_mask": 0x7F0, "extended": False}])
+    assert config.to_kwargs()["can_filters"] == [{"can_id": 0x100, "can_mask": 0x7F0, "extended": False}]
+    assert "can_filters" not in BusConfig().to_kwargs()
+
+
+def test_payload_pattern_and_id_hint() -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    flt = compile_filter('data ~ "AD ?? EF"', loaded)
+    assert flt(0x1, b"\x00\xAD\x01\xEF") and not flt(0x1, b"\xAD\xEF")
+    assert flt.may_match_id(0x7FF)
+    narrowed = compile_filter('ExampleMessage.Rpm > 10 and data ~ "00"', loaded)
+    assert narrowed.may_match_id(0x100) and not narrowed.may_match_id(0x101)
+    with pytest.raises(FilterError):
+        compile_filter('data ~ "ZZ"')
@@ -0,0 +1,75 @@
+import threading
+import time
+from pathlib import Path
+
+import can
+import pytest
+
+from canio.gateway import Gateway, GatewayError, GatewayRule, compile_transform
+from core.config import BusConfig
+from core.dbc_manager import DbcManager
+
+SAMPLE = Path("data/sample.dbc")
+
+
+def test_transform_expressions_are_validated() -> None:
+    assert compile_transform("max(Speed * 2, 10)", ["Speed"])({"Speed": 3.0}) == 10
+    with pytest.raises(GatewayError):
+        compile_transform("Speed.__class__", ["Speed"])
+    with pytest.raises(GatewayError):
+        compile_transform("Torque * 2", ["Speed"])
+
+
+def test_gateway_remaps_and_rewrites_between_virtual_buses() -> None:
+    loaded = DbcManager().load(SAMPLE)
+    buses = {"a": BusConfig(channel="gw-test-a"), "b": BusConfig(channel="gw-test-b")}
+    rules = [
+        GatewayRule("a", "b", "ExampleMessage", target_id=0x200, transforms={"Speed": "Speed * 2", "Rpm": "Rpm + 100"}),
+        GatewayRule("a", "b", "0x300-0x3FF"),
+    ]
+    gateway = Gateway(buses, rules, loaded)
+    received = []
+    done = threading.Event()
+    sink = can.Bus(channel="gw-test-b", interface="virtual")
+    source = can.Bus(channel="gw-test-a", interface="virtual")
+
+    def collect() -> None:
+        while len(received) < 3:
+            message = sink.recv(timeout=2.0)
+            if message is None:
+                break
+            received.append(message)
+        done.set()
+
+    reader = threading.Thread(target=collect, daemon=True)
+    gateway.start()
+    reader.start()
+    try:
+        payload = loaded.encode("ExampleMessage", {"Speed": 12.5, "Rpm": 900})
+        source.send(can.Message(arbitration_id=0x100, data=payload, is_extended_id=False))
+        source.send(can.Message(arbitration_id=0x123, data=b"\x01", is_extended_id=False))
+        source.send(can.Message(arbitration_id=0x321, data=b"\x02\x03", is_extended_id=False))
+        source.send(can.Message(arbitration_id=0x100, data=payload, is_extended_id=False))
+        assert done.wait(5.0)
+        time.sleep(0.05)
+    finally:
+        gateway.stop()
+        source.shutdown()
+        sink.shutdown()
+
+    assert [message.arbitration_id for message in received] == [0x200, 0x321, 0x200]
+    decoded = loaded.database.get_message_by_name("ExampleMessage").decode(received[0].data)
+    assert decoded["Speed"] == pytest.approx(25.0) and decoded["Rpm"] == 1000
+    assert bytes(received[1].data) == b"\x02\x03"
+    stats = gateway.stats()
+    assert (stats.received, stats.forwarded, stats.unrouted, stats.errors) == (4, 3, 1, 0)
+    assert 0.0 < stats.latency_p50_ms <= stats.latency_p99_ms <= stats.latency_max_ms
+
+
+def test_rules_are_checked_at_load() -> None:
+    loaded = DbcManager().load(SAMPLE)
+    buses = {"a": BusConfig(channel="gw-test-c")}
+    with pytest.raises(GatewayError):
+        Gateway(buses, [GatewayRule("a", "missing", "0x100")], loaded)
+    with pytest.raises(GatewayError):
+        Gateway(buses, [GatewayRule("a", "a", "ExampleMessage", transforms={"Torque": "Speed"})], loaded)
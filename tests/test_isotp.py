@@ -0,0 +1,102 @@
+import os
+from typing import List
+
+import pytest
+
+from app.isotp_bench import run_benchmark, theoretical_rate
+from canio.can_bus import CanBusController, ReceivedMessage
+from canio.isotp import IsoTpConfig, IsoTpError, IsoTpTransport, decode_st_min, encode_st_min
+from core.config import BusConfig
+
+
+class RecordingController:
+    """Stands in for CanBusController and keeps what was sent."""
+
+    def __init__(self) -> None:
+        self.sent: List[bytes] = []
+
+    def add_listener(self, listener) -> None:
+        pass
+
+    def remove_listener(self, listener) -> None:
+        pass
+
+    def send(self, arbitration_id: int, data: bytes, is_extended_id: bool = False, is_fd=None) -> None:
+        self.sent.append(data)
+
+
+def _pair(channel: str, frame_size: int = 8, **ecu_options):
+    bus = BusConfig(channel=channel, fd=frame_size > 8)
+    tester_bus, ecu_bus = CanBusController(bus), CanBusController(bus)
+    tester_bus.start()
+    ecu_bus.start()
+    tester = IsoTpTransport(tester_bus, IsoTpConfig(tx_id=0x7E0, rx_id=0x7E8, frame_size=frame_size, timeout=0.5))
+    ecu = IsoTpTransport(ecu_bus, IsoTpConfig(tx_id=0x7E8, rx_id=0x7E0, frame_size=frame_size, **ecu_options))
+    return (tester_bus, tester), (ecu_bus, ecu)
+
+
+def _close(*pairs) -> None:
+    for bus, transport in pairs:
+        transport.close()
+        bus.stop()
+
+
+def test_st_min_encoding() -> None:
+    assert encode_st_min(0) == 0 and encode_st_min(0.005) == 5 and encode_st_min(0.0003) == 0xF3
+    assert decode_st_min(0xF3) == pytest.approx(0.0003) and decode_st_min(0x14) == pytest.approx(0.02)
+    assert decode_st_min(0x90) == pytest.approx(0.127)
+
+
+@pytest.mark.parametrize("frame_size, sizes", [(8, [5, 300, 5000]), (64, [40, 3000])])
+def test_loopback_transfers(frame_size: int, sizes: List[int]) -> None:
+    tester, ecu = _pair(f"isotp-test-{frame_size}", frame_size, block_size=4, st_min=0.0002)
+    try:
+        for size in sizes:
+            payload = os.urandom(size)
+            tester[1].send(payload, timeout=10.0)
+            assert ecu[1].receive(timeout=2.0) == payload
+        ecu[1].send(b"\x62\xf1\x90", timeout=2.0)
+        assert tester[1].receive(timeout=2.0) == b"\x62\xf1\x90"
+    finally:
+        _close(tester, ecu)
+
+
+def test_sender_reports_missing_flow_control_and_overflow() -> None:
+    controller = RecordingController()
+    lonely = IsoTpTransport(controller, IsoTpConfig(tx_id=0x7E0, rx_id=0x7E8, timeout=0.1))  # type: ignore[arg-type]
+    with pytest.raises(IsoTpError, match="No flow control"):
+        lonely.send(bytes(100), timeout=2.0)
+    lonely.close()
+
+    tester, ecu = _pair("isotp-test-overflow", max_receive=64)
+    try:
+        with pytest.raises(IsoTpError, match="overflow"):
+            tester[1].send(bytes(100), timeout=2.0)
+    finally:
+        _close(tester, ecu)
+
+
+def test_receiver_drops_out_of_sequence_frames() -> None:
+    controller = RecordingController()
+    transport = IsoTpTransport(controller, IsoTpConfig(tx_id=0x7E8, rx_id=0x7E0))  # type: ignore[arg-type]
+    frames = [b"\x10\x14" + bytes(6), b"\x21" + bytes(7), b"\x23" + bytes(7)]
+    for data in frames:
+        transport.on_message(ReceivedMessage(0.0, 0x7E0, data, False))
+    assert controller.sent[0][:3] == b"\x30\x00\x00" and transport.errors == 1
+    assert transport.receive(timeout=0.05) is None
+    transport.close()
+
+
+def test_theoretical_rate_accounts_for_bitrate_and_st_min() -> None:
+    config = IsoTpConfig(tx_id=0x7E0, rx_id=0x7E8)
+    payload = bytes(4095)
+    fast = theoretical_rate(payload, config, 500_000)
+    assert 25 < fast < 40
+    assert theoretical_rate(payload, config, 500_000, st_min=0.001) < fast
+    assert theoretical_rate(payload, config, 1_000_000) == pytest.approx(2 * fast)
+
+
+def test_benchmark_reports_achieved_rate() -> None:
+    result = run_benchmark(1000, 3, BusConfig(channel="isotp-test-bench"))
+    assert result.achieved_kbps > 0 and result.theoretical_kbps > 0
+    assert "KB/s theoretical" in result.summary()
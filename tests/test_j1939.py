@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import pytest
+
+from app.pipeline import RxPipeline
+from canio.can_bus import ReceivedMessage
+from core.dbc_manager import DbcManager
+from core.filters import compile_filter
+from core.j1939 import TP_ABORT, TP_BAM, TP_RTS, TransportReassembler, make_id, parse_id, pgn_of
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistoryStore
+from core.trace import FixedTraceTable
+
+J1939_DBC = """VERSION ""
+
+NS_ :
+
+BS_:
+
+BU_: Engine Tool
+
+BO_ 2364539904 EEC1: 8 Engine
+ SG_ EngineSpeed : 24|16@1+ (0.125,0) [0|8031.875] "rpm" Tool
+
+BO_ 2566848766 Big: 20 Engine
+ SG_ First : 0|8@1+ (1,0) [0|255] "" Tool
+ SG_ Last : 152|8@1+ (1,0) [0|255] "" Tool
+
+BO_ 2565800190 PropA: 8 Tool
+ SG_ Command : 0|8@1+ (1,0) [0|255] "" Engine
+
+BA_DEF_ BO_ "VFrameFormat" ENUM "StandardCAN","ExtendedCAN","reserved","J1939PG";
+BA_DEF_DEF_ "VFrameFormat" "J1939PG";
+"""
+
+
+@pytest.fixture
+def j1939_dbc(tmp_path: Path) -> Path:
+    path = tmp_path / "j1939.dbc"
+    path.write_text(J1939_DBC)
+    return path
+
+
+def _cm(source: int, destination: int, control: int, size: int, pgn: int) -> ReceivedMessage:
+    data = bytes([control, size & 0xFF, size >> 8, (size + 6) // 7, 0xFF, pgn & 0xFF, (pgn >> 8) & 0xFF, pgn >> 16])
+    return ReceivedMessage(0.0, make_id(0xEC00, source, 7, destination), data, True)
+
+
+def _dt(source: int, destination: int, payload: bytes, timestamp: float = 0.0):
+    for index in range(0, len(payload), 7):
+        chunk = payload[index : index + 7].ljust(7, b"\xff")
+        yield ReceivedMessage(timestamp, make_id(0xEB00, source, 7, destination), bytes([index // 7 + 1]) + chunk, True)
+
+
+def test_identifier_fields() -> None:
+    eec1 = parse_id(0x0CF00417)
+    assert (eec1.priority, eec1.pgn, eec1.source, eec1.destination) == (3, 0xF004, 0x17, 0xFF)
+    request = parse_id(0x18EF2A17)
+    assert (request.pgn, request.source, request.destination) == (0xEF00, 0x17, 0x2A)
+    assert make_id(0xEF00, 0x17, 6, 0x2A) == 0x18EF2A17 and pgn_of(0x18FEEE00) == 0xFEEE
+
+
+def test_lookup_ignores_priority_and_addresses(j1939_dbc: Path) -> None:
+    loaded = DbcManager().load(j1939_dbc)
+    assert loaded.has_j1939
+    assert loaded.message_by_id(0x0CF00400).name == "EEC1"
+    assert loaded.message_by_id(0x18F00431).name == "EEC1"
+    assert loaded.message_by_id(0x18EF2A17).name == "PropA"
+    assert loaded.message_by_id(0x18FEEE00) is None
+    assert loaded.message_by_pgn(0xFF00).name == "Big"
+    assert compile_filter("EEC1", loaded)(0x18F00431, b"")
+
+
+def test_configured_id_mask_for_standard_frames() -> None:
+    loaded = DbcManager().load(Path("data/sample.dbc"), {"ExampleMessage": 0x7F0})
+    assert loaded.message_by_id(0x10A).name == "ExampleMessage"
+    assert loaded.message_by_id(0x110) is None
+    assert loaded.decode(0x10A, loaded.encode("ExampleMessage", {"Speed": 5.0, "Rpm": 7}))["Rpm"] == 7
+
+
+def test_bam_and_cmdt_reassembly() -> None:
+    reassembler = TransportReassembler()
+    payload = bytes(range(20))
+    bam = list(_dt(0x00, 0xFF, payload))
+    cmdt = list(_dt(0x17, 0x2A, payload[::-1]))
+    frames = [_cm(0x00, 0xFF, TP_BAM, 20, 0xFF00), _cm(0x17, 0x2A, TP_RTS, 20, 0xEF00)]
+    # Interleaved sessions, and a packet repeated after a CTS asked for it again.
+    frames += [bam[0], cmdt[0], cmdt[1], bam[1], cmdt[1], bam[2], cmdt[2]]
+    assembled = [result for frame in frames if (result := reassembler.feed(0.0, frame.arbitration_id, frame.data))]
+    assert [(m.pgn, m.source, m.destination, m.data) for m in assembled] == [
+        (0xFF00, 0x00, 0xFF, payload),
+        (0xEF00, 0x17, 0x2A, payload[::-1]),
+    ]
+    assert reassembler.completed == 2 and reassembler.pending == 0 and reassembler.dropped == 0
+
+
+def test_aborted_and_stale_sessions_are_dropped() -> None:
+    reassembler = TransportReassembler(timeout=0.5)
+    packets = list(_dt(0x17, 0x2A, bytes(20)))
+    for cm in (_cm(0x17, 0x2A, TP_RTS, 20, 0xEF00), _cm(0x2A, 0x17, TP_ABORT, 20, 0xEF00)):
+        reassembler.feed(0.0, cm.arbitration_id, cm.data)
+    assert reassembler.pending == 0 and reassembler.dropped == 1
+    cm = _cm(0x17, 0x2A, TP_RTS, 20, 0xEF00)
+    reassembler.feed(0.0, cm.arbitration_id, cm.data)
+    reassembler.feed(0.1, packets[0].arbitration_id, packets[0].data)
+    assert reassembler.feed(1.0, packets[1].arbitration_id, packets[1].data) is None
+    assert reassembler.pending == 0 and reassembler.dropped == 2
+
+
+def test_pipeline_decodes_reassembled_payloads(j1939_dbc: Path) -> None:
+    manager = DbcManager()
+    loaded = manager.load(j1939_dbc)
+    table, store = FixedTraceTable(), SignalHistoryStore()
+    pipeline = RxPipeline(manager, RxHistory(), trace_table=table, signal_history=store)
+    pipeline.transport = TransportReassembler()
+    store.watch("Big", "Last")
+    payload = loaded.encode("Big", {"First": 1, "Last": 200})
+    for frame in [_cm(0x21, 0xFF, TP_BAM, 20, 0xFF00), *_dt(0x21, 0xFF, payload, 0.5)]:
+        pipeline.process(frame)
+    row = table.get(make_id(0xFF00, 0x21))
+    assert row.entry.message_name == "Big" and row.entry.decoded["Last"] == 200
+    assert store.history("Big", "Last").last() == (0.5, 200.0)
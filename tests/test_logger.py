@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import pytest
+
+from canio.can_bus import ReceivedMessage
+from canio import logger as logger_module
+from canio.logger import LogReplay, SessionLogger, TriggerCapture, build_trigger, log_segments, manifest_path
+
+
+def _frame(ts: float, arbitration_id: int = 0x100, error: bool = False) -> ReceivedMessage:
+    return ReceivedMessage(ts, arbitration_id, bytes([int(ts * 10) % 256]), False, is_error_frame=error)
+
+
+def test_trigger_writes_pre_and_post_window(tmp_path: Path) -> None:
+    capture = TriggerCapture(
+        tmp_path,
+        "run",
+        trigger=build_trigger(lambda arb_id, data: arb_id == 0x7DF, on_error_frame=False),
+        pre_trigger=0.5,
+        post_trigger=0.3,
+    )
+    for i in range(20):
+        capture.log(_frame(i * 0.1))
+    capture.log(_frame(2.0, 0x7DF))
+    for i in range(21, 40):
+        capture.log(_frame(i * 0.1))
+    capture.close()
+
+    assert len(capture.segments) == 1
+    timestamps = [event.timestamp for event in LogReplay(capture.segments[0])]
+    assert min(timestamps) >= 1.5 - 1e-9
+    assert max(timestamps) <= 2.3 + 1e-9
+    assert 2.0 in timestamps
+
+
+def test_trigger_is_edge_sensitive_and_error_frames_fire(tmp_path: Path) -> None:
+    capture = TriggerCapture(tmp_path, "run", trigger=build_trigger(lambda i, d: i == 0x7DF), post_trigger=0.1)
+    for i in range(10):
+        capture.log(_frame(i * 1.0, 0x7DF))
+    assert len(capture.segments) == 1
+    capture.log(_frame(20.0, 0x123, error=True))
+    capture.fire(timestamp=30.0)
+    capture.close()
+    assert len(capture.segments) == 3
+
+
+def test_trigger_hands_the_ring_to_the_writer_thread(tmp_path: Path, monkeypatch) -> None:
+    release = threading.Event()
+    log = SessionLogger.log
+
+    def slow_log(self, message) -> None:
+        release.wait()
+        log(self, message)
+
+    monkeypatch.setattr(SessionLogger, "log", slow_log)
+    capture = TriggerCapture(tmp_path, "run", pre_trigger=100.0, post_trigger=100.0)
+    for i in range(1000):
+        capture.log(_frame(i * 0.01))
+    started = time.monotonic()
+    capture.fire(timestamp=10.0)
+    capture.log(_frame(10.5))
+    assert time.monotonic() - started < 1.0 and capture.capturing
+    release.set()
+    capture.close()
+    assert len(list(LogReplay(capture.segments[0]))) == 1001
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_segmented_log_rotates_and_streams_back(tmp_path: Path, compression) -> None:
+    path = tmp_path / "session-1.csv"
+    logger = SessionLogger(path, compression=compression, rotate_seconds=1.0, chunk_rows=10)
+    for i in range(100):
+        logger.log(ReceivedMessage(i * 0.05, 0x100 + i % 3, bytes([i, 0xAB]), False))
+    logger.close()
+
+    manifest = json.loads(manifest_path(path).read_text())
+    assert manifest["compression"] == compression
+    assert len(manifest["segments"]) == 5
+    assert sum(segment["frames"] for segment in manifest["segments"]) == 100
+    events = list(LogReplay(path))
+    assert [event.data[0] for event in events] == list(range(100))
+    assert events[7].arbitration_id == 0x101
+    assert len(list(LogReplay(manifest_path(path)))) == 100
+
+
+def test_segmented_log_rotates_by_size(tmp_path: Path) -> None:
+    path = tmp_path / "session-2.csv"
+    logger = SessionLogger(path, rotate_bytes=1000, chunk_rows=16)
+    for i in range(200):
+        logger.log(ReceivedMessage(float(i), 0x200, bytes(8), False))
+    logger.close()
+    segments = log_segments(path)
+    assert len(segments) > 3
+    assert all(segment.stat().st_size < 2000 for segment in segments)
+    assert len(list(LogReplay(path))) == 200
+
+
+def test_quiet_bus_reaches_disk_and_idle_segment_rotates(tmp_path: Path) -> None:
+    path = tmp_path / "quiet.csv"
+    logger = SessionLogger(path, compression="zlib", rotate_seconds=0.3, flush_interval=0.05)
+    for i in range(3):
+        logger.log(ReceivedMessage(float(i), 0x100, bytes([i]), False))
+    segment = tmp_path / "quiet.0000.csv.gz"
+    deadline = time.monotonic() + 5.0
+    text = ""
+    while text.count("\n") < 4 and time.monotonic() < deadline:
+        time.sleep(0.02)
+        if segment.exists():
+            text = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(segment.read_bytes()).decode()
+    assert text.count("\n") == 4
+    while logger._writer_thread._file is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert logger._writer_thread._file is None
+    logger.log(ReceivedMessage(3.0, 0x100, bytes([3]), False))
+    logger.close()
+    assert len(log_segments(path)) == 2
+    assert [event.data[0] for event in LogReplay(path)] == [0, 1, 2, 3]
+
+
+def test_full_writer_queue_drops_instead_of_blocking(tmp_path: Path, monkeypatch) -> None:
+    release = threading.Event()
+    write = logger_module._SegmentWriter._write
+
+    def slow_write(self, *chunk) -> None:
+        release.wait()
+        write(self, *chunk)
+
+    monkeypatch.setattr(logger_module._SegmentWriter, "_write", slow_write)
+    path = tmp_path / "busy.csv"
+    logger = SessionLogger(path, compression="zlib", chunk_rows=1)
+    started = time.monotonic()
+    for i in range(200):
+        logger.log(ReceivedMessage(float(i), 0x100, bytes([i]), False))
+    assert time.monotonic() - started < 1.0
+    assert logger.dropped > 0
+    release.set()
+    logger.close()
+    assert len(list(LogReplay(path))) + logger.dropped == 200
+
+
+def test_fd_flags_survive_logging_and_replay(tmp_path: Path) -> None:
+    path = tmp_path / "fd.csv"
+    logger = SessionLogger(path)
+    logger.log(ReceivedMessage(1.0, 0x123, bytes(64), False, is_fd=True, bitrate_switch=True))
+    logger.log(ReceivedMessage(1.1, 0x18FEF100, bytes(8), True))
+    logger.close()
+    replayed = [event.to_message(0.0) for event in LogReplay(path)]
+    assert replayed[0].is_fd and replayed[0].bitrate_switch and len(replayed[0].data) == 64
+    assert replayed[1].is_extended_id and not replayed[1].is_fd
+
+
+def test_lzma_segments_rotate_by_size(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(logger_module, "LZMA_SYNC_ROWS", 64, raising=False)
+    path = tmp_path / "xz.csv"
+    logger = SessionLogger(path, compression="lzma", rotate_bytes=1000, chunk_rows=32)
+    for i in range(1000):
+        logger.log(ReceivedMessage(i * 0.001, 0x100 + i % 7, bytes([i % 256, i // 256, 0xAB]), False))
+    logger.close()
+    segments = log_segments(path)
+    assert len(segments) > 3
+    assert all(segment.stat().st_size < 2000 for segment in segments)
+    assert [event.data[0] for event in LogReplay(path)] == [i % 256 for i in range(1000)]
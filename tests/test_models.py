@@ -0,0 +1,26 @@
+import sys
+from typing import List, Tuple
+
+from core.decode_cache import decode_frame
+from core.models import FLAG_EXTENDED, RxEntry
+
+
+def test_entry_is_compact() -> None:
+    entry = RxEntry(1.0, 0x18FEF100, bytes(8), flags=FLAG_EXTENDED)
+    assert not hasattr(entry, "__dict__")
+    assert sys.getsizeof(entry) <= 96
+    assert entry.dlc == 8 and entry.is_extended_id and not entry.is_error_frame
+
+
+def test_decode_is_lazy_and_cached() -> None:
+    calls: List[Tuple[int, bytes]] = []
+
+    def decoder(arbitration_id: int, data: bytes):
+        calls.append((arbitration_id, data))
+        return decode_frame(None, arbitration_id, data)
+
+    entry = RxEntry(1.0, 0x100, b"\x01\xAB", decoder=decoder)
+    assert not entry.is_resolved and calls == []
+    assert entry.data_hex == "01 AB"
+    assert entry.decoded == {} and entry.message_name is None
+    assert len(calls) == 1
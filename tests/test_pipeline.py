@@ -0,0 +1,53 @@
+from pathlib import Path
+from typing import List
+
+from app.pipeline import RxPipeline
+from canio.can_bus import ReceivedMessage
+from core.dbc_manager import DbcManager
+from core.filters import compile_filter
+from core.rx_history import RxHistory
+from core.signal_history import SignalHistoryStore
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.messages: List[ReceivedMessage] = []
+
+    def log(self, message: ReceivedMessage) -> None:
+        self.messages.append(message)
+
+
+def _pipeline() -> RxPipeline:
+    manager = DbcManager()
+    manager.load(Path("data/sample.dbc"))
+    return RxPipeline(manager, RxHistory(hot_capacity=16, segment_frames=16))
+
+
+def test_filter_skips_decode_and_display_but_logs_by_default() -> None:
+    pipeline = _pipeline()
+    recorder = _Recorder()
+    pipeline.logger = recorder  # type: ignore[assignment]
+    pipeline.filter = compile_filter("ExampleMessage", pipeline.dbc_manager.loaded)
+
+    assert pipeline.process(ReceivedMessage(0.0, 0x7FF, bytes(8), False)) is None
+    entry = pipeline.process(ReceivedMessage(0.1, 0x100, bytes(8), False))
+    assert entry is not None and entry.message_name == "ExampleMessage"
+    assert len(pipeline.history) == 1
+    assert len(recorder.messages) == 2
+
+    pipeline.filter_logging = True
+    pipeline.process(ReceivedMessage(0.2, 0x7FF, bytes(8), False))
+    assert len(recorder.messages) == 2
+
+
+def test_entries_decode_on_demand() -> None:
+    pipeline = _pipeline()
+    entry = pipeline.process(ReceivedMessage(0.0, 0x100, bytes(8), False))
+    assert entry is not None and not entry.is_resolved
+    assert entry.decoded == {"Speed": 0.0, "Rpm": 0}
+    assert entry.is_resolved
+
+    pipeline.signal_history = SignalHistoryStore()
+    pipeline.signal_history.watch("ExampleMessage", "Rpm")
+    entry = pipeline.process(ReceivedMessage(0.1, 0x100, bytes(8), False))
+    assert entry is not None and entry.is_resolved
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtGui  # noqa: E402
+
+from core.signal_history import SignalHistoryStore  # noqa: E402
+from gui.plot_dock import PlotTrace, SignalPlotCanvas  # noqa: E402
+
+
+def test_one_pixel_strip_still_draws() -> None:
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    store = SignalHistoryStore(capacity=4096, level_capacity=1024)
+    store.watch("ExampleMessage", "Speed")
+    for i in range(10000):
+        store.ingest("ExampleMessage", i * 0.001, {"Speed": float(i % 50)})
+    canvas = SignalPlotCanvas()
+    canvas.resize(300, 100)
+    canvas.set_store(store)
+    trace = PlotTrace("ExampleMessage", "Speed", QtGui.QColor("red"), 0.0, 50.0)
+    canvas.add_trace(trace)
+    canvas._redraw_all(9.53)
+    trace.last_point = None
+    canvas._draw_strip(299, 300, 9.5, 9.53)
+    assert trace.last_point is not None and trace.last_point[0] > 298
+    canvas.clear_traces()
+    app.processEvents()
@@ -0,0 +1,46 @@
+import json
+import threading
+import time
+
+from core.profiler import STAGES, SamplingProfiler, StageTimers
+
+
+def _spin_for_profile(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_stage_timers_only_record_while_enabled() -> None:
+    timers = StageTimers()
+    timers.stop("decode", timers.start())
+    timers.enable()
+    for _ in range(3):
+        timers.stop("decode", timers.start())
+    stats = timers.disable()
+    assert list(stats) == ["decode"] and stats["decode"].count == 3
+    assert timers.start() == 0.0
+
+
+def test_profiler_samples_named_threads_and_writes_collapsed_stacks(tmp_path) -> None:
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_for_profile, args=(stop,), name="busy-worker")
+    profiler = SamplingProfiler(interval=0.002)
+    worker.start()
+    profiler.start()
+    try:
+        time.sleep(0.2)
+        STAGES.stop("render", STAGES.start())
+    finally:
+        result = profiler.stop()
+        stop.set()
+        worker.join()
+    assert result.samples > 0
+    assert any(stack.startswith("busy-worker;") and "_spin_for_profile" in stack for stack in result.stacks)
+    assert result.stages["render"].count == 1 and not STAGES.enabled
+
+    path = result.write(tmp_path / "profile.collapsed.txt")
+    for line in path.read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+    summary = json.loads((tmp_path / "profile.collapsed.txt.stages.json").read_text())
+    assert summary["stages"]["render"]["count"] == 1
@@ -0,0 +1,79 @@
+import threading
+import time
+from pathlib import Path
+
+from core.models import RxEntry
+from core.rx_history import RxHistory
+
+
+def _fill(history: RxHistory, count: int) -> None:
+    for seq in range(count):
+        history.append(RxEntry(seq * 0.001, 0x100 + seq % 4, seq.to_bytes(4, "little")))
+
+
+def test_hot_and_cold_tiers_return_the_same_frames(tmp_path) -> None:
+    history = RxHistory(hot_capacity=8, segment_frames=16, spill_dir=tmp_path)
+    _fill(history, 100)
+    history.flush()
+    assert len(history) == 100
+    assert len(list(tmp_path.glob("*.rec"))) == 6
+
+    hot = history.get(99)
+    assert hot is not None and hot.data == (99).to_bytes(4, "little")
+    cold = history.get(5)
+    assert cold is not None
+    assert (cold.timestamp, cold.arbitration_id, cold.data) == (0.005, 0x101, (5).to_bytes(4, "little"))
+    current_segment = history.get(90)
+    assert current_segment is not None and current_segment.data == (90).to_bytes(4, "little")
+    assert [entry.data[0] for entry in history.latest(3)] == [99, 98, 97]
+    assert [entry.data[0] for entry in history.page(14, 4)] == [14, 15, 16, 17]
+
+
+def test_time_lookup_and_segment_limit(tmp_path) -> None:
+    history = RxHistory(hot_capacity=4, segment_frames=16, spill_dir=tmp_path, max_segments=2)
+    _fill(history, 100)
+    assert history.first == 64
+    assert history.get(63) is None and history.get(64) is not None
+    assert history.index_at(0.0) == 64
+    assert history.index_at(0.0705) == 71
+    assert history.index_at(10.0) == 100
+    assert history.frames([10, 70, 99]) == [(0.07, (70).to_bytes(4, "little")), (0.099, (99).to_bytes(4, "little"))]
+
+    history.clear()
+    assert len(history) == 0 and not list(tmp_path.glob("*.rec"))
+
+
+def test_indexes_are_pruned_with_dropped_segments(tmp_path) -> None:
+    history = RxHistory(hot_capacity=4, segment_frames=1024, spill_dir=tmp_path, max_segments=2)
+    _fill(history, 20000)
+    for seq in range(20000, 20010):
+        history.append(RxEntry(seq * 0.001, 0x7FF, b""))
+    retained = len(history)
+    assert sum(len(history.positions(arbitration_id)) for arbitration_id in history.ids()) <= 2 * retained
+    assert len(history._bucket_starts) <= 2 * retained // 1024 + 2
+    assert list(history.positions(0x7FF)) == list(range(20000, 20010))
+    assert history.index_at(0.0) == history.first
+    assert history.index_at(19.5) == 19500
+
+
+def test_segments_are_written_off_the_append_path(tmp_path, monkeypatch) -> None:
+    release = threading.Event()
+    write_bytes = Path.write_bytes
+
+    def slow_write(path: Path, data) -> int:
+        release.wait()
+        return write_bytes(path, data)
+
+    monkeypatch.setattr(Path, "write_bytes", slow_write)
+    history = RxHistory(hot_capacity=4, segment_frames=16, spill_dir=tmp_path, max_segments=3)
+    started = time.monotonic()
+    _fill(history, 100)
+    assert time.monotonic() - started < 1.0
+    assert history.first == 48
+    cold = history.get(50)
+    assert cold is not None and cold.data == (50).to_bytes(4, "little")
+    assert history.index_at(0.0705) == 71
+    release.set()
+    history.flush()
+    assert sorted(path.name for path in tmp_path.glob("*.rec")) == [f"segment-{n:06d}.rec" for n in (3, 4, 5)]
+    assert history.payloads([50, 70]) == [(50).to_bytes(4, "little"), (70).to_bytes(4, "little")]
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from core.dbc_manager import DbcManager
+from core.filters import compile_filter
+from core.models import RxEntry
+from core.rx_history import RxHistory
+from core.search import HistorySearch
+
+
+def _history(tmp_path: Path) -> RxHistory:
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    message = loaded.database.get_message_by_name("ExampleMessage")
+    history = RxHistory(hot_capacity=8, segment_frames=64, spill_dir=tmp_path)
+    for seq in range(1000):
+        if seq % 10 == 0:
+            data = message.encode({"Speed": 0.0, "Rpm": 7000 if seq == 500 else 100})
+            history.append(RxEntry(seq * 0.01, message.frame_id, data))
+        else:
+            history.append(RxEntry(seq * 0.01, 0x200 + seq % 3, bytes([seq % 256, 0xDE, 0xAD])))
+    return history
+
+
+def test_id_search_uses_the_index(tmp_path) -> None:
+    history = _history(tmp_path)
+    search = HistorySearch(history, compile_filter("0x100 or 0x202"))
+    assert search.count() == 100 + 300
+    assert search.next(95) == 98
+    assert search.next(98) == 100
+    assert search.previous(96) == 95
+    assert search.previous(95) == 92
+    assert search.previous(0) is None
+    assert search.next(999) is None
+
+
+def test_payload_and_signal_search(tmp_path) -> None:
+    history = _history(tmp_path)
+    loaded = DbcManager().load(Path("data/sample.dbc"))
+    signal = HistorySearch(history, compile_filter("ExampleMessage.Rpm > 5000", loaded), chunk=16)
+    assert signal.count() is None
+    assert signal.next(-1) == 500 and signal.previous(999) == 500
+    assert signal.next(500) is None
+
+    pattern = HistorySearch(history, compile_filter('data ~ "7B DE ??"'), chunk=16)
+    assert pattern.next(-1) == 123
+    assert pattern.next(123) == 379
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from app.session_diff import main
+from canio.can_bus import ReceivedMessage
+from canio.logger import SessionLogger
+from core.dbc_manager import DbcManager
+from core.session_diff import DiffTolerances, compare_sessions
+
+SAMPLE = Path("data/sample.dbc")
+
+
+def _record(path: Path, start: float, speeds, extra_period: float) -> Path:
+    loaded = DbcManager().load(SAMPLE)
+    logger = SessionLogger(path)
+    frames = []
+    for index, speed in enumerate(speeds):
+        payload = loaded.encode("ExampleMessage", {"Speed": speed, "Rpm": 1000})
+        frames.append(ReceivedMessage(start + index * 0.01, 0x100, payload, False))
+    for index in range(int(len(speeds) * 0.01 / extra_period)):
+        frames.append(ReceivedMessage(start + index * extra_period + 0.003, 0x200, bytes([index % 4]), False))
+    for frame in sorted(frames, key=lambda frame: frame.timestamp):
+        logger.log(frame)
+    logger.close()
+    return path
+
+
+def test_identical_sessions_at_different_start_times_match(tmp_path) -> None:
+    golden = _record(tmp_path / "golden.csv", 100.0, [10.0] * 200, 0.02)
+    candidate = _record(tmp_path / "candidate.csv", 5000.0, [10.0] * 200, 0.02)
+    result = compare_sessions(golden, candidate, dbc_path=SAMPLE)
+    assert result.differences() == []
+    assert result.ids[0x100].paired == 200 and result.ids[0x100].name == "ExampleMessage"
+
+
+def test_signal_count_and_cycle_differences_are_reported(tmp_path) -> None:
+    golden = _record(tmp_path / "golden.csv", 0.0, [10.0] * 200, 0.02)
+    candidate = _record(tmp_path / "candidate.csv", 0.0, [10.0] * 150 + [12.5] * 50, 0.04)
+    tolerances = DiffTolerances(signals={"Speed": 1.0})
+    result = compare_sessions(golden, candidate, tolerances, dbc_path=SAMPLE)
+    issues = dict((diff.arbitration_id, issues) for diff, issues in result.differences())
+    assert issues[0x100] == ["signals differ: Speed by 2.5"]
+    assert any(issue.startswith("count 100 -> 50") for issue in issues[0x200])
+    assert any(issue.startswith("cycle 20.00 -> 40.00 ms") for issue in issues[0x200])
+    assert result.ids[0x100].first_mismatch[0] == 1.5
+
+    loose = compare_sessions(golden, candidate, DiffTolerances(signals={"Speed": 3.0}), dbc_path=SAMPLE)
+    assert 0x100 not in {diff.arbitration_id for diff, _ in loose.differences()}
+
+
+def test_raw_compare_and_sharded_run_agree(tmp_path) -> None:
+    golden = _record(tmp_path / "golden.csv", 0.0, [10.0] * 100, 0.02)
+    candidate = _record(tmp_path / "candidate.csv", 0.0, [10.0] * 99 + [11.0], 0.02)
+    single = compare_sessions(golden, candidate)
+    sharded = compare_sessions(golden, candidate, workers=2)
+    assert single.summary_lines() == sharded.summary_lines()
+    assert single.summary_lines()[0] == "0x100: 1 of 100 payloads differ"
+    assert main([str(golden), str(candidate), "--json", str(tmp_path / "diff.json")]) == 1
+    assert main([str(golden), str(golden)]) == 0
+
+
+def test_sharded_run_matches_single_process(tmp_path) -> None:
+    golden = _record(tmp_path / "golden.csv", 0.0, [10.0] * 3000, 0.02)
+    candidate = _record(tmp_path / "candidate.csv", 7.0, [10.0] * 2000 + [12.0] * 1000, 0.03)
+    single = compare_sessions(golden, candidate, dbc_path=SAMPLE)
+    sharded = compare_sessions(golden, candidate, dbc_path=SAMPLE, workers=3)
+    assert sharded.ids == single.ids
+    assert sharded.ids[0x100].signal_max_diff == {"Speed": 2.0, "Rpm": 0.0}
@@ -0,0 +1,153 @@
+import multiprocessing
+import threading
+import time
+import uuid
+
+import can
+import pytest
+
+from app.capture import run_capture
+from canio.can_bus import CanBusController
+from canio.shm_ring import RingReader, SharedFrameRing
+from core.config import BusConfig
+
+
+def ring_name() -> str:
+    return f"test-ring-{uuid.uuid4().hex[:8]}"
+
+
+def write_frames(name: str, count: int, attached, done) -> None:
+    ring = SharedFrameRing(name, capacity=count)
+    attached.wait(5.0)
+    for index in range(count):
+        ring.append(float(index), index & 0x7FF, 0, index.to_bytes(4, "little"))
+    done.wait(5.0)
+    ring.close()
+
+
+def capture_with_traffic(name: str, stop, ready) -> None:
+    """Capture process whose virtual bus is fed by a thread, since virtual buses do not cross processes."""
+    channel = f"{name}-bus"
+
+    def send() -> None:
+        bus = can.Bus(interface="virtual", channel=channel)
+        index = 0
+        while not stop.is_set():
+            bus.send(can.Message(arbitration_id=0x123, data=index.to_bytes(4, "little"), is_extended_id=False))
+            index += 1
+            time.sleep(0.002)
+        bus.shutdown()
+
+    threading.Thread(target=send, daemon=True).start()
+    run_capture(BusConfig(channel=channel, interface="virtual"), name, 1024, stop, ready)
+
+
+def test_reader_gets_frames_in_order_and_counts_overruns() -> None:
+    ring = SharedFrameRing(ring_name(), capacity=16)
+    reader = RingReader(ring.name)
+    try:
+        for index in range(10):
+            ring.append(float(index), 0x100 + index, 0, bytes([index]) * (index % 9))
+        records = reader.read()
+        assert records["arbitration_id"].tolist() == [0x100 + index for index in range(10)]
+        assert reader.read().size == 0
+        for index in range(10, 50):
+            ring.append(float(index), 0x100, 0, b"")
+        messages = reader.messages()
+        assert reader.lost == 50 - 10 - 15
+        assert [message.timestamp for message in messages] == [float(index) for index in range(35, 50)]
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_readers_attach_and_detach_independently() -> None:
+    ring = SharedFrameRing(ring_name(), capacity=64)
+    ring.append(0.0, 0x1, 0, b"\x01")
+    latest, oldest = RingReader(ring.name), RingReader(ring.name, start="oldest")
+    try:
+        ring.append(1.0, 0x2, 4, bytes(range(12)))
+        latest.close()
+        ring.append(2.0, 0x3, 0, b"")
+        first, fd, last = oldest.messages()
+        assert first.data == b"\x01" and last.arbitration_id == 0x3
+        assert fd.is_fd and fd.data == bytes(range(12))
+    finally:
+        oldest.close()
+        ring.close()
+
+
+def test_reader_in_another_process() -> None:
+    name, count = ring_name(), 20_000
+    attached, done = multiprocessing.Event(), multiprocessing.Event()
+    writer = multiprocessing.Process(target=write_frames, args=(name, count, attached, done))
+    writer.start()
+    try:
+        deadline = time.time() + 5.0
+        while True:
+            try:
+                reader = RingReader(name, start="oldest")
+                break
+            except FileNotFoundError:
+                assert time.time() < deadline
+                time.sleep(0.01)
+        attached.set()
+        seen = []
+        while len(seen) + reader.lost < count and time.time() < deadline:
+            seen.extend(int.from_bytes(m.data, "little") for m in reader.messages())
+        assert reader.lost == 0 and seen == list(range(count))
+        reader.close()
+    finally:
+        done.set()
+        writer.join(5.0)
+
+
+def test_controller_attaches_to_capture_process() -> None:
+    name = ring_name()
+    stop, ready = multiprocessing.Event(), multiprocessing.Event()
+    process = multiprocessing.Process(target=capture_with_traffic, args=(name, stop, ready), daemon=True)
+    process.start()
+    controller = CanBusController(BusConfig(channel=name, interface="shm"))
+    received = []
+    controller.set_callback(received.append)
+    try:
+        assert ready.wait(10.0)
+        controller.start()
+        reader = RingReader(name)
+        assert not reader.closed
+        deadline = time.time() + 5.0
+        while len(received) < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(received) >= 10 and all(message.arbitration_id == 0x123 for message in received)
+        counters = [int.from_bytes(message.data, "little") for message in received]
+        assert counters == sorted(counters)
+        stop.set()
+        process.join(5.0)
+        assert process.exitcode == 0 and reader.closed
+        reader.close()
+        while controller.is_running and time.time() < deadline:
+            time.sleep(0.01)
+        assert not controller.is_running and name in (controller.connection_lost or "")
+    finally:
+        stop.set()
+        controller.stop()
+        if process.is_alive():
+            process.terminate()
+
+
+def test_live_ring_is_not_replaced() -> None:
+    name = ring_name()
+    ring = SharedFrameRing(name, capacity=16)
+    try:
+        with pytest.raises(FileExistsError):
+            SharedFrameRing(name, capacity=16)
+        ring.append(0.0, 0x1, 0, b"")
+    finally:
+        ring.close(unlink=False)
+    replacement = SharedFrameRing(name, capacity=16)
+    reader = RingReader(name, start="oldest")
+    try:
+        assert reader.backlog == 0 and not reader.closed
+    finally:
+        reader.close()
+        replacement.close()
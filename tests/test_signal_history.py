@@ -0,0 +1,40 @@
+import numpy as np
+
+from core.signal_history import SignalHistory, SignalHistoryStore
+
+
+def _filled(samples: int) -> SignalHistory:
+    history = SignalHistory(capacity=4096, level_capacity=1024, factor=8, levels=4)
+    for i in range(samples):
+        history.append(i * 0.001, float(np.sin(i * 0.01)) * (1 + i % 7))
+    return history
+
+
+def test_short_range_returns_raw_samples() -> None:
+    history = _filled(10000)
+    t, v = history.query(9.0, 9.1, max_points=500)
+    assert len(t) == 101
+    assert t[0] == np.float64(9.0)
+    assert np.all(np.diff(t) > 0)
+
+
+def test_long_range_is_bounded_and_keeps_extremes() -> None:
+    history = _filled(200000)
+    t, v = history.query(100.0, 199.999, max_points=400)
+    assert 0 < len(t) <= 402
+    expected = np.array([np.sin(i * 0.01) * (1 + i % 7) for i in range(100000, 200000)])
+    assert v.max() == np.float64(expected.max())
+    assert v.min() == np.float64(expected.min())
+    assert t[-1] > 199.9
+
+
+def test_store_ingests_only_watched_signals() -> None:
+    store = SignalHistoryStore(capacity=64, level_capacity=16)
+    store.watch("ExampleMessage", "Speed")
+    store.ingest("ExampleMessage", 1.0, {"Speed": 12.5, "Rpm": 900})
+    store.ingest("Other", 1.0, {"Speed": 1.0})
+    assert store.history("ExampleMessage", "Rpm") is None
+    t, v = store.query("ExampleMessage", "Speed", 0.0, 2.0)
+    assert list(v) == [12.5]
+    store.unwatch("ExampleMessage", "Speed")
+    assert store.watched == []
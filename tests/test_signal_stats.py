@@ -0,0 +1,119 @@
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.pipeline import RxPipeline
+from canio.can_bus import ReceivedMessage
+from core.dbc_manager import DbcManager
+from core.rx_history import RxHistory
+from core.signal_stats import SignalStatistics
+
+SAMPLE = Path("data/sample.dbc")
+
+
+def _two_message_dbc(tmp_path: Path, speed_scale: str = "0.01") -> Path:
+    path = tmp_path / "two.dbc"
+    text = SAMPLE.read_text().replace("(0.01,0)", f"({speed_scale},0)", 1)
+    text = text.replace(
+        "CM_ BO_ 256",
+        'BO_ 512 Other: 8 ECU1\n SG_ Level : 0|8@1+ (1,0) [0|255] "" ECU2\n\nCM_ BO_ 256',
+    )
+    path.write_text(text)
+    return path
+
+
+def test_signal_ids_are_contiguous_per_message(tmp_path) -> None:
+    loaded = DbcManager().load(_two_message_dbc(tmp_path))
+    assert loaded.signal_count == 3
+    first, names = loaded.signal_layout("Other")
+    assert loaded.signal_keys[first] == ("Other", "Level") and names == ("Level",)
+    assert loaded.signal_layout("Missing") is None
+
+
+@pytest.mark.parametrize("batch", [1, 7, 256])
+def test_matches_numpy_over_batches(batch: int) -> None:
+    stats = SignalStatistics(DbcManager().load(SAMPLE), batch=batch)
+    stats.set_watched({"ExampleMessage"})
+    speeds = np.random.default_rng(3).normal(80.0, 12.0, 500)
+    for index, speed in enumerate(speeds):
+        decoded = {"Speed": float(speed)}
+        if index % 4 == 0:
+            # Rpm is absent from most frames, like an inactive multiplexed signal.
+            decoded["Rpm"] = float(index // 8)
+        stats.update("ExampleMessage", index * 0.01, decoded)
+    result = stats.stats("ExampleMessage")
+    speed = result["Speed"]
+    assert speed.count == 500
+    assert speed.mean == pytest.approx(speeds.mean())
+    assert speed.std == pytest.approx(speeds.std(ddof=1))
+    assert (speed.minimum, speed.maximum) == (speeds.min(), speeds.max())
+    assert speed.rate == pytest.approx((speeds[-1] - speeds[-2]) / 0.01)
+    rpm = result["Rpm"]
+    assert rpm.count == 125 and rpm.last == 62.0
+    # Rpm steps every second sample; its last two samples (frames 492, 496) differ by one.
+    assert rpm.last_change == pytest.approx(4.96)
+    assert rpm.rate == pytest.approx(25.0)
+
+
+def test_pipeline_records_every_accepted_frame(tmp_path) -> None:
+    manager = DbcManager()
+    loaded = manager.load(_two_message_dbc(tmp_path))
+    pipeline = RxPipeline(manager, RxHistory(1000))
+    pipeline.signal_stats = SignalStatistics(loaded)
+    pipeline.signal_stats.set_watched({"ExampleMessage", "Other"})
+    for index in range(10):
+        speed = 1000 if index < 6 else 2000
+        data = struct.pack("<HH", speed, 100 * index) + bytes(4)
+        pipeline.process(ReceivedMessage(1.0 + index, 0x100, data, False))
+    pipeline.process(ReceivedMessage(20.0, 0x200, bytes([7]) + bytes(7), False))
+    result = pipeline.signal_stats.stats("ExampleMessage")
+    assert result["Speed"].count == 10
+    assert (result["Speed"].minimum, result["Speed"].maximum) == (10.0, 20.0)
+    assert result["Speed"].last_change == 7.0 and result["Speed"].rate == 0.0
+    assert result["Rpm"].rate == pytest.approx(100.0)
+    assert pipeline.signal_stats.stats("Other")["Level"].last == 7.0
+
+
+def test_rebase_resets_only_changed_messages(tmp_path) -> None:
+    manager = DbcManager()
+    path = _two_message_dbc(tmp_path)
+    stats = SignalStatistics(manager.load(path))
+    stats.set_watched({"ExampleMessage", "Other"})
+    stats.update("ExampleMessage", 1.0, {"Speed": 5.0, "Rpm": 900.0})
+    stats.update("Other", 1.0, {"Level": 3.0})
+    _two_message_dbc(tmp_path, speed_scale="0.1")
+    loaded, diff = manager.reload()
+    rebased = stats.rebased(loaded, diff.affected)
+    assert rebased.stats("ExampleMessage") == {}
+    assert rebased.stats("Other")["Level"].count == 1
+
+
+def test_choice_signals_are_recorded_as_numbers(tmp_path) -> None:
+    path = _two_message_dbc(tmp_path)
+    path.write_text(path.read_text() + '\nVAL_ 512 Level 0 "Off" 1 "Low" 2 "High" ;\n')
+    manager = DbcManager()
+    loaded = manager.load(path)
+    pipeline = RxPipeline(manager, RxHistory(1000))
+    pipeline.signal_stats = SignalStatistics(loaded)
+    pipeline.signal_stats.set_watched({"Other"})
+    for index in range(300):
+        pipeline.process(ReceivedMessage(index * 0.01, 0x200, bytes([index % 3]) + bytes(7), False))
+    level = pipeline.signal_stats.stats("Other")["Level"]
+    assert level.count == 300 and (level.minimum, level.maximum) == (0.0, 2.0)
+    assert level.last == 299 % 3
+
+
+def test_unwatched_messages_are_not_decoded(tmp_path) -> None:
+    manager = DbcManager()
+    loaded = manager.load(_two_message_dbc(tmp_path))
+    pipeline = RxPipeline(manager, RxHistory(1000))
+    pipeline.signal_stats = SignalStatistics(loaded)
+    pipeline.signal_stats.set_watched({"Other"})
+    example = pipeline.process(ReceivedMessage(1.0, 0x100, bytes(8), False))
+    other = pipeline.process(ReceivedMessage(1.0, 0x200, bytes([4]) + bytes(7), False))
+    assert example is not None and example._frame is None
+    assert other is not None and other._frame is not None
+    assert pipeline.signal_stats.stats("ExampleMessage") == {}
+    assert pipeline.signal_stats.stats("Other")["Level"].last == 4.0
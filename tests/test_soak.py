@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from app.soak import LatencyHistogram, SoakRunner, find_sequence_gaps, max_sustainable_rate
+
+
+def test_find_sequence_gaps() -> None:
+    assert find_sequence_gaps([0, 1, 2, 3], 4) == []
+    assert find_sequence_gaps([0, 2, 3, 7], 10) == [(1, 1), (4, 3), (8, 2)]
+
+
+def test_latency_histogram_percentiles() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) == 0.0
+    for index in range(1, 1001):
+        histogram.add(index / 1e5)
+    assert histogram.count == 1000 and histogram.maximum == pytest.approx(0.01)
+    assert histogram.percentile(0.5) == pytest.approx(0.005, rel=0.03)
+    assert histogram.percentile(0.99) == pytest.approx(0.0099, rel=0.03)
+    assert histogram.percentile(1.0) == pytest.approx(0.01)
+
+
+def test_step_delivers_every_frame(tmp_path: Path) -> None:
+    runner = SoakRunner(Path("data/sample.dbc"), channel="soak-test", log_dir=tmp_path, latency_budget_ms=500.0)
+    result = runner.run_step(rate=200, duration=0.25)
+    assert result.sent == 50
+    assert result.received == result.sent
+    assert result.log_gaps == []
+    assert result.passed
+    assert max_sustainable_rate([result]) == 200
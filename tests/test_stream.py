@@ -0,0 +1,173 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from canio.can_bus import CanBusController, ReceivedMessage
+from canio.stream import (
+    FILTER,
+    FRAMES,
+    FrameServer,
+    StreamClient,
+    _message,
+    _read_message,
+    acceptance_expression,
+    pack_frame,
+    unpack_frames,
+)
+from core.config import BusConfig
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_records_round_trip() -> None:
+    frames = [
+        ReceivedMessage(1.5, 0x123, b"\x01\x02", False),
+        ReceivedMessage(2.5, 0x18FF0001, bytes(range(64)), True, is_fd=True, bitrate_switch=True),
+    ]
+    assert unpack_frames(b"".join(pack_frame(frame) for frame in frames)) == frames
+
+
+def test_subscribers_get_their_filtered_frames(tmp_path) -> None:
+    server = FrameServer(f"unix:{tmp_path / 'can.sock'}")
+    server.start()
+    everything, filtered = [], []
+    first = StreamClient(server.address, everything.append)
+    second = StreamClient(server.address, filtered.append, "0x200-0x2FF")
+    try:
+        assert wait_for(lambda: len(server.subscribers) == 2)
+        for index in range(100):
+            server.publish(ReceivedMessage(float(index), 0x100 if index % 2 else 0x200, bytes([index]), False))
+        assert wait_for(lambda: len(everything) == 100 and len(filtered) == 50)
+    finally:
+        first.close()
+        second.close()
+        server.stop()
+    assert [frame.timestamp for frame in everything] == [float(index) for index in range(100)]
+    assert {frame.arbitration_id for frame in filtered} == {0x200}
+
+
+def test_filter_applies_from_the_first_frame(tmp_path) -> None:
+    server = FrameServer(f"unix:{tmp_path / 'can.sock'}", linger=0.0)
+    server.start()
+    raw = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    raw.settimeout(2.0)
+    try:
+        raw.connect(str(tmp_path / "can.sock"))
+        time.sleep(0.05)
+        server.publish(ReceivedMessage(0.0, 0x100, b"\x00", False))
+        raw.sendall(_message(FILTER, b"0x200"))
+        assert wait_for(lambda: len(server.subscribers) == 1)
+        server.publish(ReceivedMessage(1.0, 0x100, b"\x01", False))
+        server.publish(ReceivedMessage(2.0, 0x200, b"\x02", False))
+        kind, payload = _read_message(raw.makefile("rb"))
+        assert kind == FRAMES and [frame.arbitration_id for frame in unpack_frames(payload)] == [0x200]
+    finally:
+        raw.close()
+        server.stop()
+
+
+def test_unix_socket_is_only_replaced_when_stale(tmp_path) -> None:
+    path = tmp_path / "can.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    server = FrameServer(f"unix:{path}")
+    server.start()
+    try:
+        with pytest.raises(OSError):
+            FrameServer(f"unix:{path}").start()
+        received = []
+        client = StreamClient(server.address, received.append)
+        assert wait_for(lambda: len(server.subscribers) == 1)
+        server.publish(ReceivedMessage(1.0, 0x123, b"", False))
+        assert wait_for(lambda: len(received) == 1)
+        client.close()
+    finally:
+        server.stop()
+    (tmp_path / "plain").write_text("keep")
+    with pytest.raises(OSError):
+        FrameServer(f"unix:{tmp_path / 'plain'}").start()
+    assert (tmp_path / "plain").read_text() == "keep"
+
+
+def test_slow_subscriber_drops_without_blocking(tmp_path) -> None:
+    server = FrameServer(f"unix:{tmp_path / 'can.sock'}", max_pending_bytes=4096, linger=0.0)
+    server.start()
+    gate = threading.Event()
+    received = []
+
+    def slow(message: ReceivedMessage) -> None:
+        gate.wait()
+        received.append(message)
+
+    client = StreamClient(server.address, slow)
+    try:
+        assert wait_for(lambda: len(server.subscribers) == 1)
+        started = time.perf_counter()
+        for index in range(50_000):
+            server.publish(ReceivedMessage(float(index), 0x100, bytes(64), False, is_fd=True))
+        assert time.perf_counter() - started < 5.0
+        gate.set()
+        assert wait_for(lambda: client.dropped > 0 and client.dropped + len(received) == 50_000, 5.0)
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_controller_notices_the_server_going_away(tmp_path) -> None:
+    server = FrameServer(f"unix:{tmp_path / 'can.sock'}")
+    server.start()
+    controller = CanBusController(BusConfig(channel=server.address, interface="stream"))
+    controller.start()
+    try:
+        assert wait_for(lambda: len(server.subscribers) == 1)
+        server.stop()
+        assert wait_for(lambda: not controller.is_running)
+        assert "closed the connection" in (controller.connection_lost or "")
+        with pytest.raises(RuntimeError):
+            for _ in range(10):
+                controller.send(0x123, b"\x00")
+    finally:
+        controller.stop()
+
+
+def test_controller_uses_stream_backend(tmp_path) -> None:
+    address = "tcp:127.0.0.1:0"
+    bus = BusConfig(channel="test-stream", interface="virtual")
+    server = FrameServer(address, bus_config=bus)
+    server.start()
+    received = []
+    config = BusConfig(
+        channel=server.address, interface="stream", filters=[{"can_id": 0x321, "can_mask": 0x7FF}]
+    )
+    controller = CanBusController(config)
+    controller.set_callback(received.append)
+    controller.start()
+    other = CanBusController(bus)
+    echoed = []
+    other.set_callback(echoed.append)
+    other.start()
+    try:
+        assert wait_for(lambda: len(server.subscribers) == 1)
+        time.sleep(0.05)
+        other.send(0x111, b"\x00")
+        other.send(0x321, b"\x01\x02")
+        assert wait_for(lambda: len(received) == 1)
+        controller.send(0x222, b"\xAA")
+        assert wait_for(lambda: len(echoed) == 1)
+    finally:
+        controller.stop()
+        other.stop()
+        server.stop()
+    assert received[0].arbitration_id == 0x321 and received[0].data == b"\x01\x02"
+    assert echoed[0].arbitration_id == 0x222 and echoed[0].data == b"\xAA"
+    assert acceptance_expression([]) is None
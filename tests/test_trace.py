@@ -0,0 +1,32 @@
+import pytest
+
+from core.models import RxEntry
+from core.trace import FixedTraceTable
+
+
+def _entry(timestamp: float, arbitration_id: int) -> RxEntry:
+    return RxEntry(timestamp, arbitration_id, b"\x00")
+
+
+def test_cycle_statistics() -> None:
+    table = FixedTraceTable()
+    for ts in (0.0, 0.010, 0.030, 0.040):
+        table.update(_entry(ts, 0x100))
+    state = table.get(0x100)
+    assert state is not None
+    assert state.count == 4
+    assert state.last_delta == pytest.approx(0.010)
+    assert state.min_cycle == pytest.approx(0.010)
+    assert state.max_cycle == pytest.approx(0.020)
+    assert state.avg_cycle == pytest.approx(0.040 / 3)
+
+
+def test_rows_are_stable_and_changes_tracked() -> None:
+    table = FixedTraceTable()
+    table.update(_entry(0.0, 0x200))
+    table.update(_entry(0.0, 0x100))
+    assert [state.arbitration_id for state in table.rows] == [0x200, 0x100]
+    assert table.take_changed() == [0, 1]
+    assert table.take_changed() == []
+    table.update(_entry(0.1, 0x100))
+    assert table.take_changed() == [1]